@@ -0,0 +1,91 @@
+"""
+Checks the streaming signal path against the batch reference on a synthetic market.
+
+    python -m benchmarks.equivalence --tickers 20 --steps 60
+
+For every strategy and ticker, a stream is seeded on a prefix of the 1h history and then
+fed one bar at a time: first a revised version of the forming bar, then the bar itself,
+then a live price. After each step get_current_signal must match get_reference_signal
+(the last row of generate_signals) over the same bars. Exits 1 on any mismatch.
+"""
+import argparse
+import math
+import os
+import sys
+from typing import Any, Dict, List
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _close(a: Any, b: Any, tolerance: float) -> bool:
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        a, b = float(a), float(b)
+        if math.isnan(a) or math.isnan(b):
+            return math.isnan(a) and math.isnan(b)
+        return math.isclose(a, b, rel_tol=tolerance, abs_tol=tolerance)
+    return a == b
+
+def _mismatches(streamed: Dict[str, Any], reference: Dict[str, Any], tolerance: float) -> List[str]:
+    problems = []
+    for key in ("signal", "confidence", "price", "timestamp"):
+        if not _close(streamed.get(key), reference.get(key), tolerance):
+            problems.append(f"{key}: stream {streamed.get(key)!r} != reference {reference.get(key)!r}")
+    for key, value in (reference.get("metadata") or {}).items():
+        if not _close((streamed.get("metadata") or {}).get(key), value, tolerance):
+            problems.append(f"metadata.{key}: stream {streamed['metadata'].get(key)!r} != reference {value!r}")
+    return problems
+
+def _repriced(df: pd.DataFrame, price: float) -> pd.DataFrame:
+    """`df` with its forming (last) bar traded at `price`, as BarStream.snapshot applies a live price."""
+    df = df.copy()
+    last = df.index[-1]
+    df.loc[last, "High"] = max(df.loc[last, "High"], price)
+    df.loc[last, "Low"] = min(df.loc[last, "Low"], price)
+    df.loc[last, "Close"] = price
+    return df
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare streaming signals with the batch reference.")
+    parser.add_argument("--tickers", type=int, default=20, help="Synthetic tickers per strategy")
+    parser.add_argument("--steps", type=int, default=60, help="Bars appended one at a time after seeding")
+    parser.add_argument("--period", default="60d", help="1h history per ticker")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="Relative/absolute float tolerance")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    from benchmarks.synthetic import SyntheticMarketProvider, universe
+    from src.strategies.ema_strategy import EMAStrategy
+    from src.strategies.bollinger_strategy import BollingerStrategy
+    from src.strategies.volume_strategy import VolumeStrategy
+    from src.strategies.pennystock_strategy import PennyBreakoutStrategy
+
+    provider = SyntheticMarketProvider(seed=args.seed)
+    frames = {t: provider.series(t, "1h", args.period) for t in universe(args.tickers)}
+    failures = checks = 0
+    for strategy in (EMAStrategy(), BollingerStrategy(), VolumeStrategy(), PennyBreakoutStrategy()):
+        for ticker, df in frames.items():
+            start = max(1, len(df) - args.steps)
+            for end in range(start, len(df) + 1):
+                window = df.iloc[:end]
+                live = float(window['Close'].iloc[-1]) * 1.01
+                cases = [
+                    (_repriced(window, float(window['Close'].iloc[-1]) * 0.99), None),
+                    (window, None),
+                    (window, live)
+                ]
+                for frame, live_price in cases:
+                    streamed = strategy.get_current_signal(frame, ticker=ticker, live_price=live_price)
+                    reference = strategy.get_reference_signal(_repriced(frame, live_price) if live_price else frame, ticker=ticker)
+                    problems = _mismatches(streamed, reference, args.tolerance)
+                    checks += 1
+                    if problems:
+                        failures += 1
+                        if failures <= 20:
+                            print(f"{strategy.name} {ticker} bar {end} live={live_price}: " + "; ".join(problems))
+    print(f"{checks} checks, {failures} mismatches")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
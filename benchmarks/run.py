@@ -0,0 +1,332 @@
+"""
+End-to-end engine benchmarks on a synthetic market.
+
+    python -m benchmarks.run --tickers 100,1000,5000 --output benchmarks/results/run.json
+    python -m benchmarks.run --tickers 1000 --baseline benchmarks/results/previous.json
+
+Each universe size runs in a fresh subprocess against its own temporary cache directory,
+so the module-level singletons (state cache, market store, frame cache) start cold. Stages
+are timed separately and written as JSON; `--baseline` compares against an earlier file
+and flags stages that slowed down by more than `--tolerance`.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ["ingest", "ranking", "intelligence", "forecast", "persistence", "state", "api", "serialization"]
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "mean_ms": 1000 * sum(ordered) / len(ordered),
+        "p50_ms": 1000 * pick(0.50),
+        "p95_ms": 1000 * pick(0.95),
+        "max_ms": 1000 * ordered[-1]
+    }
+
+def _timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+def run_universe(args: argparse.Namespace) -> Dict[str, Any]:
+    """Runs every requested stage for one universe size (inside the benchmark subprocess)."""
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    # Point the singletons at a scratch cache and unthrottle provider traffic before
+    # anything that reads the settings at import time is loaded
+    from src.core.config import settings, tickers as configured_tickers
+    settings.data.cache_dir = args.cache_dir
+    if args.timeframes:
+        settings.data.timeframes = args.timeframes.split(",")
+    settings.fetch.rate_per_second = args.provider_rate
+    settings.fetch.burst = max(1, int(args.provider_rate))
+    if args.workers is not None:
+        settings.engine.ranking_workers = args.workers
+    os.makedirs(args.cache_dir, exist_ok=True)
+
+    from benchmarks.synthetic import SyntheticMarketProvider, universe
+    import src.data.providers as providers
+    providers.market_provider = SyntheticMarketProvider(seed=args.seed)
+
+    import asyncio
+    from fastapi import Response
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from starlette.requests import Request
+    from src.api import routes
+    from src.core.state import TickerState, state_cache
+    from src.core.changes import change_tracker
+    from src.engine.orchestrator import ServiceOrchestrator
+
+    names = universe(args.size)
+    configured_tickers[:] = names
+    orchestrator = ServiceOrchestrator()
+    data_manager = orchestrator.data_manager
+    stages = set(args.stages.split(","))
+    results: Dict[str, Any] = {"tickers": args.size, "timeframes": settings.data.timeframes}
+
+    # Data has to be there for every later stage, so ingest always runs
+    seconds, _ = _timed(data_manager.fetch_all, names)
+    results["ingest"] = {
+        "seconds": seconds,
+        "per_ticker_ms": 1000 * seconds / args.size,
+        "rows_written": data_manager.sync_stats["rows_written"],
+        "rows_per_second": data_manager.sync_stats["rows_written"] / seconds if seconds else 0.0
+    }
+
+    # Later stages need ranked strategies, signals and forecasts in the state cache
+    populate = {"intelligence", "forecast", "state", "serialization"} & stages
+    if "ranking" in stages or populate:
+        seconds, _ = _timed(orchestrator.selector.select_best_strategies, names)
+        results["ranking"] = {"seconds": seconds, "per_ticker_ms": 1000 * seconds / args.size}
+        if "ranking" in stages:
+            # Unchanged history: every ticker should be served from the ranking cache
+            hits = orchestrator.selector.cache_hits
+            seconds, _ = _timed(orchestrator.selector.select_best_strategies, names)
+            results["ranking"].update({
+                "cached_seconds": seconds,
+                "cached_per_ticker_ms": 1000 * seconds / args.size,
+                "cache_hits": orchestrator.selector.cache_hits - hits
+            })
+
+    if populate:
+        # First cycle computes everything; later ones only the tickers whose price moved
+        cycles = []
+        moved = names[:int(args.size * args.dirty_fraction)]
+        for cycle in range(args.cycles):
+            if cycle:
+                for ticker in moved:
+                    state_cache.update_price(ticker, (state_cache.price(ticker) or 1.0) * (1.01 if cycle % 2 else 1 / 1.01))
+                # Time a full sweep of the universe rather than only what is due by now
+                orchestrator.refresh_scheduler.expire()
+            seconds, _ = _timed(asyncio.run, orchestrator.update_all_intelligence())
+            cycles.append(seconds)
+        results["intelligence"] = {
+            "first_cycle_seconds": cycles[0],
+            "cycle_seconds": cycles,
+            "per_ticker_ms": 1000 * cycles[0] / args.size,
+            "tracker": change_tracker.stats(),
+            "refresh": orchestrator.refresh_scheduler.stats()
+        }
+
+    if "forecast" in stages:
+        sample = names[:min(args.size, args.sample)]
+        samples = []
+        for ticker in sample:
+            seconds, _ = _timed(orchestrator.forecaster.compute_forecast, ticker)
+            samples.append(seconds)
+        results["forecast"] = _percentiles(samples)
+
+    if "persistence" in stages:
+        for ticker in names:
+            state_cache.update_price(ticker, 1.0)
+        flush_seconds, _ = _timed(state_cache.flush, wait=True)
+        snapshot = state_cache._snapshot_states(names)
+        conn = state_cache.db.connect()
+        try:
+            write_seconds, _ = _timed(state_cache.db.save_ticker_states, snapshot, conn)
+        finally:
+            conn.close()
+        load_seconds, loaded = _timed(state_cache.db.load_all_ticker_states)
+        results["persistence"] = {
+            "write_behind_flush_seconds": flush_seconds,
+            "full_snapshot_write_seconds": write_seconds,
+            "full_load_seconds": load_seconds,
+            "rows": len(loaded)
+        }
+
+    if "state" in stages:
+        # Column store footprint against the dict of TickerState models it replaces, and a
+        # live-price poll applied per ticker versus as one batch
+        import tracemalloc
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        models = {ticker: TickerState(**state_cache.store.record(slot)) for ticker, slot in state_cache.store.slots.items()}
+        model_bytes = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del models
+        prices = {ticker: 1.0 + i % 7 for i, ticker in enumerate(names)}
+        single_seconds, _ = _timed(lambda: [state_cache.update_price(t, p) for t, p in prices.items()])
+        bulk_seconds, _ = _timed(state_cache.update_prices, prices)
+        store_bytes = state_cache.store.nbytes() * len(state_cache.store) / state_cache.store.capacity
+        results["state"] = {
+            "store_bytes_per_ticker": store_bytes / args.size,
+            "model_bytes_per_ticker": model_bytes / args.size,
+            "price_updates_per_ticker_ms": 1000 * single_seconds,
+            "price_updates_bulk_ms": 1000 * bulk_seconds
+        }
+
+    if "api" in stages:
+        def respond(coro) -> int:
+            # What FastAPI does with a plain return value: encode, then render JSON
+            result = asyncio.run(coro)
+            response = result if isinstance(result, Response) else JSONResponse(content=jsonable_encoder(result))
+            return len(response.body)
+
+        def request(headers: Dict[str, str]) -> Request:
+            raw = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+            return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": b""})
+
+        # A state changes before every request (snapshot re-encoded), then revalidations of an unchanged one
+        states, size = [], 0
+        for _ in range(args.requests):
+            state_cache.update_price(names[0], 1.0)
+            seconds, size = _timed(respond, routes.get_all_states(request({})))
+            states.append(seconds)
+        etag = asyncio.run(routes.get_all_states(request({}))).headers["etag"]
+        revalidated = []
+        for _ in range(args.requests):
+            seconds, _ = _timed(respond, routes.get_all_states(request({"If-None-Match": etag})))
+            revalidated.append(seconds)
+        historical = []
+        for ticker in names[:min(args.size, args.requests)]:
+            seconds, _ = _timed(respond, routes.get_historical(ticker, "1h"))
+            historical.append(seconds)
+        results["api"] = {
+            "states": {**_percentiles(states), "bytes": size},
+            "states_not_modified": _percentiles(revalidated),
+            "historical": _percentiles(historical)
+        }
+
+    if "serialization" in stages:
+        # Cold encode of every ticker state (bypassing the per-version payload cache):
+        # the table-driven serializer against the generic recursive one it replaces
+        from src.utils.serialization import sanitize_json_data, sanitize_generic
+        snapshot = state_cache.get_all_states()
+        timings, bodies = {}, {}
+        for name, sanitize in (("generic", sanitize_generic), ("fast", sanitize_json_data)):
+            samples = []
+            for _ in range(args.requests):
+                seconds, bodies[name] = _timed(lambda: JSONResponse(content=sanitize(snapshot)).body)
+                samples.append(seconds)
+            timings[name] = {**_percentiles(samples), "bytes": len(bodies[name])}
+        # What /states does: re-encode only the changed ticker and splice the cached encodings
+        samples = []
+        for _ in range(args.requests):
+            state_cache.update_price(names[0], 1.0)
+            seconds, bodies["assembled"] = _timed(state_cache.encode_states, state_cache.symbols())
+            samples.append(seconds)
+        timings["assembled"] = {**_percentiles(samples), "bytes": len(bodies["assembled"])}
+        results["serialization"] = {
+            **timings,
+            "identical": (bodies["generic"] == bodies["fast"] and
+                          bodies["assembled"] == JSONResponse(content=sanitize_generic(state_cache.get_all_states())).body),
+            "speedup": timings["generic"]["p50_ms"] / timings["fast"]["p50_ms"]
+        }
+
+    state_cache.close()
+    return results
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Human-readable regressions of headline timings against a baseline result file."""
+    headline = {
+        "ingest": "seconds",
+        "ranking": "seconds",
+        "intelligence": "first_cycle_seconds",
+        "forecast": "p50_ms",
+        "persistence": "full_snapshot_write_seconds"
+    }
+    previous = {run["tickers"]: run for run in baseline.get("runs", [])}
+    regressions = []
+    for run in current["runs"]:
+        base = previous.get(run["tickers"])
+        if not base:
+            continue
+        checks = [(stage, key, run.get(stage, {}).get(key), base.get(stage, {}).get(key)) for stage, key in headline.items()]
+        for endpoint in ("states", "historical"):
+            checks.append((f"api.{endpoint}", "p50_ms",
+                           run.get("api", {}).get(endpoint, {}).get("p50_ms"),
+                           base.get("api", {}).get(endpoint, {}).get("p50_ms")))
+        for stage, key, now, before in checks:
+            if now is None or not before:
+                continue
+            change = now / before - 1.0
+            if change > tolerance:
+                regressions.append(f"{run['tickers']} tickers: {stage}.{key} {before:.4g} -> {now:.4g} (+{change:.0%})")
+    return regressions
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the intelligence engine on a synthetic market.")
+    parser.add_argument("--tickers", default="100,1000", help="Comma-separated universe sizes (100 to 10000)")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to time")
+    parser.add_argument("--timeframes", default=None, help="Override the configured timeframes, e.g. 1h,1d")
+    parser.add_argument("--workers", type=int, default=None, help="Ranking processes (default: config)")
+    parser.add_argument("--cycles", type=int, default=2, help="update_all_intelligence cycles to time")
+    parser.add_argument("--dirty-fraction", type=float, default=0.1, help="Share of tickers whose price moves between cycles")
+    parser.add_argument("--sample", type=int, default=200, help="Tickers sampled for per-call forecast latency")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per API endpoint")
+    parser.add_argument("--provider-rate", type=float, default=1e6, help="Scheduler budget in requests/second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="Earlier result JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before a stage is flagged")
+    # Internal: run a single universe size and print its JSON (used by the parent process)
+    parser.add_argument("--size", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.size is not None:
+        print(json.dumps(run_universe(args), default=str))
+        return
+
+    runs = []
+    for size in [int(s) for s in args.tickers.split(",")]:
+        with tempfile.TemporaryDirectory(prefix="bench-") as cache_dir:
+            command = [sys.executable, "-m", "benchmarks.run", "--size", str(size), "--cache-dir", cache_dir]
+            for option in ("stages", "timeframes", "workers", "cycles", "dirty_fraction", "sample", "requests", "provider_rate", "seed"):
+                value = getattr(args, option)
+                if value is not None:
+                    command += [f"--{option.replace('_', '-')}", str(value)]
+            print(f"Benchmarking {size} tickers...", file=sys.stderr)
+            completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(completed.stderr, file=sys.stderr)
+                raise SystemExit(f"Benchmark for {size} tickers failed")
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    report = {
+        "created": datetime.now().isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "runs": runs
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    for run in runs:
+        summary = {stage: run[stage] for stage in STAGES if stage in run}
+        print(f"{run['tickers']} tickers: " + json.dumps(summary, default=str), file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import zlib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List, Optional
+from src.data.providers import BAR_FREQUENCIES, MarketDataProvider, period_to_timedelta
+
+# Bars per year for each interval on the continuous (24/7) synthetic calendar
+BARS_PER_YEAR = {tf: pd.Timedelta(days=365) / pd.Timedelta(freq) for tf, freq in BAR_FREQUENCIES.items()}
+
+def universe(n: int) -> List[str]:
+    """Synthetic ticker symbols SYN00000..SYN{n-1}."""
+    return [f"SYN{i:05d}" for i in range(n)]
+
+class SyntheticMarketProvider(MarketDataProvider):
+    """
+    Geometric Brownian motion market for benchmarks.
+
+    Every (ticker, interval) series is seeded from its name, so repeated downloads return
+    the same bars. Prices start anywhere between $0.50 and $500 (so the penny-stock rules
+    are exercised), volume has injected spikes, and a small share of bars is dropped as
+    trading halts followed by a price gap. Bars run on a continuous calendar anchored at
+    construction time, so the newest bar always looks fresh to the engine.
+    """
+    name = "synthetic"
+
+    def __init__(self, seed: int = 0, spike_rate: float = 0.03, gap_rate: float = 0.002,
+                 now: Optional[pd.Timestamp] = None):
+        self.seed = seed
+        self.spike_rate = spike_rate
+        self.gap_rate = gap_rate
+        self.now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        self.requests = 0
+
+    def series(self, ticker: str, interval: str, period: str) -> pd.DataFrame:
+        """Full trailing `period` of bars for one ticker."""
+        freq = pd.Timedelta(BAR_FREQUENCIES[interval])
+        last = self.now.floor(freq)
+        n = max(2, int(period_to_timedelta(period) / freq))
+        rng = np.random.default_rng([self.seed, zlib.crc32(f"{ticker}:{interval}".encode("utf-8"))])
+        profile = np.random.default_rng([self.seed, zlib.crc32(ticker.encode("utf-8"))])
+
+        price0 = float(np.exp(profile.uniform(np.log(0.5), np.log(500.0))))
+        annual_vol = profile.uniform(0.2, 1.2)
+        sigma = annual_vol / np.sqrt(BARS_PER_YEAR[interval])
+        drift = profile.normal(0.0, 0.3) / BARS_PER_YEAR[interval] - 0.5 * sigma ** 2
+
+        returns = rng.normal(drift, sigma, n)
+        # Halts: a run of missing bars, then the price reopens with a gap
+        halted = np.zeros(n, dtype=bool)
+        for start in np.flatnonzero(rng.random(n) < self.gap_rate):
+            length = int(rng.integers(1, 12))
+            halted[start:start + length] = True
+            if start + length < n:
+                returns[start + length] += rng.normal(0.0, 8 * sigma)
+
+        close = price0 * np.exp(np.cumsum(returns))
+        open_ = np.empty(n)
+        open_[0] = price0
+        open_[1:] = close[:-1] * np.exp(rng.normal(0.0, 0.2 * sigma, n - 1))
+        wick = np.abs(rng.normal(0.0, 0.5 * sigma, (2, n)))
+        high = np.maximum(open_, close) * (1 + wick[0])
+        low = np.minimum(open_, close) * (1 - wick[1])
+        volume = np.round(rng.lognormal(np.log(2e5), 0.5, n) * np.where(rng.random(n) < self.spike_rate, rng.uniform(3, 8, n), 1.0))
+
+        index = pd.date_range(end=last, periods=n, freq=freq, name="Datetime")
+        df = pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+        return df[~halted]
+
+    def download(self, tickers: List[str], interval: str, period: Optional[str] = None,
+                 start: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        self.requests += 1
+        window = {"1m": "7d", "1d": "1y"}.get(interval, "60d")
+        frames = {}
+        for ticker in tickers:
+            df = self.series(ticker, interval, period or window)
+            if start is not None:
+                bound = pd.Timestamp(start)
+                df = df[df.index >= (bound.tz_localize("UTC") if bound.tzinfo is None else bound)]
+            if not df.empty:
+                frames[ticker] = df
+        return frames
+
+    def list_universe(self) -> List[str]:
+        return universe(10000)
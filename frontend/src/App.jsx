@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { api } from './services/api';
 import TickerCard from './components/TickerCard';
 import TickerDetails from './components/TickerDetails';
+import { chartPointBudget } from './components/PriceChart';
 import MetricsBar from './components/MetricsBar';
 import LandingPage from './components/LandingPage';
 import { getMarketRegion, getMarketStatus } from './utils/marketHours';
@@ -61,22 +62,18 @@ function App() {
   }, []);
 
   useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const states = await api.getAllStates();
-        if (!states || typeof states !== 'object') return;
-
-        const newData = {};
-        Object.keys(states).forEach(ticker => {
-          newData[ticker] = {
-            price: states[ticker].last_price,
-            signal: states[ticker].last_signal
-          };
-        });
-        setData(newData);
-      } catch (err) {
-        console.error('Bulk fetch failed', err);
-      }
+    const applyStates = ({ full, states }) => {
+      if (!states || typeof states !== 'object') return;
+
+      const changed = {};
+      Object.keys(states).forEach(ticker => {
+        changed[ticker] = {
+          price: states[ticker].last_price,
+          signal: states[ticker].last_signal
+        };
+      });
+      // Snapshots replace everything; deltas only carry the tickers that changed
+      setData(prev => (full ? changed : { ...prev, ...changed }));
     };
 
     const fetchMetrics = async () => {
@@ -89,13 +86,13 @@ function App() {
     };
 
     if (tickers.length > 0) {
-      fetchData();
+      const unsubscribe = api.subscribeStates(applyStates);
       fetchMetrics();
-      const interval = setInterval(() => {
-        fetchData();
-        fetchMetrics();
-      }, 15000);
-      return () => clearInterval(interval);
+      const interval = setInterval(fetchMetrics, 15000);
+      return () => {
+        unsubscribe();
+        clearInterval(interval);
+      };
     }
   }, [tickers]);
 
@@ -137,8 +134,8 @@ function App() {
     setForecast(null);
 
     try {
-      // Fetch historical data (1h for 7-day view)
-      const hist = await api.getHistoricalData(ticker, '1h');
+      // Fetch historical data (1h for 7-day view), downsampled to what the chart can draw
+      const hist = await api.getHistoricalData(ticker, '1h', { maxPoints: chartPointBudget() });
       if (Array.isArray(hist) && hist.length > 0) {
         setHistoricalData(hist);
       }
@@ -1,5 +1,9 @@
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, ReferenceLine, ReferenceArea } from 'recharts';
 
+// Points the chart can actually draw: about one per horizontal pixel of the detail modal
+// (95vw, capped at 1200px)
+export const chartPointBudget = () => Math.round(Math.min(window.innerWidth * 0.95, 1200));
+
 const PriceChart = ({ data, forecast, isBullish }) => {
     // Determine colors based on bias
     const strokeColor = 'var(--accent-primary)';
@@ -20,6 +20,48 @@ export const api = {
     return res.json();
   },
 
+  async getStatesSince(version) {
+    // { version, full, states }: only the states changed after `version` (all of them when full)
+    const query = version == null ? '0' : version;
+    const res = await fetch(`${BASE_URL}/states?since=${query}`);
+    if (!res.ok) throw new Error('Failed to fetch state changes');
+    return res.json();
+  },
+
+  subscribeStates(onChange, pollMs = 15000) {
+    // Pushes { full, states } for every batch of changed tickers. Uses the server-sent
+    // event stream (which resumes from the last event id on reconnect); falls back to
+    // polling /states?since= where EventSource is unavailable. Returns an unsubscribe function.
+    if (typeof EventSource !== 'undefined') {
+      const source = new EventSource(`${BASE_URL}/states/stream`);
+      const handle = (event) => {
+        try {
+          onChange(JSON.parse(event.data));
+        } catch (error) {
+          console.error('Bad state event', error);
+        }
+      };
+      source.addEventListener('snapshot', handle);
+      source.addEventListener('delta', handle);
+      source.onerror = (error) => console.warn('State stream interrupted, reconnecting...', error);
+      return () => source.close();
+    }
+
+    let version = null;
+    const poll = async () => {
+      try {
+        const update = await api.getStatesSince(version);
+        version = update.version;
+        if (update.full || Object.keys(update.states).length > 0) onChange(update);
+      } catch (error) {
+        console.error('State poll failed', error);
+      }
+    };
+    poll();
+    const interval = setInterval(poll, pollMs);
+    return () => clearInterval(interval);
+  },
+
   async enhanceUniverse() {
     const res = await fetch(`${BASE_URL}/tickers/enhance`, { method: 'POST' });
     if (!res.ok) throw new Error('Failed to enhance universe');
@@ -73,10 +115,21 @@ export const api = {
     return res.json();
   },
 
-  async getHistoricalData(ticker, timeframe = '1h') {
-    const res = await fetch(`${BASE_URL}/historical/${ticker}?timeframe=${timeframe}`);
+  async getHistoricalData(ticker, timeframe = '1h', { maxPoints, start, end } = {}) {
+    // Fetched as parallel arrays (downsampled server-side to maxPoints) and zipped into
+    // one record per bar, keyed by `timestamp` plus the OHLCV columns
+    const params = new URLSearchParams({ timeframe, format: 'columnar' });
+    if (maxPoints) params.set('max_points', String(Math.round(maxPoints)));
+    if (start) params.set('start', new Date(start).toISOString());
+    if (end) params.set('end', new Date(end).toISOString());
+    const res = await fetch(`${BASE_URL}/historical/${ticker}?${params}`);
     if (!res.ok) throw new Error(`Failed to fetch historical for ${ticker}`);
-    return res.json();
+    const { Datetime: timestamps = [], ...columns } = await res.json();
+    return timestamps.map((timestamp, i) => {
+      const bar = { timestamp };
+      Object.keys(columns).forEach(name => { bar[name] = columns[name][i]; });
+      return bar;
+    });
   },
 
   async getHealth() {
@@ -1,28 +1,66 @@
-import uvicorn
 import asyncio
-import pandas as pd # Required for health check timestamp
-from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from fastapi.middleware.cors import CORSMiddleware
-from src.api.routes import router
-from src.core.config import settings
-from src.core.logger import logger
-from src.engine.orchestrator import ServiceOrchestrator
-from src.api import routes
+# Imported first: it timestamps process start for the startup-phase timings
+from src.core.startup import startup
 
-orchestrator = ServiceOrchestrator()
-routes.orchestrator_instance = orchestrator
+with startup.phase("web stack"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+with startup.phase("config"):
+    from src.core.config import settings
+    from src.core.logger import logger
+from src.api.health import router as health_router, WarmupGate
+
+# Built by load_engine; None until the analytics stack has loaded
+orchestrator = None
+
+def load_engine(app: FastAPI):
+    """
+    Imports the analytics stack, restores persisted state and mounts the engine routes.
+    Runs in a worker thread after the port is bound in lazy startup mode.
+    """
+    global orchestrator
+    startup.loading()
+    with startup.phase("analytics stack"):
+        import pandas, pyarrow  # noqa: F401
+    with startup.phase("state restore"):
+        from src.core.state import state_cache  # noqa: F401
+    with startup.phase("engine"):
+        from src.api import routes
+        from src.engine.orchestrator import ServiceOrchestrator
+        orchestrator = ServiceOrchestrator()
+        routes.orchestrator_instance = orchestrator
+    app.include_router(routes.router)
+    # Regenerate the OpenAPI schema with the engine routes in it
+    app.openapi_schema = None
+    startup.mark_ready()
+    timings = ", ".join(f"{p['phase']} {p['ms']:.0f}ms" for p in startup.phases)
+    logger.info(f"Engine ready {startup.ready_seconds:.2f}s after start ({timings})")
+
+async def warm_up(app: FastAPI):
+    try:
+        await asyncio.to_thread(load_engine, app)
+    except Exception as e:
+        startup.fail(e)
+        logger.error(f"CRITICAL: engine failed to load: {e}")
+        return
+    # Start orchestrator in the background so requests are served while it syncs
+    asyncio.create_task(orchestrator.start())
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Initializing Intelligence Server...")
-    # Start orchestrator in the background so the port binds immediately
-    asyncio.create_task(orchestrator.start())
+    if settings.app.startup_mode == "eager":
+        await warm_up(app)
+    else:
+        # Bind first (/health answers immediately); heavy imports and state load in the background
+        asyncio.create_task(warm_up(app))
     yield
     # Shutdown
     logger.info("Shutting down Intelligence Server...")
-    await orchestrator.stop()
+    if orchestrator is not None:
+        await orchestrator.stop()
 
 app = FastAPI(
     title=settings.app.name,
@@ -30,6 +68,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Added before CORS so it runs inside it and 503s still carry CORS headers
+app.add_middleware(WarmupGate)
 app.add_middleware( CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
@@ -37,10 +77,11 @@ app.add_middleware( CORSMiddleware,
     allow_headers=["*"],
 )
 
-app.include_router(router)
+app.include_router(health_router)
 
 if __name__ == "__main__":
     import os
+    import uvicorn
     port = int(os.environ.get("PORT", 8000))
     logger.info(f"Starting {settings.app.name} on http://0.0.0.0:{port}")
     uvicorn.run(app, host="0.0.0.0", port=port)
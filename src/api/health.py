@@ -0,0 +1,29 @@
+from datetime import datetime
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from src.core.startup import startup
+
+# Served from the first moment the port is bound, before the analytics stack has loaded
+router = APIRouter()
+
+@router.get("/health")
+async def health_check():
+    return {"status": "healthy", "ready": startup.ready, "timestamp": str(datetime.now()), "startup": startup.report()}
+
+class WarmupGate:
+    """
+    ASGI middleware answering 503 (with Retry-After) for every path but `allow` until the
+    engine routes are mounted, so clients can tell "starting" from "not found".
+    """
+
+    def __init__(self, app, allow: tuple = ("/health",)):
+        self.app = app
+        self.allow = allow
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not startup.ready and scope["path"] not in self.allow:
+            detail = f"Server is starting ({startup.status})" if startup.error is None else f"Startup failed: {startup.error}"
+            response = JSONResponse({"detail": detail}, status_code=503, headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,75 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from fastapi import Request, Response
+from src.utils.serialization import render_json
+
+class ResponseCache:
+    """
+    Pre-encoded JSON bodies for hot read endpoints, rebuilt only when their version changes.
+
+    Each entry holds the body exactly as FastAPI would render the payload, plus a strong
+    ETag (a hash of those bytes). Requests whose If-None-Match carries the current tag get
+    an empty 304, so idle dashboards cost a version check per poll.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], Any], encoded: bool = False) -> Tuple[str, bytes]:
+        """
+        (etag, body) for `key` at `version`; calls `build` only on a miss. `build` returns a
+        JSON-safe payload, or with `encoded` the rendered body itself.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+        body = build() if encoded else render_json(build())
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        with self._lock:
+            self._entries[key] = (version, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag, body
+
+    def respond(self, request: Request, key: Hashable, version: Hashable, build: Callable[[], Any],
+                encoded: bool = False) -> Response:
+        etag, body = self.get(key, version, build, encoded)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(len(entry[2]) for entry in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified
+            }
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+# Global cache for pre-encoded API responses
+response_cache = ResponseCache()
@@ -1,21 +1,44 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
+import pyarrow as pa
+from datetime import datetime
+from typing import Annotated, List, Dict, Any, Optional
 import asyncio
-from src.core.config import tickers
+import json
+import time
+from src.core.config import settings, tickers
 from src.core.state import state_cache
 from src.data.historical_data import HistoricalDataManager
+from src.data.frame_cache import frame_cache
+from src.data.scheduler import fetch_scheduler
+from src.core.changes import change_tracker
 from src.core.logger import logger
+from src.api.response_cache import response_cache
 
 from src.utils.serialization import sanitize_json_data
+from src.utils.downsample import lttb_indices
 
 router = APIRouter()
 from src.engine.discovery import TickerDiscovery
 
-data_manager = HistoricalDataManager()
-
 # Registry for orchestrator to avoid circular imports
 orchestrator_instance = None
+# Only built when the API runs without an orchestrator (otherwise its manager is shared)
+data_manager: Optional[HistoricalDataManager] = None
+
+def _data_manager() -> HistoricalDataManager:
+    global data_manager
+    if orchestrator_instance is not None:
+        return orchestrator_instance.data_manager
+    if data_manager is None:
+        data_manager = HistoricalDataManager()
+    return data_manager
+
+# How often /states/stream checks for new state versions, and the idle keep-alive period
+STREAM_INTERVAL_SECONDS = 1.0
+STREAM_KEEPALIVE_SECONDS = 15.0
 
 @router.get("/tickers", response_model=List[str])
 async def get_tickers():
@@ -75,22 +98,114 @@ async def enhance_universe():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/states")
-async def get_all_states():
-    # Sanitize to prevent NaN/Inf JSON errors
-    return sanitize_json_data(state_cache.get_all_states())
+async def get_all_states(request: Request, since: Optional[int] = None):
+    """
+    Every ticker state, or with `since` (a version cursor) only the states changed after it:
+    {"version": cursor for the next call, "full": true if this is a complete snapshot, "states": {...}}.
+    The full snapshot is assembled once per state version from per-ticker encodings and
+    honours If-None-Match.
+    """
+    if since is None:
+        return response_cache.respond(request, "states", state_cache.version,
+                                      lambda: state_cache.encode_states(state_cache.symbols()), encoded=True)
+    version, full, states = state_cache.changes_since(since)
+    return {"version": version, "full": full, "states": states}
+
+@router.get("/states/stream")
+async def stream_states(request: Request, since: Optional[int] = None):
+    """
+    Server-sent events: a "snapshot" event with every state (or only the changes after
+    `since` / Last-Event-ID when resuming), then "delta" events carrying only the ticker
+    states that changed. Event ids are state versions.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    cursor = since if since is not None else (int(last_event_id) if last_event_id.isdigit() else None)
+
+    async def events():
+        nonlocal cursor
+        idle = 0.0
+        while not await request.is_disconnected():
+            if cursor != state_cache.version:
+                version, full, states = state_cache.changes_since(cursor)
+                if full or states:
+                    body = json.dumps({"version": version, "full": full, "states": states})
+                    yield f"id: {version}\nevent: {'snapshot' if full else 'delta'}\ndata: {body}\n\n"
+                    idle = 0.0
+                cursor = version
+            elif idle >= STREAM_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await asyncio.sleep(STREAM_INTERVAL_SECONDS)
+            idle += STREAM_INTERVAL_SECONDS
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/system-metrics")
-async def get_system_metrics():
-    return sanitize_json_data(state_cache.get_metrics())
+async def get_system_metrics(request: Request):
+    # Counters move continuously, so the cached body is rebuilt per refresh window instead
+    window = int(time.monotonic() // settings.api.metrics_refresh_seconds)
+    return response_cache.respond(request, "system-metrics", window, _system_metrics)
+
+def _system_metrics() -> Dict[str, Any]:
+    metrics = state_cache.get_metrics()
+    metrics["frame_cache"] = frame_cache.stats()
+    metrics["fetch_scheduler"] = fetch_scheduler.stats()
+    metrics["intelligence"] = change_tracker.stats()
+    if orchestrator_instance:
+        metrics["intelligence"]["refresh"] = orchestrator_instance.refresh_scheduler.stats()
+    metrics["response_cache"] = response_cache.stats()
+    return sanitize_json_data(metrics)
 
 @router.get("/states/filter/{signal_type}")
-async def get_filtered_states(signal_type: str):
-    all_states = state_cache.get_all_states()
-    filtered = {
-        t: s for t, s in all_states.items() 
-        if s.last_signal and s.last_signal.get("signal") == signal_type.lower()
-    }
-    return sanitize_json_data(filtered)
+async def get_filtered_states(request: Request, signal_type: str):
+    signal_type = signal_type.lower()
+
+    def build():
+        # Signal hash index for membership, state order for the response
+        matches = state_cache.index.members("signal", signal_type)
+        return state_cache.encode_states([t for t in state_cache.symbols() if t in matches])
+
+    return response_cache.respond(request, ("states/filter", signal_type), state_cache.version, build, encoded=True)
+
+SCREENER_SORT_FIELDS = ("price", "confidence", "move")
+
+@router.get("/screener")
+async def screen_states(signal: Optional[str] = None, strategy: Optional[str] = None, region: Optional[str] = None,
+                        min_price: Optional[float] = None, max_price: Optional[float] = None,
+                        min_confidence: Optional[float] = None, max_confidence: Optional[float] = None,
+                        min_move: Optional[float] = None, max_move: Optional[float] = None,
+                        sort: Optional[str] = "confidence", order: Optional[str] = None, limit: int = 50):
+    """
+    Ticker states matching every given filter, best first. `signal`, `strategy` and `region`
+    accept comma-separated alternatives; `move` is the expected-range width in % of price.
+    Sorted by price, confidence or move (`order` asc/desc, default desc), or by symbol
+    (default asc) when `sort` is empty.
+    """
+    sort = sort or None
+    if sort is not None and sort not in SCREENER_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SCREENER_SORT_FIELDS)}")
+    order = order or ("desc" if sort else "asc")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+
+    def options(value: Optional[str], normalize) -> List[str]:
+        return [normalize(v.strip()) for v in value.split(",") if v.strip()] if value else []
+
+    matches = state_cache.index.query(
+        equals={
+            "signal": options(signal, str.lower),
+            "strategy": options(strategy, str),
+            "region": options(region, str.upper)
+        },
+        ranges={
+            "price": (min_price, max_price),
+            "confidence": (min_confidence, max_confidence),
+            "move": (min_move, max_move)
+        },
+        sort=sort, descending=order == "desc", limit=max(0, min(limit, 1000))
+    )
+    return [payload for payload in map(state_cache.state_payload, matches) if payload is not None]
 
 @router.get("/live-price/{ticker}")
 async def get_live_price(ticker: str):
@@ -110,7 +225,8 @@ async def get_best_strategy(ticker: str):
         raise HTTPException(status_code=404, detail="Best strategy not yet determined for ticker")
     return sanitize_json_data({
         "ticker": state.ticker,
-        "best_strategy": state.best_strategy
+        "best_strategy": state.best_strategy,
+        "params": state.strategy_params
     })
 
 @router.get("/current-signal/{ticker}")
@@ -127,21 +243,86 @@ async def get_expected_move(ticker: str):
         raise HTTPException(status_code=404, detail="No forecast available for ticker")
     return sanitize_json_data(state.expected_move)
 
+# Bars returned by /historical when no start/end range is given (approx 14 days of hourly
+# data, so a 7-day view is fully covered with buffer)
+HISTORICAL_DEFAULT_BARS = 336
+HISTORICAL_FORMATS = ("records", "columnar", "arrow")
+
 @router.get("/historical/{ticker}")
-async def get_historical(ticker: str, timeframe: str = "1h"):
+async def get_historical(ticker: str, timeframe: str = "1h", format: str = "records",
+                         start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         max_points: Annotated[Optional[int], Query(ge=3)] = None):
+    """
+    Bars for a ticker, by default the last HISTORICAL_DEFAULT_BARS as a list of records.
+    - `start` / `end`: return that time range instead (either bound may be left open).
+    - `max_points`: downsample with LTTB on Close to at most this many bars (at least 3).
+    - `format`: "records", "columnar" (one array per column) or "arrow" (Arrow IPC stream).
+    """
     ticker = ticker.upper()
+    format = format.lower()
+    if format not in HISTORICAL_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(HISTORICAL_FORMATS)}")
     try:
-        df = data_manager.get_historical_data(ticker, timeframe)
+        ranged = start is not None or end is not None
+        df = _data_manager().get_historical_data(ticker, timeframe, tail=None if ranged else HISTORICAL_DEFAULT_BARS)
         if df is None or df.empty:
             raise HTTPException(status_code=404, detail="Historical data not found")
-        
-        # Return last 336 rows (approx 14 days of hourly data) to ensure 7 days are fully covered with buffer
-        data = df.tail(336).reset_index().to_dict(orient="records")
-        return sanitize_json_data(data)
+
+        if ranged:
+            df = df.loc[_bound(start, df.index):_bound(end, df.index)]
+        else:
+            # The data manager returns the whole frame when it is already cached
+            df = df.tail(HISTORICAL_DEFAULT_BARS)
+        if max_points is not None and len(df) > max_points:
+            x = df.index.asi8 if isinstance(df.index, pd.DatetimeIndex) else np.arange(len(df))
+            df = df.iloc[lttb_indices(x, df["Close"].to_numpy(dtype=float), max_points)]
+
+        if format == "arrow":
+            return Response(content=_arrow_stream(df), media_type="application/vnd.apache.arrow.stream")
+        if format == "columnar":
+            return _columnar(df)
+        return sanitize_json_data(df.reset_index().to_dict(orient="records"))
+    except HTTPException:
+        raise
     except Exception as e:
         state_cache.add_error(f"Historical api error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _bound(value: Optional[datetime], index: pd.Index) -> Optional[pd.Timestamp]:
+    """Query bound comparable with the frame's index (naive bounds are taken as UTC)."""
+    if value is None:
+        return None
+    bound = pd.Timestamp(value)
+    tz = getattr(index, "tz", None)
+    if tz is not None:
+        return bound.tz_localize("UTC").tz_convert(tz) if bound.tzinfo is None else bound.tz_convert(tz)
+    return bound.tz_convert("UTC").tz_localize(None) if bound.tzinfo is not None else bound
+
+def _columnar(df: pd.DataFrame) -> Dict[str, List[Any]]:
+    """{column: values} with the index first, under the same keys as the records format."""
+    frame = df.reset_index()
+    columns = {}
+    for name in frame.columns:
+        values = frame[name]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            columns[str(name)] = [ts.isoformat() for ts in values]
+        elif pd.api.types.is_float_dtype(values):
+            array = values.to_numpy(dtype=float)
+            data = array.tolist()
+            for i in np.flatnonzero(~np.isfinite(array)):
+                data[i] = None
+            columns[str(name)] = data
+        else:
+            columns[str(name)] = sanitize_json_data(values.tolist())
+    return columns
+
+def _arrow_stream(df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
 @router.post("/engine/focus")
 async def set_engine_focus(payload: Dict[str, str]):
     """Prioritizes processing for the specified market region (US, IN, CRYPTO)."""
@@ -160,7 +341,3 @@ async def set_engine_mode(payload: Dict[str, str]):
         orchestrator_instance.set_engine_mode(mode, criteria)
         return {"status": "success", "message": f"Engine mode switched to {mode} [{criteria}]"}
     return {"status": "error", "message": "Orchestrator not active"}
-
-@router.get("/health")
-async def health_check():
-    return sanitize_json_data({"status": "healthy", "timestamp": str(pd.Timestamp.now())})
@@ -0,0 +1,140 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import pandas as pd
+from src.core.config import settings
+
+class ChangeTracker:
+    """
+    Tracks which tickers need their signal and forecast recomputed by the intelligence loop.
+
+    A ticker becomes dirty when a new bar of `timeframe` lands in its cache, its live price
+    moves more than `price_threshold` (relative) away from the price it was last processed
+    at, or its ranked strategy changes. Tickers never processed are dirty too. Between new
+    bars a ticker only needs a cache refresh once its next bar is due (`due_for_bar`).
+    """
+
+    def __init__(self, timeframe: str, bar_interval: timedelta, price_threshold: float, recheck_seconds: float):
+        self.timeframe = timeframe
+        self.bar_interval = bar_interval
+        self.price_threshold = price_threshold
+        self.recheck_seconds = recheck_seconds
+        # ticker -> reason it first became dirty ("new", "bar", "price", "strategy")
+        self._dirty: Dict[str, str] = {}
+        self._prices: Dict[str, float] = {}
+        self._bars: Dict[str, pd.Timestamp] = {}
+        self._next_check: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.marked = {"bar": 0, "price": 0, "strategy": 0}
+        self.cycles = 0
+        self.last_cycle: Dict[str, Any] = {}
+        self.total_processed = 0
+        self.total_skipped = 0
+        self.total_seconds = 0.0
+
+    def mark(self, ticker: str, reason: str):
+        with self._lock:
+            # Never-processed tickers are pending anyway
+            if ticker in self._next_check and ticker not in self._dirty:
+                self._dirty[ticker] = reason
+                self.marked[reason] = self.marked.get(reason, 0) + 1
+
+    def bar_landed(self, ticker: str, timeframe: str, last_bar: pd.Timestamp):
+        """Called by the data layer whenever a frame is written to the cache."""
+        if timeframe != self.timeframe or ticker not in self._next_check:
+            return
+        processed = self._bars.get(ticker)
+        if processed is None or last_bar > processed:
+            self.mark(ticker, "bar")
+
+    def observe_price(self, ticker: str, price: float):
+        baseline = self._prices.get(ticker)
+        if baseline and abs(price / baseline - 1.0) > self.price_threshold:
+            self.mark(ticker, "price")
+
+    def due_for_bar(self, tickers: List[str]) -> List[str]:
+        """Processed, clean tickers whose next bar should have landed by now."""
+        now = time.time()
+        due = []
+        with self._lock:
+            for ticker in tickers:
+                if ticker in self._dirty or ticker not in self._next_check or now < self._next_check[ticker]:
+                    continue
+                bar = self._bars.get(ticker)
+                if bar is None or datetime.now(bar.tzinfo) - bar >= self.bar_interval:
+                    due.append(ticker)
+                    # If the bar turns out to be late, don't poll again before the recheck interval
+                    self._next_check[ticker] = now + self.recheck_seconds
+        return due
+
+    def take(self, tickers: List[str]) -> Dict[str, str]:
+        """
+        Dirty (or never processed) tickers among `tickers`, in order, with the reason they
+        first became dirty ("new" if never processed); clears their flags.
+        """
+        with self._lock:
+            work = {}
+            for ticker in tickers:
+                if ticker in self._dirty:
+                    work[ticker] = self._dirty.pop(ticker)
+                elif ticker not in self._next_check:
+                    work[ticker] = "new"
+        return work
+
+    def processed(self, ticker: str, price: Optional[float], last_bar: Optional[pd.Timestamp]):
+        """Records the price and latest bar a ticker's signal was computed from."""
+        with self._lock:
+            if price:
+                self._prices[ticker] = price
+            if last_bar is not None:
+                self._bars[ticker] = last_bar
+            self._next_check[ticker] = time.time()
+
+    def restored(self, ticker: str, price: Optional[float], last_bar: pd.Timestamp):
+        """
+        Marks a ticker clean from a persisted signal (warm restart). Its cache was synced
+        recently, so the first check for a newer bar waits for the recheck interval.
+        """
+        with self._lock:
+            if price:
+                self._prices[ticker] = price
+            self._bars[ticker] = last_bar
+            self._dirty.pop(ticker, None)
+            self._next_check[ticker] = time.time() + self.recheck_seconds
+
+    def record_cycle(self, seconds: float, processed: int, skipped: int, refreshed: int):
+        with self._lock:
+            self.cycles += 1
+            self.total_processed += processed
+            self.total_skipped += skipped
+            self.total_seconds += seconds
+            self.last_cycle = {
+                "seconds": seconds,
+                "processed": processed,
+                "skipped": skipped,
+                "bar_checks": refreshed,
+                "finished_at": datetime.now()
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            considered = self.total_processed + self.total_skipped
+            return {
+                "cycles": self.cycles,
+                "last_cycle": dict(self.last_cycle),
+                "avg_cycle_seconds": self.total_seconds / self.cycles if self.cycles else 0.0,
+                "processed_total": self.total_processed,
+                "skipped_total": self.total_skipped,
+                "skipped_ratio": self.total_skipped / considered if considered else 0.0,
+                "dirty": len(self._dirty),
+                "marked": dict(self.marked)
+            }
+
+# Global change tracker for the intelligence loop (1h signals)
+change_tracker = ChangeTracker(
+    timeframe="1h",
+    bar_interval=timedelta(hours=1),
+    price_threshold=settings.engine.price_move_threshold,
+    recheck_seconds=settings.engine.bar_recheck_seconds
+)
@@ -1,11 +1,14 @@
 import yaml
 import os
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 class AppConfig(BaseModel):
     name: str
     version: str
+    # "lazy": bind the port first and load the analytics stack and persisted state in the
+    # background (other endpoints answer 503 until ready); "eager": load before serving
+    startup_mode: str = "lazy"
 
 class MarketConfig(BaseModel):
     region: str
@@ -16,6 +19,88 @@ class MarketConfig(BaseModel):
 class DataConfig(BaseModel):
     cache_dir: str
     timeframes: List[str]
+    # Memory budget for decoded historical frames kept in process (LRU evicted)
+    frame_cache_mb: int = 512
+    # Write-behind window for persisting ticker state to SQLite
+    state_flush_seconds: float = 2.0
+    # Incremental sync: bars re-requested before the last cached bar, and how often
+    # each file is fully re-downloaded to pick up provider revisions
+    sync_overlap_bars: int = 3
+    full_reconcile_hours: float = 24.0
+    # Consolidated market-data store: hash partitions per timeframe, bars per row group,
+    # how many tickers a bulk sync buffers before rewriting partitions, and how many
+    # single-ticker delta files a partition collects before they are compacted into it
+    store_partitions: int = 64
+    store_rows_per_group: int = 512
+    store_flush_tickers: int = 250
+    store_delta_tickers: int = 16
+
+class EngineConfig(BaseModel):
+    # Processes used for strategy ranking (0 = one per CPU core, 1 = rank in-process)
+    ranking_workers: int = 0
+    # Tickers per process-pool work unit
+    ranking_chunk_size: int = 25
+    # Rank every point of each strategy's parameter grid and keep the best set per ticker
+    param_sweep: bool = True
+    # Intelligence loop: relative live-price move that makes a ticker's signal stale,
+    # and how long to wait before re-polling a ticker whose next bar is late
+    price_move_threshold: float = 0.002
+    bar_recheck_seconds: float = 300.0
+    # Refresh deadlines per priority class (shortened by volatility: interval / (1 + w * ATR%)),
+    # loop tick, per-cycle time budget and tickers pulled per batch
+    hyper_refresh_seconds: float = 3.0
+    focus_refresh_seconds: float = 8.0
+    background_refresh_seconds: float = 120.0
+    volatility_weight: float = 1.0
+    intelligence_tick_seconds: float = 2.0
+    cycle_budget_seconds: float = 1.0
+    cycle_batch_size: int = 250
+    # Price moves and new bars update signals from per-ticker strategy streams; building a
+    # ticker's first stream replays its history, capped at this many seconds per batch
+    stream_seed_budget_seconds: float = 0.25
+    # Warm restart: with persisted state, trust rankings younger than warm_ranking_hours and
+    # cached bars synced within warm_data_minutes; only the rest are re-ranked / refetched.
+    # Cached 1h history is loaded with warm_load_workers threads.
+    warm_restart: bool = True
+    warm_ranking_hours: float = 24.0
+    warm_data_minutes: float = 60.0
+    warm_load_workers: int = 4
+    # Background re-ranker: every rerank_interval_seconds, tickers whose 1h history gained
+    # rerank_after_bars bars since their last ranking are re-ranked, using at most
+    # rerank_cpu_share of one core (0 bars disables it)
+    rerank_after_bars: int = 24
+    rerank_interval_seconds: float = 900.0
+    rerank_cpu_share: float = 0.1
+    # Discovery: tickers per provider download and the first-stage filter applied before
+    # scoring (minimum last close; minimum last-session close x volume, 0 = off)
+    discovery_chunk_size: int = 50
+    discovery_min_price: float = 0.05
+    discovery_min_dollar_volume: float = 0.0
+
+class FetchConfig(BaseModel):
+    # Global provider budget shared by live polling, historical sync and discovery
+    rate_per_second: float = 1.0
+    burst: int = 4
+    max_concurrency: int = 4
+    # Floor for the adaptive rate after repeated errors / empty responses
+    min_rate_per_second: float = 0.1
+
+class ProviderConfig(BaseModel):
+    # "yfinance" for live data, "local" for recorded/synthetic bars served from disk
+    name: str = "yfinance"
+    # Local provider: MarketDataStore directory with recorded bars (None = synthetic only)
+    local_root: Optional[str] = None
+    synthetic: bool = True
+    universe_size: int = 5000
+    # Simulated per-request latency and provider-side throttling (0 = unthrottled)
+    latency_ms: float = 0.0
+    rate_limit_per_second: float = 0.0
+
+class ApiConfig(BaseModel):
+    # Cached /system-metrics responses are rebuilt at most this often, and the cache
+    # directory is re-measured for data_processed_mb at most this often
+    metrics_refresh_seconds: float = 2.0
+    disk_usage_refresh_seconds: float = 60.0
 
 class LoggingConfig(BaseModel):
     level: str
@@ -26,15 +111,22 @@ class Config(BaseModel):
     market: MarketConfig
     data: DataConfig
     logging: LoggingConfig
+    engine: EngineConfig = Field(default_factory=EngineConfig)
+    fetch: FetchConfig = Field(default_factory=FetchConfig)
+    provider: ProviderConfig = Field(default_factory=ProviderConfig)
+    api: ApiConfig = Field(default_factory=ApiConfig)
+
+# libyaml's parser when PyYAML was built with it (several times faster than the pure-Python one)
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 def load_config(config_path: str = "config/app_config.yaml") -> Config:
     with open(config_path, "r") as f:
-        config_dict = yaml.safe_load(f)
+        config_dict = yaml.load(f, Loader=_YamlLoader)
     return Config(**config_dict)
 
 def load_tickers(tickers_path: str = "config/tickers.yaml") -> List[str]:
     with open(tickers_path, "r") as f:
-        tickers_dict = yaml.safe_load(f)
+        tickers_dict = yaml.load(f, Loader=_YamlLoader)
     return tickers_dict.get("tickers", [])
 
 # Global config instance
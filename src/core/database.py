@@ -1,7 +1,9 @@
 import sqlite3
 import json
 import os
+import threading
 from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
 from src.core.config import settings
 from src.core.logger import logger
 from src.utils.serialization import sanitize_json_data
@@ -28,9 +30,17 @@ class DatabaseManager:
                         last_update TEXT,
                         best_strategy TEXT,
                         last_signal TEXT,
-                        expected_move TEXT
+                        expected_move TEXT,
+                        strategy_params TEXT
                     )
                 """)
+                # Databases created before the parameter sweep lack the params column
+                columns = {row[1] for row in cursor.execute("PRAGMA table_info(ticker_states)")}
+                if "strategy_params" not in columns:
+                    cursor.execute("ALTER TABLE ticker_states ADD COLUMN strategy_params TEXT")
+                # ... and the ranking time warm restarts check
+                if "ranked_at" not in columns:
+                    cursor.execute("ALTER TABLE ticker_states ADD COLUMN ranked_at TEXT")
                 # Table for System Metrics
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS system_metrics (
@@ -43,10 +53,55 @@ class DatabaseManager:
                         updated_at TEXT
                     )
                 """)
+                # Table for historical sync bookkeeping (last full download and last sync of any kind per file)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS sync_state (
+                        ticker TEXT,
+                        timeframe TEXT,
+                        last_full_sync TEXT,
+                        last_sync TEXT,
+                        PRIMARY KEY (ticker, timeframe)
+                    )
+                """)
+                columns = {row[1] for row in cursor.execute("PRAGMA table_info(sync_state)")}
+                if "last_sync" not in columns:
+                    cursor.execute("ALTER TABLE sync_state ADD COLUMN last_sync TEXT")
+                # Table for the ranking cache (latest ranking per ticker and the content key it was computed for)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS rankings (
+                        ticker TEXT PRIMARY KEY,
+                        cache_key TEXT,
+                        last_bar INTEGER,
+                        best_strategy TEXT,
+                        score REAL,
+                        strategy_params TEXT,
+                        ranked_at TEXT
+                    )
+                """)
                 conn.commit()
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
 
+    def connect(self) -> sqlite3.Connection:
+        """Opens a connection configured like the schema connection (WAL, relaxed fsync)."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _ticker_state_row(ticker: str, state_dict: dict) -> tuple:
+        return (
+            ticker,
+            state_dict.get('last_price'),
+            state_dict.get('last_update').isoformat() if state_dict.get('last_update') else None,
+            state_dict.get('best_strategy'),
+            json.dumps(sanitize_json_data(state_dict.get('last_signal'))),
+            json.dumps(sanitize_json_data(state_dict.get('expected_move'))),
+            json.dumps(state_dict.get('strategy_params')) if state_dict.get('strategy_params') else None,
+            state_dict.get('ranked_at').isoformat() if state_dict.get('ranked_at') else None
+        )
+
     def save_ticker_state(self, ticker: str, state_dict: dict):
         """Saves or updates a ticker's state in the database."""
         try:
@@ -54,20 +109,28 @@ class DatabaseManager:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT OR REPLACE INTO ticker_states 
-                    (ticker, last_price, last_update, best_strategy, last_signal, expected_move)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    ticker,
-                    state_dict.get('last_price'),
-                    state_dict.get('last_update').isoformat() if state_dict.get('last_update') else None,
-                    state_dict.get('best_strategy'),
-                    json.dumps(sanitize_json_data(state_dict.get('last_signal'))),
-                    json.dumps(sanitize_json_data(state_dict.get('expected_move')))
-                ))
+                    (ticker, last_price, last_update, best_strategy, last_signal, expected_move, strategy_params, ranked_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, self._ticker_state_row(ticker, state_dict))
                 conn.commit()
         except Exception as e:
             logger.error(f"DB Error saving {ticker}: {e}")
 
+    def save_ticker_states(self, states: Dict[str, dict], conn: sqlite3.Connection):
+        """Saves many ticker states in a single transaction on an existing connection."""
+        rows = []
+        for ticker, state_dict in states.items():
+            try:
+                rows.append(self._ticker_state_row(ticker, state_dict))
+            except Exception as e:
+                logger.error(f"DB Error encoding {ticker}: {e}")
+        with conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO ticker_states 
+                (ticker, last_price, last_update, best_strategy, last_signal, expected_move, strategy_params, ranked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
     def load_all_ticker_states(self) -> dict:
         """Loads all ticker states from the database."""
         states = {}
@@ -83,33 +146,103 @@ class DatabaseManager:
                         'last_price': row['last_price'],
                         'last_update': datetime.fromisoformat(row['last_update']) if row['last_update'] else None,
                         'best_strategy': row['best_strategy'],
+                        'strategy_params': json.loads(row['strategy_params']) if row['strategy_params'] else None,
                         'last_signal': json.loads(row['last_signal']) if row['last_signal'] else None,
-                        'expected_move': json.loads(row['expected_move']) if row['expected_move'] else None
+                        'expected_move': json.loads(row['expected_move']) if row['expected_move'] else None,
+                        'ranked_at': datetime.fromisoformat(row['ranked_at']) if row['ranked_at'] else None
                     }
         except Exception as e:
             logger.error(f"DB Error loading states: {e}")
         return states
 
-    def save_metrics(self, metrics_dict: dict):
+    def save_metrics(self, metrics_dict: dict, conn: Optional[sqlite3.Connection] = None):
         """Saves system metrics."""
+        try:
+            if conn is None:
+                with sqlite3.connect(self.db_path, timeout=30) as own_conn:
+                    self._write_metrics(own_conn, metrics_dict)
+            else:
+                with conn:
+                    self._write_metrics(conn, metrics_dict)
+        except Exception as e:
+            logger.error(f"DB Error saving metrics: {e}")
+
+    @staticmethod
+    def _write_metrics(conn: sqlite3.Connection, metrics_dict: dict):
+        conn.execute("""
+            INSERT OR REPLACE INTO system_metrics 
+            (id, total_tickers, processed_tickers, data_processed_mb, errors_count, last_error, updated_at)
+            VALUES (1, ?, ?, ?, ?, ?, ?)
+        """, (
+            metrics_dict.get('total_tickers'),
+            metrics_dict.get('processed_tickers'),
+            metrics_dict.get('data_processed_mb'),
+            metrics_dict.get('errors_count'),
+            metrics_dict.get('last_error'),
+            datetime.now().isoformat()
+        ))
+
+    def save_sync_states(self, rows: List[Tuple[str, str, Optional[datetime], datetime]]):
+        """
+        Records (ticker, timeframe, last full download, last sync) in one transaction; a None
+        full-download time keeps the stored one.
+        """
         try:
             with sqlite3.connect(self.db_path, timeout=30) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO system_metrics 
-                    (id, total_tickers, processed_tickers, data_processed_mb, errors_count, last_error, updated_at)
-                    VALUES (1, ?, ?, ?, ?, ?, ?)
-                """, (
-                    metrics_dict.get('total_tickers'),
-                    metrics_dict.get('processed_tickers'),
-                    metrics_dict.get('data_processed_mb'),
-                    metrics_dict.get('errors_count'),
-                    metrics_dict.get('last_error'),
-                    datetime.now().isoformat()
-                ))
+                conn.executemany("""
+                    INSERT INTO sync_state (ticker, timeframe, last_full_sync, last_sync)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (ticker, timeframe) DO UPDATE SET
+                        last_full_sync = COALESCE(excluded.last_full_sync, last_full_sync),
+                        last_sync = excluded.last_sync
+                """, [(t, tf, full.isoformat() if full else None, synced.isoformat()) for t, tf, full, synced in rows])
                 conn.commit()
         except Exception as e:
-            logger.error(f"DB Error saving metrics: {e}")
+            logger.error(f"DB Error saving sync state for {len(rows)} files: {e}")
+
+    def load_sync_state(self) -> Tuple[Dict[tuple, datetime], Dict[tuple, datetime]]:
+        """Loads (last full sync, last sync of any kind) times for every ticker/timeframe."""
+        full_syncs, syncs = {}, {}
+        try:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                for ticker, timeframe, last_full_sync, last_sync in conn.execute(
+                        "SELECT ticker, timeframe, last_full_sync, last_sync FROM sync_state"):
+                    if last_full_sync:
+                        full_syncs[(ticker, timeframe)] = datetime.fromisoformat(last_full_sync)
+                    # Rows written before last_sync existed: the full download is the latest known sync
+                    if last_sync or last_full_sync:
+                        syncs[(ticker, timeframe)] = datetime.fromisoformat(last_sync or last_full_sync)
+        except Exception as e:
+            logger.error(f"DB Error loading sync state: {e}")
+        return full_syncs, syncs
+
+    def save_rankings(self, rows: List[Tuple[str, str, Optional[int], Optional[str], float, Optional[dict]]]):
+        """Records (ticker, cache key, last bar ns, strategy, score, params) ranking cache entries in one transaction."""
+        try:
+            now = datetime.now().isoformat()
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO rankings
+                    (ticker, cache_key, last_bar, best_strategy, score, strategy_params, ranked_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [(t, key, bar, strategy, score, json.dumps(params) if params else None, now)
+                      for t, key, bar, strategy, score, params in rows])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"DB Error saving {len(rows)} rankings: {e}")
+
+    def load_rankings(self) -> Dict[str, tuple]:
+        """Loads ranking cache entries as ticker -> (cache key, last bar ns, (strategy, score, params))."""
+        entries = {}
+        try:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                for ticker, key, bar, strategy, score, params in conn.execute(
+                        "SELECT ticker, cache_key, last_bar, best_strategy, score, strategy_params FROM rankings"):
+                    score = -float('inf') if score is None else score
+                    entries[ticker] = (key, bar, (strategy, score, json.loads(params) if params else None))
+        except Exception as e:
+            logger.error(f"DB Error loading rankings: {e}")
+        return entries
 
     def load_metrics(self) -> dict:
         """Loads system metrics."""
@@ -130,3 +263,121 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"DB Error loading metrics: {e}")
         return {}
+
+
+class StateWriter:
+    """
+    Write-behind persistence for StateCache.
+
+    Mutations only mark a ticker (or the metrics row) dirty. A dedicated thread owning one
+    long-lived connection wakes every `flush_interval` seconds, or when a flush is requested,
+    snapshots the dirty states and writes them with a single executemany transaction.
+    """
+
+    def __init__(self, db: DatabaseManager, snapshot_states: Callable[[List[str]], Dict[str, dict]],
+                 snapshot_metrics: Callable[[], dict], flush_interval: float = 2.0):
+        self.db = db
+        self.snapshot_states = snapshot_states
+        self.snapshot_metrics = snapshot_metrics
+        self.flush_interval = flush_interval
+        self._dirty: set = set()
+        self._metrics_dirty = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flushed = threading.Condition()
+        self._generation = 0
+        self._completed = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.rows_written = 0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, ticker: str):
+        with self._lock:
+            self._dirty.add(ticker)
+
+    def mark_metrics_dirty(self):
+        with self._lock:
+            self._metrics_dirty = True
+
+    def request_flush(self):
+        """Asks the writer thread to flush now without waiting for it."""
+        self._wake.set()
+
+    def flush(self, timeout: Optional[float] = 30.0) -> bool:
+        """Flushes everything marked dirty so far and waits until it is committed."""
+        if self._thread is None or not self._thread.is_alive():
+            self._flush_once(None)
+            return True
+        with self._flushed:
+            self._generation += 1
+            target = self._generation
+            self._wake.set()
+            return self._flushed.wait_for(lambda: self._completed >= target, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """Durably flushes pending writes and stops the writer thread."""
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        # Anything marked after the thread's final pass
+        self._flush_once(None)
+
+    def _run(self):
+        conn = None
+        try:
+            conn = self.db.connect()
+            while self._running:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                with self._flushed:
+                    target = self._generation
+                self._flush_once(conn)
+                with self._flushed:
+                    self._completed = max(self._completed, target)
+                    self._flushed.notify_all()
+        except Exception as e:
+            logger.error(f"State writer stopped: {e}")
+        finally:
+            if conn is not None:
+                self._flush_once(conn)
+                conn.close()
+
+    def _flush_once(self, conn: Optional[sqlite3.Connection]):
+        with self._lock:
+            dirty = list(self._dirty)
+            self._dirty.clear()
+            metrics_dirty = self._metrics_dirty
+            self._metrics_dirty = False
+        if not dirty and not metrics_dirty:
+            return
+
+        own_conn = conn is None
+        try:
+            if own_conn:
+                conn = self.db.connect()
+            if dirty:
+                states = self.snapshot_states(dirty)
+                self.db.save_ticker_states(states, conn)
+                self.rows_written += len(states)
+            if metrics_dirty:
+                self.db.save_metrics(self.snapshot_metrics(), conn)
+            self.flushes += 1
+        except Exception as e:
+            logger.error(f"DB Error flushing {len(dirty)} ticker states: {e}")
+            # Keep the work for the next pass
+            with self._lock:
+                self._dirty.update(dirty)
+                self._metrics_dirty = self._metrics_dirty or metrics_dirty
+        finally:
+            if own_conn and conn is not None:
+                conn.close()
@@ -10,6 +10,16 @@ class MarketHours:
         "Crypto": {"tz": "UTC", "open": time(0, 0), "close": time(23, 59, 59)}
     }
 
+    @staticmethod
+    def ticker_region(ticker: str) -> str:
+        """Market region a symbol trades in (US, IN or CRYPTO), from its suffix / pair."""
+        t = ticker.upper()
+        if t.endswith('.NS') or t.endswith('.BO'):
+            return 'IN'
+        if '-USD' in t or 'USD' in t or 'BTC' in t or 'ETH' in t:
+            return 'CRYPTO'
+        return 'US'
+
     @staticmethod
     def is_market_open() -> bool:
         """Checks if ANY configured market is currently open."""
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from src.core.state_store import StateStore
+
+# Categorical fields are dictionary-encoded (value -> code); numeric ones are float columns
+CATEGORICAL_FIELDS = ("signal", "strategy", "region")
+NUMERIC_FIELDS = ("price", "confidence", "move")
+
+class StateIndex:
+    """
+    Screener queries over the StateStore's columns.
+
+    Signal, strategy and region are already integer codes into small vocabularies, and
+    price, signal confidence and the forecast range are float columns, so there is nothing
+    to maintain per update: a query is a handful of vectorized comparisons over the slots
+    plus a partial sort for the top-k, costing about the same for any combination of
+    filters. Signal labels match case-insensitively. Tickers missing a numeric field never
+    match a filter or sort on it.
+    """
+
+    def __init__(self, store: StateStore):
+        self.store = store
+        # Slot -> position in symbol order, rebuilt lazily when tickers are added
+        self._symbol_rank: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def _codes(self, field: str, values: Iterable[Any]) -> Tuple[np.ndarray, List[int]]:
+        """(code column, codes of `values`) for a categorical field; unknown values have no code."""
+        store = self.store
+        if field == "signal":
+            wanted = {str(v).lower() for v in values}
+            return store.signal, [c for c, word in enumerate(store.signal_labels) if word.lower() in wanted]
+        if field == "strategy":
+            names = store.strategy_names
+            return store.strategy, [c for c, name in enumerate(names) if name in set(values)]
+        if field == "region":
+            return store.region, [store.REGIONS.index(v) for v in set(values) if v in store.REGIONS]
+        raise KeyError(field)
+
+    def _values(self, field: str, n: int) -> np.ndarray:
+        """Float column of a numeric field over the first `n` slots, NaN where missing or infinite."""
+        store = self.store
+        if field == "price":
+            column = store.price[:n]
+        elif field == "confidence":
+            column = store.confidence[:n]
+        elif field == "move":
+            price = store.forecast_price[:n]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                column = 100.0 * (store.forecast_max[:n] - store.forecast_min[:n]) / np.where(price != 0, price, np.nan)
+        else:
+            raise KeyError(field)
+        return np.where(np.isfinite(column), column, np.nan)
+
+    def members(self, field: str, value: Any) -> Set[str]:
+        """Tickers whose categorical `field` equals `value`."""
+        with self.store.lock:
+            n = len(self.store)
+            column, codes = self._codes(field, [value])
+            if not codes:
+                return set()
+            return {self.store.symbols[i] for i in np.flatnonzero(np.isin(column[:n], codes))}
+
+    def query(self, equals: Optional[Dict[str, Iterable[Any]]] = None,
+              ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+              sort: Optional[str] = None, descending: bool = True, limit: int = 50) -> List[str]:
+        """
+        Tickers matching every filter: `equals` maps a categorical field to accepted values,
+        `ranges` a numeric field to inclusive (low, high) bounds (None = open). Ordered by
+        `sort` (a numeric field, ties broken by symbol; symbol alone when None) and cut to
+        `limit`. Descending order reverses both.
+        """
+        if limit <= 0:
+            return []
+        with self.store.lock:
+            tickers = self.store.symbols
+            n = len(tickers)
+            mask = np.ones(n, dtype=bool)
+            for field, accepted in (equals or {}).items():
+                if not accepted:
+                    continue
+                # Vocabulary lookups turn the accepted values into codes; unknown values match nothing
+                column, codes = self._codes(field, accepted)
+                mask &= np.isin(column[:n], codes)
+            values = {field: self._values(field, n) for field in set(ranges or {}) | ({sort} - {None})}
+            for field, (low, high) in (ranges or {}).items():
+                column = values[field]
+                # NaN (missing) fails every comparison
+                if low is not None:
+                    mask &= column >= low
+                if high is not None:
+                    mask &= column <= high
+            if sort is not None:
+                mask &= ~np.isnan(values[sort])
+
+            slots = np.flatnonzero(mask)
+            if self._symbol_rank is None or len(self._symbol_rank) != n:
+                self._symbol_rank = np.argsort(np.argsort(np.array(tickers, dtype=object)))
+            rank = self._symbol_rank[slots]
+            if sort is None:
+                order = np.argsort(rank)
+                return [tickers[i] for i in slots[(order[::-1] if descending else order)[:limit]]]
+
+            values = values[sort][slots]
+            if len(slots) > limit:
+                # Keep everything at least as good as the k-th best value (ties included),
+                # then order just those exactly
+                k = len(values) - limit if descending else limit - 1
+                kth = np.partition(values, k)[k]
+                keep = values >= kth if descending else values <= kth
+                slots, values, rank = slots[keep], values[keep], rank[keep]
+            order = np.lexsort((rank, values))
+            return [tickers[i] for i in slots[(order[::-1] if descending else order)[:limit]]]
@@ -0,0 +1,63 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+class StartupTracker:
+    """
+    Startup progress of the server: how long each phase took (relative to when this module
+    was first imported, i.e. right after interpreter start) and whether the engine is ready.
+    Status moves starting -> loading -> ready, or to failed. Depends only on the standard
+    library so it can be imported before anything heavy.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.status = "starting"
+        self.error: Optional[str] = None
+        self.ready_seconds: Optional[float] = None
+        self.phases: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    @contextmanager
+    def phase(self, name: str):
+        """Times the enclosed block as startup phase `name`."""
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.phases.append({
+                    "phase": name,
+                    "at_ms": round(1000 * (begin - self.started), 1),
+                    "ms": round(1000 * (end - begin), 1)
+                })
+
+    def loading(self):
+        self.status = "loading"
+
+    def mark_ready(self):
+        self.ready_seconds = time.perf_counter() - self.started
+        self.status = "ready"
+
+    def fail(self, error: Exception):
+        self.error = str(error)
+        self.status = "failed"
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": self.status,
+                "error": self.error,
+                "elapsed_seconds": round(time.perf_counter() - self.started, 3),
+                "ready_seconds": round(self.ready_seconds, 3) if self.ready_seconds is not None else None,
+                "phases": list(self.phases)
+            }
+
+# Global startup tracker
+startup = StartupTracker()
@@ -1,15 +1,25 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
 from datetime import datetime
 from pydantic import BaseModel, Field
 from src.core.logger import logger
 import os
+import threading
+import time
+import numpy as np
 from src.core.config import settings
+from src.core.changes import change_tracker
+from src.core.market_hours import MarketHours
+from src.core.screener import StateIndex
+from src.core.state_store import StateStore
+from src.utils.serialization import join_json_object, render_json, sanitize_json_data
 
 class TickerState(BaseModel):
     ticker: str
     last_price: Optional[float] = None
     last_update: Optional[datetime] = None
     best_strategy: Optional[str] = None
+    strategy_params: Optional[Dict[str, Any]] = None
     last_signal: Optional[Dict[str, Any]] = None
     expected_move: Optional[Dict[str, Any]] = None
 
@@ -23,29 +33,51 @@ class SystemMetrics(BaseModel):
     last_error: Optional[str] = None
     start_time: datetime = Field(default_factory=datetime.now)
 
-from src.core.database import DatabaseManager
+from src.core.database import DatabaseManager, StateWriter
 
 class StateCache:
     def __init__(self):
-        self.tickers: Dict[str, TickerState] = {}
+        # Ticker state lives in columns; TickerState models are only built for callers that ask
+        self.store = StateStore()
         self.metrics = SystemMetrics()
+        # Monotonic change cursor. It starts at the process start time in microseconds, so
+        # cursors handed out by an earlier process are recognisably older than this one.
+        self.base_version = time.time_ns() // 1000
+        self.version = self.base_version
+        # ticker -> version of its latest mutation, least recently changed first
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        # JSON encoding of each ticker's API payload, tagged with the version it was built at
+        self._payloads: Dict[str, Tuple[int, bytes]] = {}
+        self._version_lock = threading.Lock()
+        # Screener queries run straight over the store's columns
+        self.index = StateIndex(self.store)
+        # Monotonic time the cache directory was last measured
+        self._disk_usage_at: Optional[float] = None
         self.db = DatabaseManager()
         self._load_from_db()
+        # Mutations are persisted write-behind, batched per flush window
+        self.writer = StateWriter(
+            self.db,
+            snapshot_states=self._snapshot_states,
+            snapshot_metrics=self.get_metrics,
+            flush_interval=settings.data.state_flush_seconds
+        )
+        self.writer.start()
 
     def _load_from_db(self):
         """Restores state and metrics from SQL on startup."""
         try:
             persisted_states = self.db.load_all_ticker_states()
             for ticker, state_data in persisted_states.items():
-                self.tickers[ticker] = TickerState(**state_data)
+                self._restore(ticker, state_data)
             
             persisted_metrics = self.db.load_metrics()
             if persisted_metrics:
                 for k, v in persisted_metrics.items():
                     setattr(self.metrics, k, v)
             
-            self.metrics.total_tickers = len(self.tickers)
-            logger.info(f"Restored {len(self.tickers)} ticker states from database.")
+            self.metrics.total_tickers = len(self.store)
+            logger.info(f"Restored {len(self.store)} ticker states from database.")
             
             # Reset session-specific metrics
             self.metrics.errors_count = 0
@@ -56,16 +88,120 @@ class StateCache:
         except Exception as e:
             logger.error(f"Failed to restore state from DB: {e}")
 
-    def _ensure_ticker(self, ticker: str) -> TickerState:
-        if ticker not in self.tickers:
-            self.tickers[ticker] = TickerState(ticker=ticker)
-            self.metrics.total_tickers = len(self.tickers)
-        return self.tickers[ticker]
+    def _restore(self, ticker: str, row: Dict[str, Any]):
+        """Writes a persisted row straight into the store (the columns are already typed by SQLite)."""
+        slot = self.store.slot(ticker, MarketHours.ticker_region(ticker))
+        price = row.get('last_price')
+        with self.store.lock:
+            if row.get('last_update') is not None:
+                self.store.set_price(slot, np.nan if price is None else price, row['last_update'])
+            else:
+                self.store.price[slot] = np.nan if price is None else price
+            self.store.set_strategy(slot, row.get('best_strategy'), row.get('strategy_params'), row.get('ranked_at'))
+            self.store.set_signal(slot, row.get('last_signal'))
+            self.store.set_forecast(slot, row.get('expected_move'))
+
+    def _snapshot_states(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        slots = self.store.slots
+        with self.store.lock:
+            return {t: {**self.store.record(slots[t]), "ranked_at": self.store.get_ranked(slots[t])}
+                    for t in tickers if t in slots}
+
+    def flush(self, wait: bool = False):
+        """Persists pending state changes now; blocks until committed when `wait` is set."""
+        if wait:
+            self.writer.flush()
+        else:
+            self.writer.request_flush()
+
+    def close(self):
+        """Durably flushes pending writes and stops the writer thread (call on shutdown)."""
+        self.writer.close()
+
+    def _touch(self, ticker: str):
+        """Gives the ticker's latest mutation the next version number."""
+        with self._version_lock:
+            self.version += 1
+            self._versions[ticker] = self.version
+            self._versions.move_to_end(ticker)
+
+    def _touch_many(self, tickers: List[str]):
+        with self._version_lock:
+            for ticker in tickers:
+                self.version += 1
+                self._versions[ticker] = self.version
+                self._versions.move_to_end(ticker)
+
+    def symbols(self) -> List[str]:
+        """Every tracked ticker, in the order first seen."""
+        return list(self.store.symbols)
+
+    def state_payload(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """JSON-safe dict of a ticker's state, built from the store on each call."""
+        slot = self.store.slots.get(ticker)
+        if slot is None:
+            return None
+        with self.store.lock:
+            record = self.store.record(slot)
+        return sanitize_json_data(record)
+
+    def state_json(self, ticker: str) -> Optional[bytes]:
+        """The ticker's payload rendered as JSON bytes, encoded once per version."""
+        version = self._versions.get(ticker, self.base_version)
+        cached = self._payloads.get(ticker)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        payload = self.state_payload(ticker)
+        if payload is None:
+            return None
+        encoded = render_json(payload)
+        self._payloads[ticker] = (version, encoded)
+        return encoded
+
+    def encode_states(self, tickers: List[str]) -> bytes:
+        """JSON object of ticker -> state, assembled from the per-ticker encodings."""
+        members = []
+        for ticker in tickers:
+            encoded = self.state_json(ticker)
+            if encoded is not None:
+                members.append((ticker, encoded))
+        return join_json_object(members)
+
+    def changes_since(self, since: Optional[int]) -> Tuple[int, bool, Dict[str, Dict[str, Any]]]:
+        """
+        (version, full, states): payloads of the tickers mutated after version `since`, or
+        of every ticker (full=True) when the cursor is missing, from another process or ahead.
+        """
+        with self._version_lock:
+            version = self.version
+            full = since is None or since < self.base_version or since > version
+            if full:
+                changed = list(self.store.symbols)
+            else:
+                changed = []
+                for ticker in reversed(self._versions):
+                    if self._versions[ticker] <= since:
+                        break
+                    changed.append(ticker)
+                changed.reverse()
+        states = {}
+        for ticker in changed:
+            payload = self.state_payload(ticker)
+            if payload is not None:
+                states[ticker] = payload
+        return version, full, states
+
+    def _ensure_ticker(self, ticker: str) -> int:
+        slot = self.store.slots.get(ticker)
+        if slot is None:
+            slot = self.store.slot(ticker, MarketHours.ticker_region(ticker))
+            self.metrics.total_tickers = len(self.store)
+        return slot
 
     def add_error(self, error_msg: str):
         self.metrics.errors_count += 1
         self.metrics.last_error = f"[{datetime.now().strftime('%H:%M:%S')}] {error_msg}"
-        self.db.save_metrics(self.get_metrics())
+        self.writer.mark_metrics_dirty()
 
     def track_data(self, size_bytes: int):
         # Deprecated: usage is now calculated from disk directly
@@ -76,58 +212,123 @@ class StateCache:
         try:
             total_size = 0
             cache_dir = settings.data.cache_dir
-            if os.path.exists(cache_dir):
-                for entry in os.scandir(cache_dir):
-                    if entry.is_file():
-                        total_size += entry.stat().st_size
+            for root, _, files in os.walk(cache_dir):
+                for name in files:
+                    total_size += os.path.getsize(os.path.join(root, name))
             return total_size / (1024 * 1024)
         except Exception:
             return 0.0
 
     def update_price(self, ticker: str, price: float):
-        state = self._ensure_ticker(ticker)
-        state.last_price = price
-        state.last_update = datetime.now()
+        self.store.set_price(self._ensure_ticker(ticker), price, datetime.now())
+        self._touch(ticker)
+        change_tracker.observe_price(ticker, price)
         # Price updates are too frequent for DB; we'll rely on periodic strategy/signal saves
         # but we could save here if needed.
 
-    def update_strategy(self, ticker: str, strategy_name: str):
-        state = self._ensure_ticker(ticker)
-        state.best_strategy = strategy_name
-        self.db.save_ticker_state(ticker, state.dict())
+    def update_prices(self, prices: Dict[str, float]):
+        """Applies a batch of live prices as one vectorized column assignment."""
+        if not prices:
+            return
+        tickers = list(prices)
+        slots = np.fromiter((self._ensure_ticker(t) for t in tickers), dtype=np.int64, count=len(tickers))
+        values = np.fromiter(prices.values(), dtype=float, count=len(tickers))
+        self.store.set_prices(slots, values, datetime.now())
+        self._touch_many(tickers)
+        for ticker, price in prices.items():
+            change_tracker.observe_price(ticker, price)
+
+    def update_strategy(self, ticker: str, strategy_name: str, params: Optional[Dict[str, Any]] = None):
+        slot = self._ensure_ticker(ticker)
+        changed = self.store.get_strategy(slot) != (strategy_name, params)
+        if changed:
+            change_tracker.mark(ticker, "strategy")
+        self.store.set_strategy(slot, strategy_name, params, datetime.now())
+        # A confirmed ranking only refreshes ranked_at, which is not part of the API payload
+        if changed:
+            self._touch(ticker)
+        self.writer.mark_dirty(ticker)
 
     def update_signal(self, ticker: str, signal: Dict[str, Any]):
-        state = self._ensure_ticker(ticker)
-        state.last_signal = signal
-        self.db.save_ticker_state(ticker, state.dict())
+        self.store.set_signal(self._ensure_ticker(ticker), signal)
+        self._touch(ticker)
+        self.writer.mark_dirty(ticker)
 
     def update_forecast(self, ticker: str, forecast: Dict[str, Any]):
-        state = self._ensure_ticker(ticker)
-        state.expected_move = forecast
-        self.db.save_ticker_state(ticker, state.dict())
+        self.store.set_forecast(self._ensure_ticker(ticker), forecast)
+        self._touch(ticker)
+        self.writer.mark_dirty(ticker)
 
     def set_syncing(self, value: bool):
         self.metrics.is_syncing = value
         if value:
             self.metrics.processed_tickers = 0
-        self.db.save_metrics(self.get_metrics())
+        self.writer.mark_metrics_dirty()
 
     def increment_processed(self):
         self.metrics.processed_tickers += 1
-        # Save metrics every 5 tickers to avoid DB overhead during bulk setup
-        if self.metrics.processed_tickers % 5 == 0:
-            self.db.save_metrics(self.get_metrics())
+        self.writer.mark_metrics_dirty()
 
     def get_state(self, ticker: str) -> Optional[TickerState]:
-        return self.tickers.get(ticker)
+        """A TickerState view of the ticker, built on demand (changes to it are not stored)."""
+        slot = self.store.slots.get(ticker)
+        if slot is None:
+            return None
+        with self.store.lock:
+            return TickerState.model_construct(**self.store.record(slot))
 
     def get_all_states(self) -> Dict[str, TickerState]:
-        return self.tickers
-    
+        return {ticker: self.get_state(ticker) for ticker in self.symbols()}
+
+    def price(self, ticker: str) -> Optional[float]:
+        slot = self.store.slots.get(ticker)
+        return self.store.get_price(slot) if slot is not None else None
+
+    def quote(self, ticker: str) -> Tuple[Optional[float], Optional[datetime]]:
+        """(live price, when it was observed) of the ticker."""
+        slot = self.store.slots.get(ticker)
+        if slot is None:
+            return None, None
+        return self.store.get_price(slot), self.store.get_updated(slot)
+
+    def strategy(self, ticker: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """(best strategy name, its parameters) of the ticker."""
+        slot = self.store.slots.get(ticker)
+        return self.store.get_strategy(slot) if slot is not None else (None, None)
+
+    def ranked_at(self, ticker: str) -> Optional[datetime]:
+        """When the ticker's strategy was last ranked (persisted across restarts)."""
+        slot = self.store.slots.get(ticker)
+        return self.store.get_ranked(slot) if slot is not None else None
+
+    def forecast(self, ticker: str) -> Optional[Dict[str, Any]]:
+        slot = self.store.slots.get(ticker)
+        if slot is None:
+            return None
+        with self.store.lock:
+            return self.store.get_forecast(slot)
+
+    def signal(self, ticker: str) -> Optional[Dict[str, Any]]:
+        slot = self.store.slots.get(ticker)
+        if slot is None:
+            return None
+        with self.store.lock:
+            return self.store.get_signal(slot)
+
+    def signal_label(self, ticker: str) -> Optional[str]:
+        """The ticker's last signal ("bullish", "bearish", "neutral"), without decoding the rest."""
+        slot = self.store.slots.get(ticker)
+        if slot is None:
+            return None
+        return self.store.get_signal_label(slot)
+
     def get_metrics(self) -> Dict[str, Any]:
         self.metrics.uptime_seconds = (datetime.now() - self.metrics.start_time).total_seconds()
-        # Update cache size on read (throttling could be added if needed)
-        self.metrics.data_processed_mb = self._calculate_cache_size()
+        # Walking the cache directory is the expensive part; re-measure it only periodically
+        now = time.monotonic()
+        if self._disk_usage_at is None or now - self._disk_usage_at >= settings.api.disk_usage_refresh_seconds:
+            self.metrics.data_processed_mb = self._calculate_cache_size()
+            self._disk_usage_at = now
         return self.metrics.dict()
 
 # Global state cache
@@ -0,0 +1,224 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+# Sentinel for a missing timestamp in int64 columns
+MISSING_TIME = np.iinfo(np.int64).min
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+
+def _grow(column: np.ndarray, capacity: int, fill: Any) -> np.ndarray:
+    grown = np.full((capacity,) + column.shape[1:], fill, dtype=column.dtype)
+    grown[:len(column)] = column
+    return grown
+
+def _micros(at: datetime) -> int:
+    """Wall-clock microseconds since the epoch (aware times are converted to local time)."""
+    if at.tzinfo is not None:
+        at = at.astimezone().replace(tzinfo=None)
+    return (at - _EPOCH) // _US
+
+def _number(value: Any) -> float:
+    """`value` as a float column entry (NaN unless it is a real number)."""
+    if isinstance(value, (float, int, np.floating, np.integer)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+class StateStore:
+    """
+    Struct-of-arrays ticker state: a symbol -> slot map and one row per ticker across NumPy
+    columns (live price and update time, strategy and parameter set ids, region code, and
+    the signal code, confidence, strategy, forecast price, range and ATR the screener and
+    label lookups read). The full signal and forecast dicts are kept per slot as served.
+    Mutations write in place under one lock; readers get plain values.
+    """
+
+    REGIONS = ("US", "IN", "CRYPTO")
+
+    def __init__(self, capacity: int = 1024):
+        self.slots: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.capacity = capacity
+        self.price = np.full(capacity, np.nan)
+        # Wall-clock microseconds since the epoch of the last price update (naive local time)
+        self.updated = np.full(capacity, MISSING_TIME, dtype=np.int64)
+        self.strategy = np.full(capacity, -1, dtype=np.int32)
+        self.params = np.full(capacity, -1, dtype=np.int32)
+        # When the strategy was last ranked (same encoding as `updated`)
+        self.ranked = np.full(capacity, MISSING_TIME, dtype=np.int64)
+        self.region = np.full(capacity, -1, dtype=np.int8)
+        self.strategy_names: List[str] = []
+        self._strategy_ids: Dict[str, int] = {}
+        self.param_sets: List[Dict[str, Any]] = []
+        self._param_ids: Dict[str, int] = {}
+        # Last signal: label code (into signal_labels), confidence and emitting strategy id
+        self.signal = np.full(capacity, -1, dtype=np.int32)
+        self.confidence = np.full(capacity, np.nan)
+        self.signal_strategy = np.full(capacity, -1, dtype=np.int32)
+        self.signal_labels: List[str] = []
+        self._signal_ids: Dict[str, int] = {}
+        # Expected move: reference price, range bounds and ATR
+        self.forecast_price = np.full(capacity, np.nan)
+        self.forecast_min = np.full(capacity, np.nan)
+        self.forecast_max = np.full(capacity, np.nan)
+        self.forecast_atr = np.full(capacity, np.nan)
+        self.signals: List[Optional[Dict[str, Any]]] = []
+        self.forecasts: List[Optional[Dict[str, Any]]] = []
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.slots
+
+    def slot(self, ticker: str, region: Optional[str] = None) -> int:
+        """The ticker's slot, allocating one (with its region code) for new tickers."""
+        slot = self.slots.get(ticker)
+        if slot is not None:
+            return slot
+        with self.lock:
+            slot = self.slots.get(ticker)
+            if slot is not None:
+                return slot
+            slot = len(self.symbols)
+            if slot == self.capacity:
+                self._grow(self.capacity * 2)
+            self.symbols.append(ticker)
+            self.signals.append(None)
+            self.forecasts.append(None)
+            if region in self.REGIONS:
+                self.region[slot] = self.REGIONS.index(region)
+            self.slots[ticker] = slot
+            return slot
+
+    def _grow(self, capacity: int):
+        self.price = _grow(self.price, capacity, np.nan)
+        self.updated = _grow(self.updated, capacity, MISSING_TIME)
+        self.strategy = _grow(self.strategy, capacity, -1)
+        self.params = _grow(self.params, capacity, -1)
+        self.ranked = _grow(self.ranked, capacity, MISSING_TIME)
+        self.region = _grow(self.region, capacity, -1)
+        self.signal = _grow(self.signal, capacity, -1)
+        self.confidence = _grow(self.confidence, capacity, np.nan)
+        self.signal_strategy = _grow(self.signal_strategy, capacity, -1)
+        self.forecast_price = _grow(self.forecast_price, capacity, np.nan)
+        self.forecast_min = _grow(self.forecast_min, capacity, np.nan)
+        self.forecast_max = _grow(self.forecast_max, capacity, np.nan)
+        self.forecast_atr = _grow(self.forecast_atr, capacity, np.nan)
+        self.capacity = capacity
+
+    def set_price(self, slot: int, price: float, at: datetime):
+        with self.lock:
+            self.price[slot] = price
+            self.updated[slot] = _micros(at)
+
+    def set_prices(self, slots: np.ndarray, prices: np.ndarray, at: datetime):
+        """One vectorized assignment for a batch of price updates."""
+        with self.lock:
+            self.price[slots] = prices
+            self.updated[slots] = _micros(at)
+
+    def set_strategy(self, slot: int, name: Optional[str], params: Optional[Dict[str, Any]],
+                     ranked_at: Optional[datetime] = None):
+        with self.lock:
+            self.ranked[slot] = MISSING_TIME if ranked_at is None else _micros(ranked_at)
+            self.strategy[slot] = self._strategy_id(name)
+            if params is None:
+                self.params[slot] = -1
+            else:
+                key = json.dumps(params, sort_keys=True, default=str)
+                pid = self._param_ids.get(key)
+                if pid is None:
+                    pid = self._param_ids[key] = len(self.param_sets)
+                    self.param_sets.append(params)
+                self.params[slot] = pid
+
+    def _strategy_id(self, name: Any) -> int:
+        if not isinstance(name, str):
+            return -1
+        sid = self._strategy_ids.get(name)
+        if sid is None:
+            sid = self._strategy_ids[name] = len(self.strategy_names)
+            self.strategy_names.append(name)
+        return sid
+
+    def set_signal(self, slot: int, signal: Optional[Dict[str, Any]]):
+        signal = dict(signal) if signal is not None else None
+        label = (signal or {}).get("signal")
+        with self.lock:
+            self.signals[slot] = signal
+            if isinstance(label, str):
+                code = self._signal_ids.get(label)
+                if code is None:
+                    code = self._signal_ids[label] = len(self.signal_labels)
+                    self.signal_labels.append(label)
+                self.signal[slot] = code
+            else:
+                self.signal[slot] = -1
+            self.confidence[slot] = _number((signal or {}).get("confidence"))
+            self.signal_strategy[slot] = self._strategy_id((signal or {}).get("strategy"))
+
+    def set_forecast(self, slot: int, forecast: Optional[Dict[str, Any]]):
+        forecast = dict(forecast) if forecast is not None else None
+        expected = (forecast or {}).get("expected_range")
+        expected = expected if isinstance(expected, dict) else {}
+        with self.lock:
+            self.forecasts[slot] = forecast
+            self.forecast_price[slot] = _number((forecast or {}).get("price"))
+            self.forecast_min[slot] = _number(expected.get("min"))
+            self.forecast_max[slot] = _number(expected.get("max"))
+            self.forecast_atr[slot] = _number((forecast or {}).get("volatility_atr"))
+
+    # Reads
+
+    def get_price(self, slot: int) -> Optional[float]:
+        price = float(self.price[slot])
+        return None if price != price else price
+
+    def get_updated(self, slot: int) -> Optional[datetime]:
+        stamp = int(self.updated[slot])
+        return None if stamp == MISSING_TIME else _EPOCH + stamp * _US
+
+    def get_ranked(self, slot: int) -> Optional[datetime]:
+        stamp = int(self.ranked[slot])
+        return None if stamp == MISSING_TIME else _EPOCH + stamp * _US
+
+    def get_strategy(self, slot: int) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        sid, pid = self.strategy[slot], self.params[slot]
+        return (self.strategy_names[sid] if sid >= 0 else None,
+                dict(self.param_sets[pid]) if pid >= 0 else None)
+
+    def get_signal(self, slot: int) -> Optional[Dict[str, Any]]:
+        signal = self.signals[slot]
+        return dict(signal) if signal is not None else None
+
+    def get_signal_label(self, slot: int) -> Optional[str]:
+        code = self.signal[slot]
+        return self.signal_labels[code] if code >= 0 else None
+
+    def get_forecast(self, slot: int) -> Optional[Dict[str, Any]]:
+        forecast = self.forecasts[slot]
+        return dict(forecast) if forecast is not None else None
+
+    def record(self, slot: int) -> Dict[str, Any]:
+        """The slot as a TickerState-shaped dict (fields in model order)."""
+        name, params = self.get_strategy(slot)
+        return {
+            "ticker": self.symbols[slot],
+            "last_price": self.get_price(slot),
+            "last_update": self.get_updated(slot),
+            "best_strategy": name,
+            "strategy_params": params,
+            "last_signal": self.get_signal(slot),
+            "expected_move": self.get_forecast(slot)
+        }
+
+    def nbytes(self) -> int:
+        """Bytes held by the columns (excluding the symbol map, vocabularies and record dicts)."""
+        columns = (self.price, self.updated, self.strategy, self.params, self.ranked, self.region,
+                   self.signal, self.confidence, self.signal_strategy,
+                   self.forecast_price, self.forecast_min, self.forecast_max, self.forecast_atr)
+        return sum(column.nbytes for column in columns)
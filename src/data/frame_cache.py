@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import pandas as pd
+from src.core.config import settings
+from src.core.logger import logger
+
+class FrameCache:
+    """
+    Process-wide LRU cache of decoded historical DataFrames, bounded by a memory budget.
+
+    Frames handed out are shared between callers and must be treated as read-only.
+    Writers are expected to call `invalidate` (or `put`) whenever the backing file changes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._frames: "OrderedDict[Hashable, pd.DataFrame]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _frame_size(df: pd.DataFrame) -> int:
+        return int(df.memory_usage(index=True, deep=True).sum())
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        with self._lock:
+            df = self._frames.get(key)
+            if df is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return df
+
+    def contains(self, key: Hashable) -> bool:
+        """Membership test that doesn't count as a lookup or refresh recency."""
+        with self._lock:
+            return key in self._frames
+
+    def put(self, key: Hashable, df: pd.DataFrame):
+        size = self._frame_size(df)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                logger.debug(f"Frame {key} ({size} bytes) exceeds cache budget; not cached")
+                return
+            self._frames[key] = df
+            self._sizes[key] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._frames:
+                oldest, _ = self._frames.popitem(last=False)
+                self._bytes -= self._sizes.pop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def _discard(self, key: Hashable):
+        if key in self._frames:
+            del self._frames[key]
+            self._bytes -= self._sizes.pop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._frames),
+                "size_mb": self._bytes / (1024 * 1024),
+                "max_size_mb": self.max_bytes / (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+# Global frame cache shared by every HistoricalDataManager
+frame_cache = FrameCache(settings.data.frame_cache_mb * 1024 * 1024)
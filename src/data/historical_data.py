@@ -1,27 +1,65 @@
 import os
 import pandas as pd
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 import sys
 from src.core.config import settings
 from src.core.logger import logger
 from src.core.state import state_cache
-import time
+from src.core.changes import change_tracker
+from src.data.frame_cache import frame_cache
+from src.data.store import market_store
+from src.data.providers import market_provider
+from src.data.scheduler import Priority, fetch_scheduler
+from src.data.resampling import bucket_offset, finest_source, resample_ohlcv
+
+# timeframe -> (provider interval, retention window, provider period for a full download)
+TIMEFRAME_WINDOWS = {
+    "1m": ("1m", timedelta(days=7), "7d"),
+    "5m": ("5m", timedelta(days=60), "60d"),
+    "15m": ("15m", timedelta(days=60), "60d"),
+    "1h": ("1h", timedelta(days=60), "60d"),
+    "1d": ("1d", timedelta(days=365), "1y"),
+}
+
+BAR_DURATIONS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+
+# (ticker, timeframe, last full download or None, last sync)
+SyncRow = Tuple[str, str, Optional[datetime], datetime]
+# Frames a bulk sync has yet to write: timeframe -> ticker -> (frame, sync row)
+PendingWrites = Dict[str, Dict[str, Tuple[pd.DataFrame, SyncRow]]]
 
 class HistoricalDataManager:
     def __init__(self):
         self.cache_dir = settings.data.cache_dir
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
+        # (ticker, timeframe) -> time of the last full download / last sync of any kind,
+        # loaded lazily from SQLite
+        self._full_syncs: Optional[Dict] = None
+        self._last_syncs: Optional[Dict] = None
+        self.sync_stats = {"rows_fetched": 0, "rows_written": 0, "rows_derived": 0}
             
-    def get_historical_data(self, ticker: str, timeframe: str) -> Optional[pd.DataFrame]:
-        """Fetches historical data for a ticker and timeframe."""
-        cache_path = os.path.join(self.cache_dir, f"{ticker}_{timeframe}.parquet")
-        cached_df = None
-        if os.path.exists(cache_path):
+    def get_historical_data(self, ticker: str, timeframe: str, tail: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Fetches historical data for a ticker and timeframe.
+        Decoded frames are served from the shared frame cache; treat the result as read-only.
+        With `tail`, only the last `tail` bars are decoded when the frame isn't cached.
+        """
+        if tail is not None and not frame_cache.contains((ticker, timeframe)):
+            cached_df = market_store.read(ticker, timeframe, tail=tail)
+        else:
+            cached_df = self._read_cached(ticker, timeframe)
+
+        if cached_df is not None and not cached_df.empty:
             try:
-                cached_df = pd.read_parquet(cache_path)
                 last_ts = cached_df.index[-1]
                 # If cache is fresh (within 1 hour for intraday), use it immediately
                 if datetime.now(last_ts.tzinfo) - last_ts < timedelta(hours=1):
@@ -32,7 +70,7 @@ class HistoricalDataManager:
 
         new_data = self.refresh_data(ticker, timeframe)
         if new_data is not None:
-            return new_data
+            return new_data.tail(tail) if tail is not None else new_data
             
         if cached_df is not None:
             logger.warning(f"Refresh failed for {ticker}. Using stale cache as fallback.")
@@ -40,105 +78,334 @@ class HistoricalDataManager:
 
         return None
 
-    def refresh_data(self, ticker: str, timeframe: str) -> Optional[pd.DataFrame]:
-        """Force refreshes historical data from yfinance."""
-        logger.debug(f"Fetching fresh historical data for {ticker} ({timeframe})")
-        
-        period = f"{settings.market.historical_period_months}mo"
-        
-        # yfinance timeframe mapping
-        interval_map = {
-            "1m": "1m",
-            "5m": "5m",
-            "15m": "15m",
-            "1h": "1h",
-            "1d": "1d"
-        }
-        
-        interval = interval_map.get(timeframe, "1d")
-        
-        # Adjust period for small intervals as yfinance has limits
-        # 1m data is only available for the last 7 days
-        # 5m/15m/1h data for the last 60 days
-        if timeframe == "1m":
-            period = "7d"
-        elif timeframe in ["5m", "15m", "1h"]:
-            period = "60d"
-            
+    def prefetch(self, tickers: List[str], timeframe: str, workers: int = 1):
+        """
+        Loads uncached frames for many tickers into the frame cache with one pass per store
+        partition. With several `workers`, partitions are read concurrently (Parquet decoding
+        releases the GIL).
+        """
+        missing = [t for t in tickers if not frame_cache.contains((t, timeframe))]
+        if not missing:
+            return
+        if workers <= 1:
+            groups = [missing]
+        else:
+            by_partition: Dict[int, List[str]] = {}
+            for ticker in missing:
+                by_partition.setdefault(market_store.partition_of(ticker), []).append(ticker)
+            groups = list(by_partition.values())
+
+        def load(group: List[str]):
+            for ticker, df in market_store.read_many(group, timeframe).items():
+                frame_cache.put((ticker, timeframe), df)
+
+        if len(groups) == 1:
+            load(groups[0])
+            return
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch") as pool:
+            for future in [pool.submit(load, group) for group in groups]:
+                future.result()
+
+    def migrate_legacy_cache(self, batch_size: int = 200):
+        """Moves per-ticker `{ticker}_{timeframe}.parquet` files into the consolidated store."""
+        legacy: Dict[str, List[str]] = {}
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file() or not entry.name.endswith(".parquet"):
+                continue
+            ticker, _, timeframe = entry.name[:-len(".parquet")].rpartition("_")
+            if ticker and timeframe in TIMEFRAME_WINDOWS:
+                legacy.setdefault(timeframe, []).append(ticker)
+        if not legacy:
+            return
+
+        logger.info(f"Migrating {sum(len(t) for t in legacy.values())} legacy cache files into the market data store...")
+        for timeframe, names in legacy.items():
+            for i in range(0, len(names), batch_size):
+                frames, paths = {}, []
+                for ticker in names[i:i + batch_size]:
+                    path = os.path.join(self.cache_dir, f"{ticker}_{timeframe}.parquet")
+                    try:
+                        df = pd.read_parquet(path)
+                        if not df.empty and 'Close' in df.columns:
+                            frames[ticker] = df
+                        paths.append(path)
+                    except Exception as e:
+                        logger.error(f"Skipping unreadable legacy cache {path}: {e}")
+                market_store.write_many(timeframe, frames)
+                for path in paths:
+                    os.remove(path)
+
+    @staticmethod
+    def _merge(cached: pd.DataFrame, new: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        """Appends freshly fetched bars to the cached frame, preferring new values on overlap."""
+        new = new.dropna(how="all")
+        if cached.index.tz is not None and new.index.tz is not None and new.index.tz != cached.index.tz:
+            new = new.tz_convert(cached.index.tz)
+        merged = pd.concat([cached, new[[c for c in new.columns if c in cached.columns]]])
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+        # Trim to the provider's retention window so files don't grow without bound
+        horizon = merged.index[-1] - TIMEFRAME_WINDOWS[timeframe][1]
+        return merged[merged.index >= horizon]
+
+    @staticmethod
+    def _fetched_rows(data: pd.DataFrame) -> int:
+        """Downloaded bars that carry a close (the unit of sync_stats["rows_fetched"])."""
+        closes = data['Close']
+        if isinstance(closes, pd.DataFrame):
+            closes = closes.iloc[:, 0]
+        return int(closes.notna().sum())
+
+    def _load_sync_state(self):
+        if self._full_syncs is None:
+            self._full_syncs, self._last_syncs = state_cache.db.load_sync_state()
+
+    def synced_at(self, ticker: str, timeframe: str) -> Optional[datetime]:
+        """When the ticker's `timeframe` bars were last fetched (None if never)."""
+        self._load_sync_state()
+        return self._last_syncs.get((ticker, timeframe))
+
+    def stale_tickers(self, tickers: List[str], max_age: timedelta) -> List[str]:
+        """Tickers with a configured timeframe that wasn't synced within `max_age` (or ever)."""
+        self._load_sync_state()
+        cutoff = datetime.now() - max_age
+        stale = []
+        for ticker in tickers:
+            for timeframe in settings.data.timeframes:
+                synced = self._last_syncs.get((ticker, timeframe))
+                if synced is None or synced < cutoff:
+                    stale.append(ticker)
+                    break
+        return stale
+
+    def _incremental_start(self, ticker: str, timeframe: str) -> Optional[pd.Timestamp]:
+        """
+        Start of the missing range for an incremental sync, or None when the ticker needs a
+        full download (no cache, cache older than the provider window, or reconciliation due).
+        """
+        self._load_sync_state()
+        last_full = self._full_syncs.get((ticker, timeframe))
+        if last_full is None or datetime.now() - last_full > timedelta(hours=settings.data.full_reconcile_hours):
+            return None
+
+        cached = frame_cache.get((ticker, timeframe)) if frame_cache.contains((ticker, timeframe)) else None
+        last_ts = cached.index[-1] if cached is not None and not cached.empty else market_store.last_timestamp(ticker, timeframe)
+        if last_ts is None:
+            return None
+
+        window = TIMEFRAME_WINDOWS[timeframe][1]
+        if datetime.now(last_ts.tzinfo) - last_ts > window - timedelta(days=1):
+            return None
+
+        # Re-request a few bars so the still-forming bar and late revisions are replaced
+        return last_ts - settings.data.sync_overlap_bars * BAR_DURATIONS[timeframe]
+
+    def _read_cached(self, ticker: str, timeframe: str, pending: Optional[PendingWrites] = None) -> Optional[pd.DataFrame]:
+        cached = frame_cache.get((ticker, timeframe))
+        if cached is not None:
+            return cached
+        buffered = pending.get(timeframe, {}).get(ticker) if pending is not None else None
+        if buffered is not None:
+            return buffered[0]
+        try:
+            cached = market_store.read(ticker, timeframe)
+            if cached is None:
+                # Not migrated yet
+                cache_path = os.path.join(self.cache_dir, f"{ticker}_{timeframe}.parquet")
+                if not os.path.exists(cache_path):
+                    return None
+                cached = pd.read_parquet(cache_path)
+            frame_cache.put((ticker, timeframe), cached)
+            return cached
+        except Exception as e:
+            logger.error(f"Error reading cache for {ticker} ({timeframe}): {e}")
+            return None
+
+    def _record_syncs(self, rows: List[SyncRow]):
+        """Records sync times of frames that have reached the store."""
+        self._load_sync_state()
+        for ticker, timeframe, full_sync, last_sync in rows:
+            self._last_syncs[(ticker, timeframe)] = last_sync
+            if full_sync is not None:
+                self._full_syncs[(ticker, timeframe)] = full_sync
+        state_cache.db.save_sync_states(rows)
+
+    def _flush_pending(self, pending: PendingWrites, timeframe: Optional[str] = None):
+        """Writes a bulk sync's buffered frames to the store (all timeframes when none is given)."""
+        for tf in ([timeframe] if timeframe else list(pending)):
+            writes = pending.pop(tf, None)
+            if not writes:
+                continue
+            # A concurrent refresh may have cached newer bars since; keep those
+            frames = {}
+            for ticker, (data, _) in writes.items():
+                latest = frame_cache.get((ticker, tf))
+                newer = latest is not None and not latest.empty and (data.empty or latest.index[-1] > data.index[-1])
+                frames[ticker] = latest if newer else data
+            market_store.write_many(tf, frames)
+            self._record_syncs([row for _, row in writes.values()])
+
+    def _store(self, ticker: str, timeframe: str, data: pd.DataFrame, incremental: bool,
+               pending: Optional[PendingWrites] = None) -> pd.DataFrame:
+        """
+        Merges (incremental) or replaces (full) the cached frame and records the sync. A bulk
+        sync passes its own `pending` buffer, which is written to the store in batches.
+        """
+        if incremental:
+            cached = self._read_cached(ticker, timeframe, pending)
+            if cached is not None and not cached.empty:
+                data = self._merge(cached, data, timeframe)
+        now = datetime.now()
+        row = (ticker, timeframe, None if incremental else now, now)
+        if pending is not None:
+            writes = pending.setdefault(timeframe, {})
+            writes[ticker] = (data, row)
+            if len(writes) >= settings.data.store_flush_tickers:
+                self._flush_pending(pending, timeframe)
+        else:
+            market_store.write(ticker, timeframe, data)
+            self._record_syncs([row])
+        frame_cache.put((ticker, timeframe), data)
+        if not data.empty:
+            change_tracker.bar_landed(ticker, timeframe, data.index[-1])
+        self.sync_stats["rows_written"] += len(data)
+        return data
+
+    def _derive(self, ticker: str, timeframe: str, source: str, start: pd.Timestamp,
+                pending: Optional[PendingWrites] = None) -> Optional[pd.DataFrame]:
+        """
+        Rebuilds the missing `timeframe` bars from the cached `source` bars, or returns None
+        when the finer cache doesn't fully cover the range after `start`.
+        """
+        cached = self._read_cached(ticker, timeframe, pending)
+        fine = self._read_cached(ticker, source, pending)
+        if cached is None or cached.empty or fine is None or fine.empty:
+            return None
+
+        offset = bucket_offset(cached.index, timeframe)
+        first_bucket = cached.index[cached.index >= start]
+        first_bucket = first_bucket[0] if len(first_bucket) else start
+        if fine.index[0] > first_bucket or fine.index[-1] < cached.index[-1]:
+            return None
+
+        bars = resample_ohlcv(fine[fine.index >= first_bucket], timeframe, offset)
+        if bars.empty:
+            return None
+        self.sync_stats["rows_derived"] += len(bars)
+        return self._store(ticker, timeframe, bars, incremental=True, pending=pending)
+
+    def refresh_data(self, ticker: str, timeframe: str, full: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Refreshes historical data from the market data provider. Only the bars after the last cached
+        timestamp are requested unless a full reconciliation is due or `full` is set.
+        """
+        interval = TIMEFRAME_WINDOWS.get(timeframe, TIMEFRAME_WINDOWS["1d"])[0]
+        period = TIMEFRAME_WINDOWS.get(timeframe, TIMEFRAME_WINDOWS["1d"])[2]
+        start = None if full or timeframe not in TIMEFRAME_WINDOWS else self._incremental_start(ticker, timeframe)
+        logger.debug(f"Fetching {'incremental' if start is not None else 'full'} historical data for {ticker} ({timeframe})")
+
         try:
-            data = yf.download(ticker, period=period, interval=interval, progress=False)
-            if data.empty:
+            frames = fetch_scheduler.run(market_provider.download, [ticker], interval, period=period, start=start)
+            data = frames.get(ticker)
+            if data is None or data.empty:
                 logger.debug(f"No data returned for {ticker} ({timeframe})")
                 return None
-                
-            # Ensure consistent index name for frontend
-            data.index.name = "Datetime"
-            
-            # Robust Column Validation
-            if isinstance(data.columns, pd.MultiIndex):
-                data.columns = data.columns.get_level_values(0)
-            
-            # Remove any possible duplicates and capitalize common columns
-            data.columns = [str(c).capitalize() for c in data.columns]
-            
+
             if 'Close' not in data.columns:
                 logger.error(f"Required 'Close' column missing for {ticker} after download")
                 return None
-                
-            cache_path = os.path.join(self.cache_dir, f"{ticker}_{timeframe}.parquet")
-            data.to_parquet(cache_path)
-            return data
+
+            self.sync_stats["rows_fetched"] += self._fetched_rows(data)
+            return self._store(ticker, timeframe, data, incremental=start is not None)
         except Exception as e:
             logger.debug(f"Failed to fetch data for {ticker} ({timeframe}): {e}")
             return None
 
     def fetch_all(self, tickers: list):
-        """Pre-fetches data for all tickers and timeframes in batches."""
+        """
+        Syncs data for all tickers and timeframes in batches. Tickers with a recent cache
+        only fetch the bars after their last cached timestamp; the rest get the full window.
+        """
         logger.info(f"Syncing historical data for {len(tickers)} assets...")
-        
-        for tf in settings.data.timeframes:
-            # Determine period and interval
-            interval_map = {"1m": "1m", "5m": "5m", "15m": "15m", "1h": "1h", "1d": "1d"}
-            interval = interval_map.get(tf, "1h")
-            period = "60d" if tf in ["5m", "15m", "1h"] else "7d" if tf == "1m" else "1y"
+        fetched_before = self.sync_stats["rows_fetched"]
+        derived_before = self.sync_stats["rows_derived"]
+        pending: PendingWrites = {}
+        try:
+            self._sync_all(tickers, pending)
+        finally:
+            self._flush_pending(pending)
+        logger.info(
+            f"Historical sync complete: {self.sync_stats['rows_fetched'] - fetched_before} bars fetched, "
+            f"{self.sync_stats['rows_derived'] - derived_before} bars resampled locally."
+        )
+
+    def _sync_all(self, tickers: list, pending: PendingWrites):
+        # Finest first, so coarser timeframes can be resampled from bars synced this pass
+        timeframes = sorted(settings.data.timeframes, key=lambda t: BAR_DURATIONS.get(t, timedelta(days=1)))
+        for tf_index, tf in enumerate(timeframes):
+            interval, _, period = TIMEFRAME_WINDOWS.get(tf, TIMEFRAME_WINDOWS["1h"])
+
+            # Split the universe into full downloads and incremental syncs, grouping
+            # incremental tickers with similar start times into the same request
+            full, incremental = [], []
+            for ticker in tickers:
+                start = self._incremental_start(ticker, tf) if tf in TIMEFRAME_WINDOWS else None
+                if start is None:
+                    full.append(ticker)
+                else:
+                    incremental.append((start, ticker))
+            incremental.sort()
+
+            # Derive what we can locally from the finest timeframe synced earlier in this pass
+            source = finest_source(tf, timeframes[:tf_index])
+            if source is not None and incremental:
+                remaining = []
+                for start, ticker in incremental:
+                    try:
+                        derived = self._derive(ticker, tf, source, start, pending)
+                    except Exception as e:
+                        logger.debug(f"Resampling {ticker} {source}->{tf} failed: {e}")
+                        derived = None
+                    if derived is None:
+                        remaining.append((start, ticker))
+                logger.debug(f"{tf}: derived {len(incremental) - len(remaining)} tickers from {source}")
+                incremental = remaining
+
+            if incremental or full:
+                logger.debug(f"{tf}: {len(incremental)} incremental, {len(full)} full downloads")
 
             chunk_size = 10  # Reduced from 50 to avoid Rate Limits
-            for i in range(0, len(tickers), chunk_size):
-                chunk = tickers[i:i + chunk_size]
+            requests = [(None, full[i:i + chunk_size]) for i in range(0, len(full), chunk_size)]
+            for i in range(0, len(incremental), chunk_size):
+                group = incremental[i:i + chunk_size]
+                requests.append((min(start for start, _ in group), [t for _, t in group]))
+
+            # Pacing is left to the shared scheduler; results are stored as they arrive
+            futures = {}
+            for start, chunk in requests:
+                future = fetch_scheduler.submit(
+                    market_provider.download, chunk, interval,
+                    period=None if start is not None else period, start=start,
+                    priority=Priority.BACKFILL
+                )
+                futures[future] = (start, chunk)
+            if futures:
+                logger.debug(f"Fetching {tf} data in {len(futures)} requests...")
+
+            for i, future in enumerate(as_completed(futures)):
+                start, chunk = futures[future]
                 try:
-                    logger.debug(f"Fetching {tf} data chunk: {i}/{len(tickers)}...")
-                    data = yf.download(chunk, period=period, interval=interval, progress=False, group_by="ticker")
-                    time.sleep(2.0) # Rate limit backoff
-                    
-                    if data is None or data.empty: continue
-                    
-
-                    for ticker in chunk:
+                    data = future.result()
+                    if not data: continue
+
+                    for ticker, ticker_data in data.items():
                         try:
-                            if len(chunk) > 1:
-                                if ticker not in data.columns.get_level_values(0):
-                                    continue
-                                ticker_data = data[ticker]
-                            else:
-                                ticker_data = data
-                            if ticker_data.empty or ticker_data.isna().all().all():
-                                continue
-                                
-                            # Ensure consistent index name for frontend
-                            ticker_data.index.name = "Datetime"
-                            
-                            # Flatten columns if necessary and sanitize
-                            if isinstance(ticker_data.columns, pd.MultiIndex):
-                                ticker_data.columns = ticker_data.columns.get_level_values(0)
-                            
-                            ticker_data.columns = [str(c).capitalize() for c in ticker_data.columns]
-                            
                             if 'Close' not in ticker_data.columns:
                                 logger.warning(f"Skipping {ticker} - Missing 'Close' column in batch fetch")
                                 continue
-                            
-                            cache_path = os.path.join(self.cache_dir, f"{ticker}_{tf}.parquet")
-                            ticker_data.to_parquet(cache_path)
+
+                            self.sync_stats["rows_fetched"] += self._fetched_rows(ticker_data)
+                            ticker_data = self._store(ticker, tf, ticker_data, incremental=start is not None, pending=pending)
                             
                             # Seed the initial price in state cache
                             price_series = ticker_data['Close'].dropna()
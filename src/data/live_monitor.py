@@ -1,10 +1,11 @@
 import asyncio
-import yfinance as yf
 from datetime import datetime
 from src.core.config import settings, tickers
 from src.core.logger import logger
 from src.core.market_hours import MarketHours
 from src.core.state import state_cache
+from src.data.scheduler import Priority, fetch_scheduler
+from src.data.providers import market_provider
 
 class LivePriceMonitor:
     def __init__(self):
@@ -38,50 +39,26 @@ class LivePriceMonitor:
         logger.info("Stopping LivePriceMonitor")
 
     async def poll_prices(self):
-        """Polls prices for all tracked tickers in chunks of 100."""
+        """Polls prices for all tracked tickers in chunks of 100, dispatched concurrently at live priority."""
         chunk_size = 100
-        for i in range(0, len(tickers), chunk_size):
-            chunk = tickers[i:i + chunk_size]
-            try:
-                data = await asyncio.to_thread(
-                    yf.download, 
-                    tickers=chunk, 
-                    period="1d", 
-                    interval="1m", 
-                    progress=False,
-                    group_by="ticker"
-                )
-                
-                if data.empty:
-                    continue
+        chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+        results = await asyncio.gather(
+            *(fetch_scheduler.run_async(market_provider.quotes, chunk, priority=Priority.LIVE) for chunk in chunks),
+            return_exceptions=True
+        )
 
-                # Track data size
-                state_cache.track_data(data.memory_usage(deep=True).sum())
+        for i, (chunk, prices) in enumerate(zip(chunks, results)):
+            if isinstance(prices, Exception):
+                state_cache.add_error(f"Live poll failed: {str(prices)}")
+                logger.debug(f"Failed to poll price chunk starting index {i * chunk_size}: {prices}")
+                continue
 
-                for ticker in chunk:
-                    try:
-                        ticker_data = data[ticker] if len(chunk) > 1 else data
-                        if ticker_data.empty:
-                            continue
-                            
-                        # Try to get the last non-NaN price
-                        prices = ticker_data['Close'].dropna()
-                        if prices.empty:
-                            continue
-                            
-                        last_price = prices.iloc[-1]
-                        if hasattr(last_price, 'item'): 
-                            last_price = float(last_price.iloc[0]) if hasattr(last_price, 'iloc') else float(last_price)
-                        
-                        state_cache.update_price(ticker, float(last_price))
-                    except Exception as e:
-                        logger.debug(f"Price update error {ticker}: {str(e)}")
-                        continue
-                        
-            except Exception as e:
-                state_cache.add_error(f"Live poll failed: {str(e)}")
-                logger.debug(f"Failed to poll price chunk starting index {i}: {e}")
-            
-            # Small delay between chunks to avoid hard throttling
-            if i + chunk_size < len(tickers):
-                await asyncio.sleep(0.5)
+            valid = {}
+            for ticker, last_price in prices.items():
+                try:
+                    valid[ticker] = float(last_price)
+                except Exception as e:
+                    logger.debug(f"Price update error {ticker}: {str(e)}")
+                    continue
+            # One vectorized column write per chunk
+            state_cache.update_prices(valid)
@@ -0,0 +1,302 @@
+import re
+import threading
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional
+from src.core.config import settings, ProviderConfig
+from src.core.logger import logger
+
+BAR_FREQUENCIES = {"1m": "1min", "5m": "5min", "15m": "15min", "1h": "1h", "1d": "1D"}
+
+def period_to_timedelta(period: str) -> pd.Timedelta:
+    """Converts provider period strings ("7d", "3mo", "1y") to a Timedelta."""
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    days = {"d": 1, "wk": 7, "mo": 30, "y": 365}[unit]
+    return pd.Timedelta(days=count * days)
+
+def normalize_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """Flattens provider columns to capitalized OHLCV names with a 'Datetime' index."""
+    # Ensure consistent index name for frontend
+    data.index.name = "Datetime"
+
+    # Robust Column Validation
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+
+    # Remove any possible duplicates and capitalize common columns
+    data.columns = [str(c).capitalize() for c in data.columns]
+    return data
+
+class MarketDataProvider(ABC):
+    """
+    Source of market data for the engine.
+
+    `download` returns normalized per-ticker OHLCV frames keyed by ticker; tickers the
+    provider has nothing for are simply absent from the result.
+    """
+    name = "base"
+
+    @abstractmethod
+    def download(self, tickers: List[str], interval: str, period: Optional[str] = None,
+                 start: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """Bars for `tickers` over the trailing `period`, or since `start`."""
+        pass
+
+    @abstractmethod
+    def list_universe(self) -> List[str]:
+        """Candidate tickers for discovery."""
+        pass
+
+    def quotes(self, tickers: List[str]) -> Dict[str, float]:
+        """Latest traded price per ticker, from today's 1m bars."""
+        prices = {}
+        for ticker, df in self.download(tickers, "1m", period="1d").items():
+            closes = df['Close'].dropna() if 'Close' in df.columns else None
+            if closes is not None and not closes.empty:
+                prices[ticker] = float(closes.iloc[-1])
+        return prices
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance; the universe is scraped from index constituent lists."""
+    name = "yfinance"
+
+    INDEX_SOURCES = [
+        ("https://en.wikipedia.org/wiki/List_of_S%26P_500_companies", 0, "Symbol"),
+        ("https://en.wikipedia.org/wiki/Nasdaq-100", 4, "Ticker"),
+        ("https://en.wikipedia.org/wiki/Dow_Jones_Industrial_Average", 1, "Symbol"),
+        ("https://en.wikipedia.org/wiki/Russell_1000_Index", 2, "Ticker"),
+        ("https://en.wikipedia.org/wiki/List_of_S%26P_600_companies", 0, "Symbol")
+    ]
+
+    # Massive fallback list (Top 300+ most active/major stocks)
+    FALLBACK_UNIVERSE = [
+        # Global & Crypto Fallback (24/7 Coverage)
+        "BTC-USD", "ETH-USD", "SOL-USD", "DOGE-USD", "XRP-USD", "ADA-USD",
+        "RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS", "SBI-N.NS",
+        "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "NVDA", "META", "BRK-B", "UNH", "V",
+        "JNJ", "WMT", "JPM", "PG", "MA", "LLY", "CVX", "HD", "KO",
+        "AVGO", "PEP", "ORCL", "MRK", "BAC", "COST", "TMO", "PFE", "ADBE", "ABT",
+        "CSCO", "NKE", "MCD", "DIS", "WFC", "CRM", "VZ", "AMD", "PM", "T",
+        "TXN", "DHR", "INTC", "HON", "UPS", "NEE", "MS", "RTX", "LOW", "IBM",
+        "AMAT", "DE", "GE", "LMT", "GS", "INTU",
+        "PLD", "BLK", "BKNG", "TJX", "MDLZ", "ADP", "CI", "ABNB", "GILD", "SYK",
+        "PANW", "SNPS", "REGN", "ISRG", "ADI", "VRTX", "EQIX", "CDNS", "EL",
+        "MU", "SLB", "ZTS", "EOG", "BSX", "AMT", "HUM", "C", "MO",
+        "PYPL", "LULU", "MAR", "CME", "MPC", "AON", "TGT", "ADSK", "ORLY", "PH",
+        "PGR", "CTAS", "MCK", "MARA", "RIOT", "COIN", "MSTR", "SOXL", "TQQQ",
+        "MVIS", "AMC", "GME", "BB", "AAL", "CCL",
+        "DAL", "UAL", "JETS", "XOM", "BP", "SHEL", "TTE", "VLO", "PSX",
+        "OXY", "DVN", "HAL", "BKR", "KMI", "WMB", "OKE", "MPW", "RITM", "NLY",
+        "AGNC", "STWD", "BX", "APO", "FIG", "KKR", "TROW", "BEN", "STT",
+        "BK", "AMP", "PRU", "MET", "AFL", "ALL", "TRV", "CB", "MTB",
+        "FITB", "HBAN", "KEY", "RF", "CFG", "TFC", "PNC", "USB", "SCHW", "TD",
+        "RY", "BMO", "BNS", "CM", "HSBC", "SAN", "BBVA", "ING",
+        "UBS", "LYG", "BCS", "NWG", "RELI", "INFY", "WIT", "HDB", "IBN", "TSM",
+        "ASML", "BABA", "JD", "PDD", "BIDU", "NTES", "TME", "IQ", "BILI", "XPEV",
+        "LI", "NIO", "BYDDF", "HMC", "TM", "STLA", "RACE", "F", "GM", "LCID",
+        "RIVN", "WKHS", "QS", "CHPT", "BLNK", "EVGO", "PLUG", "BE",
+        "DUK", "SO", "D", "AEP", "EXC", "SRE", "XEL", "ED", "PEG",
+        "PCG", "FE", "WEC", "ES", "AWK", "VST", "TLN", "CEG", "NET", "OKTA",
+        "CRWD", "ZS", "DDOG", "SNOW", "PLTR", "AI", "PATH", "U", "RBLX", "SE",
+        "MELI", "SHOP", "AFRM", "UPST", "SOFI", "HOOD", "HUT", "HIVE", "BITF", "CLSK", "WULF", "DKNG", "PENN", "WYNN",
+        "LVS", "MLCO", "CZR", "MGM", "HLT", "H", "EXPE", "TRIP",
+        "UBER", "LYFT", "DASH", "W", "CHWY", "ETSY", "EBAY"
+    ]
+
+    def download(self, tickers: List[str], interval: str, period: Optional[str] = None,
+                 start: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        # Deferred: yfinance is slow to import and unused with the local provider
+        import yfinance as yf
+        if start is not None:
+            data = yf.download(tickers, start=start, interval=interval, progress=False, group_by="ticker")
+        else:
+            data = yf.download(tickers, period=period, interval=interval, progress=False, group_by="ticker")
+        if data is None or data.empty:
+            return {}
+
+        frames = {}
+        if isinstance(data.columns, pd.MultiIndex):
+            grouped = set(data.columns.get_level_values(0))
+            for ticker in tickers:
+                if ticker in grouped:
+                    frames[ticker] = data[ticker]
+            if not frames and len(tickers) == 1:
+                # Column-grouped single ticker: (field, ticker)
+                frames[tickers[0]] = data
+        elif len(tickers) == 1:
+            frames[tickers[0]] = data
+
+        result = {}
+        for ticker, df in frames.items():
+            if df.empty or df.isna().all().all():
+                continue
+            result[ticker] = normalize_frame(df.copy())
+        return result
+
+    def list_universe(self) -> List[str]:
+        """Scrapes tickers from S&P 500, NASDAQ-100, Dow 30, and Russell 1000."""
+        import requests
+        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
+        all_tickers = set()
+
+        for url, table_index, col_name in self.INDEX_SOURCES:
+            try:
+                response = requests.get(url, headers=headers, timeout=10)
+                if response.status_code == 200:
+                    tables = pd.read_html(response.text)
+                    df = tables[table_index]
+                    tickers_list = df[col_name].tolist()
+                    all_tickers.update([str(t).replace('.', '-') for t in tickers_list])
+            except Exception as e:
+                logger.debug(f"Failed to fetch from {url}: {e}")
+
+        if not all_tickers:
+            return list(self.FALLBACK_UNIVERSE)
+
+        return list(all_tickers)
+
+class LocalProvider(MarketDataProvider):
+    """
+    Offline provider for load tests and benchmarks.
+
+    Serves bars recorded in a MarketDataStore directory (`root`, e.g. a copy of a production
+    `data_cache/store`) and synthesizes deterministic OHLCV for everything else. Synthetic
+    bars are a pure function of (ticker, interval, bar time), so repeated and incremental
+    downloads agree with each other. `latency_ms` delays every request and
+    `rate_limit_per_second` makes over-budget requests come back empty, as a throttled
+    provider would.
+    """
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None, latency_ms: float = 0.0,
+                 rate_limit_per_second: float = 0.0, universe_size: int = 5000, synthetic: bool = True):
+        self.store = None
+        if root:
+            from src.data.store import MarketDataStore
+            self.store = MarketDataStore(root)
+        self.latency_ms = latency_ms
+        self.rate_limit_per_second = rate_limit_per_second
+        self.universe_size = universe_size
+        self.synthetic = synthetic
+        self._tokens = max(1.0, rate_limit_per_second)
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+
+    def _admit(self) -> bool:
+        """Simulated provider-side rate limit (token bucket, one second of burst)."""
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit_per_second <= 0:
+                return True
+            now = time.monotonic()
+            capacity = max(1.0, self.rate_limit_per_second)
+            self._tokens = min(capacity, self._tokens + (now - self._refilled_at) * self.rate_limit_per_second)
+            self._refilled_at = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            self.throttled += 1
+            return False
+
+    def download(self, tickers: List[str], interval: str, period: Optional[str] = None,
+                 start: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000.0)
+        if not self._admit():
+            return {}
+
+        frames = {}
+        if self.store is not None:
+            for ticker, df in self.store.read_many(tickers, interval).items():
+                horizon = pd.Timestamp(start) if start is not None else df.index[-1] - period_to_timedelta(period or "1y")
+                if horizon.tzinfo is None and df.index.tz is not None:
+                    horizon = horizon.tz_localize(df.index.tz)
+                frames[ticker] = df[df.index >= horizon]
+        if self.synthetic:
+            for ticker in tickers:
+                if ticker not in frames:
+                    frames[ticker] = self.synthesize(ticker, interval, period=period, start=start)
+        return {t: df for t, df in frames.items() if not df.empty}
+
+    @staticmethod
+    def _uniform(seed: int, k: np.ndarray) -> np.ndarray:
+        """Stateless per-bar uniforms in [0, 1) (splitmix64 of bar number + seed)."""
+        with np.errstate(over="ignore"):
+            x = (k.astype(np.uint64) + np.uint64(seed)) * np.uint64(0x9E3779B97F4A7C15)
+            x ^= x >> np.uint64(30)
+            x *= np.uint64(0xBF58476D1CE4E5B9)
+            x ^= x >> np.uint64(27)
+            x *= np.uint64(0x94D049BB133111EB)
+            x ^= x >> np.uint64(31)
+        return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+    def synthesize(self, ticker: str, interval: str, period: Optional[str] = None,
+                   start: Optional[datetime] = None, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Deterministic OHLCV bars for one ticker (UTC, continuous session)."""
+        freq = pd.Timedelta(BAR_FREQUENCIES.get(interval, "1D"))
+        now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        last = now.floor(freq)
+        if start is not None:
+            first = pd.Timestamp(start)
+            first = (first.tz_localize("UTC") if first.tzinfo is None else first.tz_convert("UTC")).ceil(freq)
+        else:
+            first = last - period_to_timedelta(period or "1y") + freq
+        if first > last:
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"], dtype=np.float64)
+
+        epoch = pd.Timestamp("1970-01-01", tz="UTC")
+        k = np.arange((first - epoch) // freq, (last - epoch) // freq + 1, dtype=np.int64)
+        seed = zlib.crc32(f"{ticker}:{interval}".encode("utf-8"))
+        base = 1.0 + (zlib.crc32(ticker.encode("utf-8")) % 40000) / 100.0
+
+        # Slow cycles (in hours, so every interval sees the same trend) give the strategies
+        # something to find; per-bar noise keeps it irregular
+        phase = (zlib.crc32(ticker.encode("utf-8")) % 628) / 100.0
+        hours_per_bar = freq / pd.Timedelta(hours=1)
+
+        def price(bars: np.ndarray) -> np.ndarray:
+            t = bars.astype(np.float64) * hours_per_bar
+            swing = 0.08 * np.sin(t / 97.0 + phase) + 0.04 * np.sin(t / 23.0 + 2 * phase)
+            return base * np.exp(swing + (self._uniform(seed, bars) - 0.5) * 0.01)
+
+        close = price(k)
+        prev = price(k - 1)
+        high = np.maximum(prev, close) * (1 + self._uniform(seed + 1, k) * 0.004)
+        low = np.minimum(prev, close) * (1 - self._uniform(seed + 2, k) * 0.004)
+        volume = np.round(1e5 * (0.5 + self._uniform(seed + 3, k)) * np.where(self._uniform(seed + 4, k) < 0.05, 4.0, 1.0))
+
+        index = pd.to_datetime(k * freq.value, utc=True)
+        index.name = "Datetime"
+        return pd.DataFrame({"Open": prev, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+    def list_universe(self) -> List[str]:
+        if self.store is not None:
+            recorded = self.store.tickers("1d") or self.store.tickers("1h")
+            if recorded:
+                return recorded
+        return [f"SYN{i:05d}" for i in range(self.universe_size)]
+
+def create_provider(config: ProviderConfig) -> MarketDataProvider:
+    if config.name == "yfinance":
+        return YFinanceProvider()
+    if config.name == "local":
+        return LocalProvider(
+            root=config.local_root,
+            latency_ms=config.latency_ms,
+            rate_limit_per_second=config.rate_limit_per_second,
+            universe_size=config.universe_size,
+            synthetic=config.synthetic
+        )
+    raise ValueError(f"Unknown market data provider: {config.name}")
+
+# Global provider used by historical sync, live polling and discovery
+market_provider = create_provider(settings.provider)
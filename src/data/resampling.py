@@ -0,0 +1,64 @@
+import pandas as pd
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+# Intraday timeframes that can be rebuilt from finer bars (daily bars follow exchange sessions)
+RESAMPLE_RULES: Dict[str, str] = {
+    "1m": "1min",
+    "5m": "5min",
+    "15m": "15min",
+    "1h": "1h",
+}
+
+OHLCV_AGGREGATION = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+def finest_source(timeframe: str, available: List[str]) -> Optional[str]:
+    """Finest timeframe in `available` whose bars tile `timeframe` exactly, if any."""
+    if timeframe not in RESAMPLE_RULES:
+        return None
+    target = pd.Timedelta(RESAMPLE_RULES[timeframe])
+    candidates = [
+        tf for tf in available
+        if tf in RESAMPLE_RULES and tf != timeframe
+        and target % pd.Timedelta(RESAMPLE_RULES[tf]) == timedelta(0)
+        and pd.Timedelta(RESAMPLE_RULES[tf]) < target
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda tf: pd.Timedelta(RESAMPLE_RULES[tf]))
+
+def bucket_offset(index: pd.DatetimeIndex, timeframe: str) -> pd.Timedelta:
+    """
+    Offset of the provider's bucket grid, inferred from existing bars (e.g. US equity 1h
+    bars start at :30 while crypto bars start on the hour).
+    """
+    if len(index) == 0:
+        return pd.Timedelta(0)
+    last = index[-1]
+    return last - last.floor(RESAMPLE_RULES[timeframe])
+
+def resample_ohlcv(fine: pd.DataFrame, timeframe: str, offset: pd.Timedelta = pd.Timedelta(0)) -> pd.DataFrame:
+    """
+    Aggregates finer OHLCV bars into `timeframe` bars (open=first, high=max, low=min,
+    close=last, volume=sum). The first bucket is dropped if the fine data starts inside it,
+    so every returned bar is built from complete input.
+    """
+    rule = RESAMPLE_RULES[timeframe]
+    fine = fine.dropna(subset=["Close"])
+    if fine.empty:
+        return fine
+
+    aggregation = {c: OHLCV_AGGREGATION.get(c, "last") for c in fine.columns}
+    bars = fine.resample(rule, offset=offset, label="left", closed="left").agg(aggregation)
+    bars = bars.dropna(subset=["Close"])
+
+    if not bars.empty and bars.index[0] < fine.index[0]:
+        bars = bars.iloc[1:]
+    bars.index.name = fine.index.name
+    return bars
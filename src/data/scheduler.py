@@ -0,0 +1,146 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+from src.core.config import settings
+from src.core.logger import logger
+
+class Priority:
+    """Dispatch order for provider requests; lower runs first."""
+    LIVE = 0
+    BACKFILL = 1
+    DISCOVERY = 2
+
+PRIORITY_NAMES = {Priority.LIVE: "live", Priority.BACKFILL: "backfill", Priority.DISCOVERY: "discovery"}
+
+def is_empty_response(result: Any) -> bool:
+    """Provider responses that usually mean we are being throttled."""
+    if result is None:
+        return True
+    if isinstance(result, dict):
+        return not result
+    return bool(getattr(result, "empty", False))
+
+class FetchScheduler:
+    """
+    Shared dispatcher for all market data provider traffic.
+
+    Requests are queued by priority and executed on a small thread pool, each dispatch
+    consuming one token from a global token bucket. Errors and empty responses halve the
+    refill rate (down to `min_rate`); every healthy response recovers it additively toward
+    the configured rate. Tokens are taken before an item is popped, so a queued live poll
+    always overtakes backfill and discovery requests that are still waiting for budget.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int, min_rate: float):
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._queue: List = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._in_flight = 0
+        self.stats_counters = {"completed": 0, "failed": 0, "empty": 0, "backoffs": 0}
+
+    def submit(self, fn: Callable, *args, priority: int = Priority.BACKFILL, **kwargs) -> Future:
+        """Queues `fn(*args, **kwargs)` and returns a Future for its result."""
+        future: Future = Future()
+        with self._cond:
+            self._ensure_workers()
+            heapq.heappush(self._queue, (priority, next(self._seq), fn, args, kwargs, future))
+            self._cond.notify()
+        return future
+
+    def run(self, fn: Callable, *args, priority: int = Priority.BACKFILL, **kwargs) -> Any:
+        """Blocking submit for synchronous callers."""
+        return self.submit(fn, *args, priority=priority, **kwargs).result()
+
+    async def run_async(self, fn: Callable, *args, priority: int = Priority.BACKFILL, **kwargs) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args, priority=priority, **kwargs))
+
+    def _ensure_workers(self):
+        # Started lazily so forked ranking workers never inherit idle dispatch threads
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < self.max_concurrency:
+            worker = threading.Thread(target=self._work, name=f"fetch-{len(self._workers)}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _next(self):
+        """Waits for a queued request and a token, then pops the highest-priority request."""
+        with self._cond:
+            while True:
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self._in_flight += 1
+                    return heapq.heappop(self._queue)
+                self._cond.wait(timeout=(1.0 - self._tokens) / self.rate)
+
+    def _work(self):
+        while True:
+            priority, _, fn, args, kwargs, future = self._next()
+            if not future.set_running_or_notify_cancel():
+                self._finish(ok=None)
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                self._finish(ok=False, failed=True)
+                future.set_exception(e)
+                continue
+            self._finish(ok=not is_empty_response(result))
+            future.set_result(result)
+
+    def _finish(self, ok: Optional[bool], failed: bool = False):
+        """Records a finished request (ok=None for a cancelled one) and adapts the refill rate."""
+        with self._cond:
+            self._in_flight -= 1
+            # Bank tokens earned at the old rate before changing it
+            self._refill(time.monotonic())
+            if ok:
+                self.stats_counters["completed"] += 1
+                self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+            elif ok is not None:
+                self.stats_counters["failed" if failed else "empty"] += 1
+                self.stats_counters["backoffs"] += 1
+                self.rate = max(self.min_rate, self.rate * 0.5)
+                logger.debug(f"Provider backoff: request rate lowered to {self.rate:.2f}/s")
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for item in self._queue:
+                queued[PRIORITY_NAMES.get(item[0], str(item[0]))] += 1
+            return {
+                "rate_per_second": self.rate,
+                "max_rate_per_second": self.base_rate,
+                "in_flight": self._in_flight,
+                "queued": queued,
+                **self.stats_counters
+            }
+
+# Global scheduler shared by historical sync, live polling and discovery
+fetch_scheduler = FetchScheduler(
+    rate=settings.fetch.rate_per_second,
+    burst=settings.fetch.burst,
+    max_concurrency=settings.fetch.max_concurrency,
+    min_rate=settings.fetch.min_rate_per_second
+)
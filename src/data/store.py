@@ -0,0 +1,327 @@
+import json
+import os
+import threading
+import zlib
+from urllib.parse import quote, unquote
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.core.config import settings
+from src.core.logger import logger
+
+STORE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+INDEX_KEY = b"ticker_index"
+
+class MarketDataStore:
+    """
+    Consolidated columnar market-data store.
+
+    Each timeframe is a hash-partitioned Parquet dataset (`{root}/{timeframe}/part-XXX.parquet`).
+    Inside a partition rows are grouped by ticker and time-ordered, every ticker owns its own
+    row groups of at most `rows_per_group` rows, and a ticker -> row group index is kept in the
+    file's schema metadata. A "last N bars for X" read therefore decodes only X's trailing row
+    groups, while a whole-universe read is one pass over the partitions.
+
+    A single-ticker write doesn't touch its partition: it lands in a one-ticker delta file
+    (`{root}/{timeframe}/delta/part-XXX/{ticker}.parquet`, same layout) that shadows the
+    partition's copy, and the deltas are folded in once `delta_tickers` of them pile up or the
+    partition is rewritten anyway.
+
+    Files are written to a temporary path and swapped in with os.replace, so readers (which
+    pin the file they opened) never observe a partial write.
+    """
+
+    def __init__(self, root: str, partitions: int = 64, rows_per_group: int = 512, delta_tickers: int = 16):
+        self.root = root
+        self.partitions = partitions
+        self.rows_per_group = rows_per_group
+        self.delta_tickers = delta_tickers
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        # (path) -> ((inode, mtime_ns, size), FileMetaData, index)
+        self._footers: Dict[str, Tuple[Tuple[int, int, int], pq.FileMetaData, Dict]] = {}
+        # (timeframe, partition) -> {ticker: delta path}, listed from disk on first use
+        self._deltas: Dict[Tuple[str, int], Dict[str, str]] = {}
+
+    def partition_of(self, ticker: str) -> int:
+        return zlib.crc32(ticker.encode("utf-8")) % self.partitions
+
+    def partition_path(self, timeframe: str, partition: int) -> str:
+        return os.path.join(self.root, timeframe, f"part-{partition:03d}.parquet")
+
+    def delta_dir(self, timeframe: str, partition: int) -> str:
+        return os.path.join(self.root, timeframe, "delta", f"part-{partition:03d}")
+
+    def _delta_paths(self, timeframe: str, partition: int) -> Dict[str, str]:
+        """Live ticker -> delta file map of a partition (mutate only under the partition lock)."""
+        key = (timeframe, partition)
+        deltas = self._deltas.get(key)
+        if deltas is None:
+            with self._locks_guard:
+                deltas = self._deltas.get(key)
+                if deltas is None:
+                    directory = self.delta_dir(timeframe, partition)
+                    names = os.listdir(directory) if os.path.isdir(directory) else []
+                    deltas = {
+                        unquote(name[:-len(".parquet")]): os.path.join(directory, name)
+                        for name in names if name.endswith(".parquet")
+                    }
+                    self._deltas[key] = deltas
+        return deltas
+
+    def _lock(self, path: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _open(self, path: str):
+        """Opens a partition, reusing its parsed footer while the file is unchanged."""
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            return None, None, {}
+        stat = os.fstat(handle.fileno())
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._footers.get(path)
+        if cached is not None and cached[0] == key:
+            metadata, index = cached[1], cached[2]
+        else:
+            metadata = pq.read_metadata(handle)
+            raw = (metadata.metadata or {}).get(INDEX_KEY)
+            index = json.loads(raw) if raw else {}
+            self._footers[path] = (key, metadata, index)
+        handle.seek(0)
+        return pq.ParquetFile(handle, metadata=metadata), handle, index
+
+    @staticmethod
+    def _to_frame(table: pa.Table, entry: Dict) -> pd.DataFrame:
+        df = table.to_pandas()
+        df = df.set_index("Datetime")
+        if entry.get("tz"):
+            df.index = df.index.tz_convert(entry["tz"])
+        else:
+            df.index = df.index.tz_localize(None)
+        if entry.get("unit"):
+            df.index = df.index.as_unit(entry["unit"])
+        df.index.name = entry.get("index_name", "Datetime")
+        return df
+
+    def _read_entry(self, pf: pq.ParquetFile, entry: Dict, tail: Optional[int], columns: Optional[List[str]]) -> pd.DataFrame:
+        groups = entry["row_groups"]
+        if tail is not None:
+            # Walk row groups backwards until they hold enough rows for the tail
+            sizes = entry["group_rows"]
+            needed, picked = tail, []
+            for group, rows in zip(reversed(groups), reversed(sizes)):
+                picked.append(group)
+                needed -= rows
+                if needed <= 0:
+                    break
+            groups = list(reversed(picked))
+        read_columns = ["Datetime"] + (columns or STORE_COLUMNS)
+        table = pf.read_row_groups(groups, columns=read_columns)
+        df = self._to_frame(table, entry)
+        return df.tail(tail) if tail is not None else df
+
+    def read(self, ticker: str, timeframe: str, tail: Optional[int] = None,
+             columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Bars for one ticker (optionally only the last `tail` rows / a subset of columns)."""
+        return self.read_many([ticker], timeframe, tail=tail, columns=columns).get(ticker)
+
+    def read_many(self, tickers: Iterable[str], timeframe: str, tail: Optional[int] = None,
+                  columns: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """Bars for many tickers, opening each partition once."""
+        by_partition: Dict[int, List[str]] = {}
+        for ticker in tickers:
+            by_partition.setdefault(self.partition_of(ticker), []).append(ticker)
+
+        frames = {}
+        for partition, group in by_partition.items():
+            deltas = dict(self._delta_paths(timeframe, partition))
+            remaining = []
+            for ticker in group:
+                if ticker not in deltas or not self._read_file(deltas[ticker], [ticker], tail, columns, frames):
+                    # A delta that vanished was compacted into the partition before removal
+                    remaining.append(ticker)
+            if remaining:
+                self._read_file(self.partition_path(timeframe, partition), remaining, tail, columns, frames)
+        return frames
+
+    def _read_file(self, path: str, tickers: List[str], tail: Optional[int],
+                   columns: Optional[List[str]], frames: Dict[str, pd.DataFrame]) -> bool:
+        """Reads `tickers` from one store file into `frames`; False when the file is missing."""
+        pf, handle, index = self._open(path)
+        if pf is None:
+            return False
+        try:
+            for ticker in tickers:
+                entry = index.get(ticker)
+                if entry:
+                    frames[ticker] = self._read_entry(pf, entry, tail, columns)
+        except Exception as e:
+            logger.error(f"Store read failed for {path}: {e}")
+        finally:
+            handle.close()
+        return True
+
+    def read_all(self, timeframe: str, tail: Optional[int] = None,
+                 columns: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """Every ticker of a timeframe in one pass over its partitions."""
+        return self.read_many(self.tickers(timeframe), timeframe, tail=tail, columns=columns)
+
+    def tickers(self, timeframe: str) -> List[str]:
+        names = []
+        for partition in range(self.partitions):
+            pf, handle, index = self._open(self.partition_path(timeframe, partition))
+            if handle is not None:
+                handle.close()
+            names.extend(index.keys())
+            names.extend(t for t in self._delta_paths(timeframe, partition) if t not in index)
+        return names
+
+    def last_timestamp(self, ticker: str, timeframe: str) -> Optional[pd.Timestamp]:
+        """Latest stored bar time for a ticker, read from the file index only."""
+        partition = self.partition_of(ticker)
+        delta = self._delta_paths(timeframe, partition).get(ticker)
+        index = {}
+        if delta is not None:
+            pf, handle, index = self._open(delta)
+            if handle is not None:
+                handle.close()
+        if ticker not in index:
+            pf, handle, index = self._open(self.partition_path(timeframe, partition))
+            if handle is not None:
+                handle.close()
+        entry = index.get(ticker)
+        if not entry:
+            return None
+        ts = pd.Timestamp(entry["last"])
+        return ts.tz_convert(entry["tz"]) if entry.get("tz") else ts.tz_localize(None)
+
+    def write(self, ticker: str, timeframe: str, df: pd.DataFrame):
+        """Replaces one ticker's bars through a delta file, compacting the partition when due."""
+        if df is None or df.empty:
+            self.delete(ticker, timeframe)
+            return
+        partition = self.partition_of(ticker)
+        path = self.partition_path(timeframe, partition)
+        with self._lock(path):
+            deltas = self._delta_paths(timeframe, partition)
+            if ticker not in deltas and len(deltas) + 1 >= self.delta_tickers:
+                self._rewrite_locked(timeframe, partition, {ticker: df})
+                return
+            directory = self.delta_dir(timeframe, partition)
+            os.makedirs(directory, exist_ok=True)
+            delta = os.path.join(directory, f"{quote(ticker, safe='')}.parquet")
+            self._write_file(delta, {ticker: self._prepare(df.sort_index())})
+            deltas[ticker] = delta
+
+    def write_many(self, timeframe: str, frames: Dict[str, pd.DataFrame]):
+        """Replaces the stored bars of the given tickers, rewriting each touched partition once."""
+        by_partition: Dict[int, Dict[str, pd.DataFrame]] = {}
+        for ticker, df in frames.items():
+            by_partition.setdefault(self.partition_of(ticker), {})[ticker] = df
+        for partition, updates in by_partition.items():
+            self._rewrite_partition(timeframe, partition, updates)
+
+    def delete(self, ticker: str, timeframe: str):
+        self._rewrite_partition(timeframe, self.partition_of(ticker), {ticker: None})
+
+    @staticmethod
+    def _prepare(df: pd.DataFrame) -> Tuple[pa.Table, Dict]:
+        """Normalizes a frame to the store schema (UTC Datetime + float64 OHLCV)."""
+        index = df.index
+        tz = str(index.tz) if getattr(index, "tz", None) is not None else None
+        utc = index.tz_convert("UTC") if tz else index.tz_localize("UTC")
+        data = {"Datetime": pa.array(utc.as_unit("ns"), type=pa.timestamp("ns", tz="UTC"))}
+        for column in STORE_COLUMNS:
+            values = df[column] if column in df.columns else pd.Series(float("nan"), index=index)
+            if isinstance(values, pd.DataFrame):
+                values = values.iloc[:, 0]
+            data[column] = pa.array(values.to_numpy(dtype="float64", na_value=float("nan")))
+        meta = {"tz": tz, "index_name": index.name or "Datetime", "unit": getattr(index, "unit", "ns")}
+        return pa.table(data), meta
+
+    def _rewrite_partition(self, timeframe: str, partition: int, updates: Dict[str, Optional[pd.DataFrame]]):
+        path = self.partition_path(timeframe, partition)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock(path):
+            self._rewrite_locked(timeframe, partition, updates)
+
+    def _rewrite_locked(self, timeframe: str, partition: int, updates: Dict[str, Optional[pd.DataFrame]]):
+        """Rewrites a partition with `updates` and its pending deltas folded in (lock held)."""
+        path = self.partition_path(timeframe, partition)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        deltas = self._delta_paths(timeframe, partition)
+        tables: Dict[str, Tuple[pa.Table, Dict]] = {}
+        sources = [(path, None)] + [(delta, ticker) for ticker, delta in deltas.items()]
+        for source, only in sources:
+            pf, handle, index = self._open(source)
+            if pf is None:
+                continue
+            try:
+                for ticker, entry in index.items():
+                    if ticker not in updates and (only is None or ticker == only):
+                        meta = {key: entry.get(key) for key in ("tz", "index_name", "unit")}
+                        tables[ticker] = (pf.read_row_groups(entry["row_groups"]), meta)
+            finally:
+                handle.close()
+
+        for ticker, df in updates.items():
+            if df is not None and not df.empty:
+                tables[ticker] = self._prepare(df.sort_index())
+
+        self._write_file(path, tables)
+        # The partition now holds every delta; drop them only after the swap
+        for ticker, delta in list(deltas.items()):
+            deltas.pop(ticker, None)
+            self._footers.pop(delta, None)
+            if os.path.exists(delta):
+                os.remove(delta)
+
+    def _write_file(self, path: str, tables: Dict[str, Tuple[pa.Table, Dict]]):
+        """Writes tickers' tables as per-ticker row groups with the footer index (removes the file when empty)."""
+        new_index, slices, group = {}, [], 0
+        for ticker in sorted(tables):
+            table, meta = tables[ticker]
+            rows = table.num_rows
+            groups, sizes = [], []
+            for start in range(0, rows, self.rows_per_group):
+                length = min(self.rows_per_group, rows - start)
+                slices.append(table.slice(start, length))
+                groups.append(group)
+                sizes.append(length)
+                group += 1
+            if rows:
+                last = table.column("Datetime")[rows - 1].as_py()
+                new_index[ticker] = {
+                    "row_groups": groups,
+                    "group_rows": sizes,
+                    "rows": rows,
+                    "last": pd.Timestamp(last).isoformat(),
+                    **meta
+                }
+
+        if not slices:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+
+        schema = slices[0].schema.with_metadata({INDEX_KEY: json.dumps(new_index).encode("utf-8")})
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+                for table_slice in slices:
+                    writer.write_table(table_slice.cast(schema), row_group_size=self.rows_per_group)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+# Global store backing every HistoricalDataManager
+market_store = MarketDataStore(
+    os.path.join(settings.data.cache_dir, "store"),
+    partitions=settings.data.store_partitions,
+    rows_per_group=settings.data.store_rows_per_group,
+    delta_tickers=settings.data.store_delta_tickers
+)
@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
 from src.strategies.base import BaseStrategy, Signal
 from src.core.logger import logger
 
@@ -83,3 +83,154 @@ class StrategyEvaluator:
             "confidence": confidence,
             "score": float(confidence * (1 + avg_return)) 
         }
+
+# Keys of the StrategyEvaluator.evaluate metrics dict produced by evaluate_batch
+METRIC_KEYS = ("win_rate", "profit_factor", "sharpe_ratio", "total_trades", "cumulative_return", "max_drawdown", "confidence", "score")
+
+def _compact(values: np.ndarray, mask: np.ndarray, out: Optional[np.ndarray] = None,
+             offset: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Moves the masked entries of each row to the front of that row (after `offset` entries),
+    keeping their order: the row-wise equivalent of boolean-indexing a Series.
+    """
+    width = mask.shape[1]
+    picked = np.flatnonzero(mask)
+    counts = mask.sum(axis=1)
+    rows = np.repeat(np.arange(len(counts)), counts)
+    # Flat destination: row start + rank of the entry within its row
+    dest = rows * width + np.arange(len(picked)) - (np.cumsum(counts) - counts)[rows]
+    if offset is not None:
+        dest += offset[rows]
+    if out is None:
+        out = np.full(values.shape, np.nan)
+    out.reshape(-1)[dest] = np.ascontiguousarray(values).reshape(-1)[picked]
+    return out
+
+def _prefix_reduce(values: np.ndarray, lengths: np.ndarray, reducer) -> np.ndarray:
+    """
+    reducer(row[:length]) for every row, batched over rows of equal length. Reducing a
+    contiguous (rows x length) block along its last axis rounds exactly like reducing each
+    1-D slice, so sums match the pandas Series reductions of StrategyEvaluator bit for bit.
+    """
+    out = np.empty(len(values))
+    for length in np.unique(lengths):
+        rows = np.flatnonzero(lengths == length)
+        out[rows] = reducer(np.ascontiguousarray(values[rows, :length]))
+    return out
+
+def evaluate_batch(close: np.ndarray, signals: np.ndarray, lengths: Optional[np.ndarray] = None,
+                   keys: Sequence[str] = METRIC_KEYS) -> Dict[str, np.ndarray]:
+    """
+    Vectorized StrategyEvaluator.evaluate over many strategies (and tickers) at once.
+
+    close:   (bars,) or (bars, tickers) closes
+    signals: (bars, strategies) or (bars, tickers, strategies) signal codes (SIGNAL_CODES)
+    lengths: bars of real history per ticker when histories are right-aligned with NaN
+             padding at the top (IndicatorPanel layout); defaults to the full column.
+
+    Returns METRIC_KEYS arrays shaped (strategies,) or (tickers, strategies), identical to
+    the per-pair metrics dicts. Pairs with fewer than 50 bars get NaN metrics and a False
+    entry in the "valid" array (evaluate() reports "Insufficient data" for them). Restricting
+    `keys` (e.g. to ("score",) for ranking) skips the metrics nothing asked for.
+    """
+    single = close.ndim == 1
+    if single:
+        close = close[:, None]
+        signals = signals[:, None, :]
+    bars, tickers, strategies = signals.shape
+    if lengths is None:
+        lengths = np.full(tickers, bars, dtype=np.int64)
+
+    # next_return = Close.shift(-1).pct_change(), restarted at each ticker's first bar
+    shifted = np.full(close.shape, np.nan)
+    shifted[:-1] = close[1:]
+    next_return = np.full(close.shape, np.nan)
+    next_return[1:] = shifted[1:] / shifted[:-1] - 1
+    first_rows = bars - lengths
+    has_bars = first_rows < bars
+    next_return[first_rows[has_bars], np.flatnonzero(has_bars)] = np.nan
+
+    # One row per (ticker, strategy) pair, bars along the contiguous axis
+    codes = np.moveaxis(signals, 0, -1).reshape(tickers * strategies, bars)
+    returns = np.repeat(next_return.T, strategies, axis=0)
+    bullish = codes == 1
+    bearish = codes == -1
+
+    # Combined trade returns: bullish returns then negated bearish returns, each in bar order
+    n_bullish = bullish.sum(axis=1)
+    total_trades = n_bullish + bearish.sum(axis=1)
+    # (trades with a NaN return stay NaN: they count as trades but are skipped by the sums)
+    combined = _compact(returns, bullish)
+    _compact(-returns, bearish, out=combined, offset=n_bullish)
+    in_trades = np.arange(bars)[None, :] < total_trades[:, None]
+
+    has_trades = total_trades > 0
+    missing = np.isnan(combined) & in_trades
+    observed = total_trades - missing.sum(axis=1)
+    filled = np.where(np.isnan(combined), 0.0, combined)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wins = (combined > 0).sum(axis=1)
+        win_rate = np.where(has_trades, wins / np.maximum(total_trades, 1), 0.0)
+
+        trade_sum = _prefix_reduce(filled, total_trades, lambda block: block.sum(axis=1))
+        avg_return = np.where(has_trades, np.where(observed > 0, trade_sum / observed, np.nan), 0.0)
+
+        cum_return = max_drawdown = None
+        if "cumulative_return" in keys or "max_drawdown" in keys:
+            growth = np.where(np.isnan(combined), 1.0, 1 + combined)
+            cum_return = np.where(has_trades, _prefix_reduce(growth, total_trades, lambda block: block.prod(axis=1)) - 1, 0.0)
+
+            # Drawdown of the compounded trade sequence against its running peak
+            equity = np.cumprod(growth, axis=1)
+            equity = np.where(np.isnan(combined), np.nan, equity)
+            peak = np.fmax.accumulate(equity, axis=1)
+            drawdown = (equity - peak) / peak
+            any_observed = observed > 0
+            max_drawdown = np.where(any_observed, np.nanmin(np.where(any_observed[:, None], drawdown, 0.0), axis=1), np.nan)
+            max_drawdown = np.where(has_trades, max_drawdown, 0.0)
+
+        positive = combined > 0
+        negative = combined < 0
+        pos_sum = _prefix_reduce(_compact(combined, positive), positive.sum(axis=1), lambda block: block.sum(axis=1))
+        neg_sum = np.abs(_prefix_reduce(_compact(combined, negative), negative.sum(axis=1), lambda block: block.sum(axis=1)))
+        profit_factor = np.where(neg_sum > 0, pos_sum / neg_sum, np.where(pos_sum > 0, 2.0, 1.0))
+        profit_factor = np.where(has_trades, profit_factor, 1.0)
+
+        # Sample standard deviation, two-pass like pandas nanvar
+        mean = trade_sum / observed
+        squares = np.where(np.isnan(combined), 0.0, (mean[:, None] - filled) ** 2)
+        squares = np.where(in_trades, squares, 0.0)
+        variance = _prefix_reduce(squares, total_trades, lambda block: block.sum(axis=1)) / (observed - 1)
+        std = np.where(observed > 1, np.sqrt(variance), np.nan)
+        sharpe = np.where((total_trades > 5) & (std > 0), (avg_return / std) * np.sqrt(252), 0.0)
+
+        confidence = (win_rate * 0.4) + (np.minimum(profit_factor, 2.0) / 2.0 * 0.3) + (np.minimum(np.maximum(sharpe, 0), 3.0) / 3.0 * 0.3)
+        confidence = np.clip(confidence, 0.1, 0.98)
+        score = confidence * (1 + avg_return)
+
+    valid = np.repeat(lengths >= 50, strategies)
+    metrics = {
+        "win_rate": win_rate,
+        "profit_factor": profit_factor,
+        "sharpe_ratio": sharpe,
+        "total_trades": total_trades.astype(np.float64),
+        "cumulative_return": cum_return,
+        "max_drawdown": max_drawdown,
+        "confidence": confidence,
+        "score": score
+    }
+    shape = (strategies,) if single else (tickers, strategies)
+    out = {key: np.where(valid, metrics[key], np.nan).reshape(shape) for key in keys}
+    out["valid"] = valid.reshape(shape)
+    return out
+
+def metrics_dict(batch: Dict[str, np.ndarray], strategy_name: str, index) -> Dict[str, Any]:
+    """One entry of evaluate_batch as the StrategyEvaluator.evaluate dict."""
+    if not batch["valid"][index]:
+        return {"error": "Insufficient data"}
+    result = {"strategy": strategy_name}
+    for key in METRIC_KEYS:
+        value = batch[key][index]
+        result[key] = int(value) if key == "total_trades" else float(value)
+    return result
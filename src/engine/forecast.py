@@ -11,40 +11,48 @@ class ForecastEngine:
     def __init__(self, data_manager: HistoricalDataManager):
         self.data_manager = data_manager
 
-    def compute_forecast(self, ticker: str) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def rolling_atr(df: pd.DataFrame, length: int = 14) -> float:
+        """Latest simple rolling mean of true range, or NaN if there is not enough history."""
+        prev_close = df['Close'].shift(1)
+        tr = np.maximum(
+            df['High'] - df['Low'],
+            np.maximum(
+                abs(df['High'] - prev_close),
+                abs(df['Low'] - prev_close)
+            )
+        )
+        atr_series = tr.rolling(window=length).mean()
+        return float(atr_series.iloc[-1]) if not atr_series.empty else float('nan')
+
+    def compute_forecast(self, ticker: str, df: Optional[pd.DataFrame] = None, atr: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Computes the expected move and directional bias for a ticker.
+        `df` and `atr` may be supplied by a batched caller (see IndicatorPanel) to skip the reload.
         """
-        state = state_cache.get_state(ticker)
-        if not state or not state.best_strategy:
+        strategy_name, _ = state_cache.strategy(ticker)
+        if not strategy_name:
             return None
 
         # Get data for volatility calculation (1h or 15m)
-        df = self.data_manager.get_historical_data(ticker, "1h")
+        if df is None:
+            df = self.data_manager.get_historical_data(ticker, "1h")
         if df is None or df.empty:
             return None
 
-        last_price = state.last_price
+        last_price = state_cache.price(ticker)
         if last_price is None:
             # Fallback to last close from historical data if live price isn't polled yet
             last_price = float(df['Close'].iloc[-1])
         
         # Calculate ATR for price range
-        df['tr'] = np.maximum(
-            df['High'] - df['Low'],
-            np.maximum(
-                abs(df['High'] - df['Close'].shift(1)),
-                abs(df['Low'] - df['Close'].shift(1))
-            )
-        )
-        atr_series = df['tr'].rolling(window=14).mean()
-        if atr_series.empty or pd.isna(atr_series.iloc[-1]):
+        if atr is None:
+            atr = self.rolling_atr(df)
+        if pd.isna(atr):
             atr = 0.01 * last_price # Default small volatility
-        else:
-            atr = atr_series.iloc[-1]
         
         # Directional bias from last signal
-        signal = state.last_signal
+        signal = state_cache.signal(ticker)
         if not signal or signal.get('signal') is None:
             return None
             
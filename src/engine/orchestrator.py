@@ -1,13 +1,34 @@
 import asyncio
-from typing import List
+import time
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from src.core.changes import change_tracker
 from src.core.config import settings, tickers
 from src.core.logger import logger
 from src.core.market_hours import MarketHours
 from src.core.state import state_cache
+from src.data.frame_cache import frame_cache
 from src.data.historical_data import HistoricalDataManager
 from src.data.live_monitor import LivePriceMonitor
 from src.engine.selector import StrategySelector
 from src.engine.forecast import ForecastEngine
+from src.engine.panel import IndicatorPanel
+from src.engine.ranking import last_close
+from src.engine.refresh import RefreshScheduler
+from src.strategies.base import BaseStrategy
+
+def _repriced(df: pd.DataFrame, price: float) -> pd.DataFrame:
+    """Copy of `df` with its latest bar traded at `price`, as BarStream.snapshot applies a live price."""
+    df = df.copy()
+    for j, name in enumerate(df.columns):
+        if name == "Close":
+            df.iat[-1, j] = price
+        elif name == "High":
+            df.iat[-1, j] = max(df.iat[-1, j], price)
+        elif name == "Low":
+            df.iat[-1, j] = min(df.iat[-1, j], price)
+    return df
 
 class ServiceOrchestrator:
     def __init__(self):
@@ -19,6 +40,17 @@ class ServiceOrchestrator:
         self.engine_mode = "STANDARD" # STANDARD or HYPER_LIVE
         self.focus_criteria = None
         self.running = False
+        self._regions: Dict[str, str] = {}
+        # Per-ticker refresh deadlines for the intelligence loop, tightest for the focus
+        self.refresh_scheduler = RefreshScheduler(
+            self._refresh_class,
+            intervals={
+                "hyper": settings.engine.hyper_refresh_seconds,
+                "focus": settings.engine.focus_refresh_seconds,
+                "background": settings.engine.background_refresh_seconds
+            },
+            volatility_weight=settings.engine.volatility_weight
+        )
 
     async def start(self):
         try:
@@ -28,14 +60,19 @@ class ServiceOrchestrator:
             
             # 0. Initial Discovery
             state_cache.set_syncing(True)
-            await self.run_discovery()
+            await asyncio.to_thread(self.data_manager.migrate_legacy_cache)
+            warm = settings.engine.warm_restart and len(state_cache.store) > 0
+            if warm:
+                await self.warm_start()
+            else:
+                await self.run_discovery()
 
-            # 1. Initial data fetch and strategy selection
-            logger.info(f"Performing initial setup for {len(tickers)} tickers...")
-            await asyncio.to_thread(self.data_manager.fetch_all, tickers)
-            
-            logger.info(f"Executing strategy ranking (this may take a few minutes for {len(tickers)} tickers)...")
-            await asyncio.to_thread(self.selector.select_best_strategies, tickers)
+                # 1. Initial data fetch and strategy selection
+                logger.info(f"Performing initial setup for {len(tickers)} tickers...")
+                await asyncio.to_thread(self.data_manager.fetch_all, tickers)
+
+                logger.info(f"Executing strategy ranking (this may take a few minutes for {len(tickers)} tickers)...")
+                await asyncio.to_thread(self.selector.select_best_strategies, tickers)
             
             # 2. Initial signal generation
             logger.info("Generating initial signals...")
@@ -51,16 +88,72 @@ class ServiceOrchestrator:
 
             # 5. Start periodic discovery loop to grow universe incrementally
             # Immediately trigger an expansion if we just finished the initial small batch
-            if len(tickers) <= 65: 
+            # (or skipped discovery to serve the persisted universe first)
+            if warm:
+                asyncio.create_task(self.run_discovery())
+            elif len(tickers) <= 65: 
                  logger.info("Initial processing complete. Expanding universe...")
                  asyncio.create_task(self.run_discovery())
                  
             asyncio.create_task(self.discovery_loop())
+
+            # 6. Keep rankings current as new bars arrive
+            if settings.engine.rerank_after_bars > 0:
+                asyncio.create_task(self.rerank_loop())
         except Exception as e:
             logger.error(f"CRITICAL: ServiceOrchestrator failed to start: {e}")
             state_cache.add_error(f"Engine Startup Crash: {str(e)}")
             self.running = False
 
+    async def warm_start(self):
+        """
+        Restart from persisted state instead of rebuilding it. The persisted universe is
+        served again; cached history synced within the freshness window and rankings younger
+        than theirs are trusted, so only stale tickers are refetched or re-ranked. Persisted
+        signals computed from the latest cached bar are kept (the first intelligence pass
+        recomputes only the rest).
+        """
+        known = set(tickers)
+        restored = [t for t in state_cache.symbols() if t not in known]
+        tickers.extend(restored)
+
+        stale = await asyncio.to_thread(
+            self.data_manager.stale_tickers, tickers, timedelta(minutes=settings.engine.warm_data_minutes)
+        )
+        stale_set = set(stale)
+        # Trusted 1h history (what ranking and signals read) goes straight into the frame cache
+        await asyncio.to_thread(
+            self.data_manager.prefetch, [t for t in tickers if t not in stale_set], "1h", settings.engine.warm_load_workers
+        )
+        if stale:
+            await asyncio.to_thread(self.data_manager.fetch_all, stale)
+
+        cutoff = datetime.now() - timedelta(hours=settings.engine.warm_ranking_hours)
+        unranked = [t for t in tickers if not state_cache.strategy(t)[0] or (state_cache.ranked_at(t) or datetime.min) < cutoff]
+        if unranked:
+            await asyncio.to_thread(self.selector.select_best_strategies, unranked)
+
+        unranked_set = set(unranked)
+        resumed = sum(1 for t in tickers if t not in unranked_set and self._resume_signal(t))
+        logger.info(f"Warm restart: {len(tickers)} tickers ({len(restored)} restored), {len(stale)} refetched, "
+                    f"{len(unranked)} re-ranked, {resumed} persisted signals kept")
+
+    def _resume_signal(self, ticker: str) -> bool:
+        """Marks the ticker clean when its persisted signal and forecast match its strategy and latest bar."""
+        signal, forecast = state_cache.signal(ticker), state_cache.forecast(ticker)
+        if not signal or not forecast or signal.get('strategy') != state_cache.strategy(ticker)[0]:
+            return False
+        df = frame_cache.get((ticker, "1h"))
+        if df is None or df.empty:
+            return False
+        try:
+            if pd.Timestamp(signal.get('timestamp')) != df.index[-1]:
+                return False
+        except (TypeError, ValueError):
+            return False
+        change_tracker.restored(ticker, state_cache.price(ticker) or forecast.get('price'), df.index[-1])
+        return True
+
     async def run_discovery(self):
         """Runs the ticker discovery process and updates the global tickers list."""
         global tickers
@@ -101,6 +194,30 @@ class ServiceOrchestrator:
                 logger.error(f"Error in discovery loop: {e}")
                 await asyncio.sleep(300)
 
+    async def rerank_loop(self):
+        """
+        Keeps best_strategy current without full-universe backtests: tickers whose 1h history
+        advanced rerank_after_bars bars past their last ranking are re-ranked in chunks, each
+        followed by a pause long enough to hold ranking to rerank_cpu_share of one core.
+        """
+        while self.running:
+            try:
+                await asyncio.sleep(settings.engine.rerank_interval_seconds)
+                due = self.selector.due_for_rerank(list(tickers), settings.engine.rerank_after_bars)
+                share = min(max(settings.engine.rerank_cpu_share, 0.01), 1.0)
+                chunk_size = max(1, settings.engine.ranking_chunk_size)
+                cpu = 0.0
+                for start in range(0, len(due), chunk_size):
+                    if not self.running:
+                        break
+                    seconds = await asyncio.to_thread(self.selector.rerank, due[start:start + chunk_size])
+                    cpu += seconds
+                    await asyncio.sleep(seconds * (1.0 - share) / share)
+                if due:
+                    logger.info(f"Re-ranked {len(due)} tickers with new bars ({cpu:.1f}s CPU)")
+            except Exception as e:
+                logger.error(f"Error in re-rank loop: {e}")
+
     async def update_all_intelligence(self):
         """Generates signals and forecasts for all tickers."""
     
@@ -109,89 +226,223 @@ class ServiceOrchestrator:
         if self.focus_region != region:
             logger.info(f"Engine switching focus to: {region}")
             self.focus_region = region
+            self.refresh_scheduler.reprioritize()
     
     def set_engine_mode(self, mode: str, criteria: str = None):
         """Switches engine processing mode (STANDARD, HYPER_LIVE)."""
         self.engine_mode = mode
         self.focus_criteria = criteria
+        self.refresh_scheduler.reprioritize()
         logger.info(f"Engine Mode Switched: {mode} [{criteria}]")
 
     def _get_ticker_region(self, ticker: str) -> str:
-        t = ticker.upper()
-        if t.endswith('.NS') or t.endswith('.BO'):
-            return 'IN'
-        if '-USD' in t or 'USD' in t or 'BTC' in t or 'ETH' in t:
-            return 'CRYPTO'
-        return 'US'
+        return MarketHours.ticker_region(ticker)
 
-    async def update_all_intelligence(self):
-        """Generates signals and forecasts, prioritizing the focused region."""
-        
-        candidates = tickers
-        
-        # HYPER_LIVE MODE: Filter strictly for the user's active view
+    def _refresh_class(self, ticker: str) -> str:
+        """Priority class of a ticker for the refresh scheduler (hyper, focus or background)."""
+        region = self._regions.get(ticker)
+        if region is None:
+            region = self._regions[ticker] = self._get_ticker_region(ticker)
+        if region != self.focus_region:
+            return "background"
+
+        # HYPER_LIVE MODE: lock onto the user's active view (Penny Stock (<$10) OR Bullish Signal)
         if self.engine_mode == 'HYPER_LIVE' and self.focus_criteria == 'bullish_penny':
-            logger.debug(f"Hyper-Live Scan: Focusing on {self.focus_region} Penny Stocks & Bullish Gems...")
-            
-            # Filter for Region matching + (Low Price OR Bullish Signal)
-            filtered = []
-            for t in tickers:
-                if self._get_ticker_region(t) != self.focus_region:
-                    continue
-                    
-                state = state_cache.get_state(t)
-                last_price = state.last_price if state else 0
-                signal = state.last_signal['signal'] if state and state.last_signal else 'neutral'
-                
-                # Criteria: Penny Stock (<$10) OR Bullish Signal
-                if (last_price > 0 and last_price < 10) or signal == 'bullish':
-                    filtered.append(t)
-            
-            if filtered:
-                candidates = filtered
-                logger.debug(f"Engine locking onto {len(candidates)} high-priority targets.")
-            else:
-                logger.debug("No specific targets found for Hyper-Focus. Reverting to region sort.")
+            last_price = state_cache.price(ticker) or 0
+            signal = state_cache.signal_label(ticker) or 'neutral'
+            if (last_price and 0 < last_price < 10) or signal == 'bullish':
+                return "hyper"
+        return "focus"
 
-        # Sort tickers: Focused region first (fallback if not filtered)
-        sorted_tickers = sorted(
-            candidates, 
-            key=lambda t: 0 if self._get_ticker_region(t) == self.focus_region else 1
-        )
-        
-        for ticker in sorted_tickers:
+    async def update_all_intelligence(self, budget: Optional[float] = None):
+        """
+        Generates signals and forecasts for tickers whose refresh deadline has passed, most
+        overdue first (focused region and HYPER_LIVE targets have the shortest deadlines).
+        Stops pulling batches after `budget` seconds; without one, drains everything due.
+        Of the due tickers only those the change tracker reports dirty are recomputed.
+        """
+        started = time.perf_counter()
+        self.refresh_scheduler.start_cycle(tickers)
+        processed = bar_checks = 0
+        try:
+            while budget is None or time.perf_counter() - started < budget:
+                batch = self.refresh_scheduler.pop_due(settings.engine.cycle_batch_size)
+                if not batch:
+                    break
+
+                # Clean tickers whose next 1h bar is due get a cache refresh; a new bar marks them dirty
+                due = change_tracker.due_for_bar(batch)
+                if due:
+                    await asyncio.to_thread(self._load_frames, due)
+                    bar_checks += len(due)
+
+                # Only dirty tickers (new bar, price move, strategy change, never processed) are recomputed
+                work = change_tracker.take(batch)
+                volatility: Dict[str, float] = {}
+                try:
+                    volatility = await self._update_intelligence(work)
+                except Exception:
+                    for ticker in work:
+                        change_tracker.mark(ticker, "retry")
+                    raise
+                finally:
+                    for ticker in batch:
+                        self.refresh_scheduler.reschedule(ticker, volatility.get(ticker))
+                processed += len(work)
+        finally:
+            skipped = len(tickers) - processed
+            change_tracker.record_cycle(time.perf_counter() - started, processed, skipped, bar_checks)
+        logger.debug(f"Intelligence cycle: {processed} tickers updated, {skipped} skipped")
+
+    def _load_frames(self, tickers: List[str]) -> Dict[str, pd.DataFrame]:
+        """1h history for `tickers` (refreshed from the provider when stale)."""
+        frames = {}
+        self.data_manager.prefetch(tickers, "1h")
+        for ticker in tickers:
             try:
-                state = state_cache.get_state(ticker)
-                
-                # Get strategy instance
-                strategy_name = (state.best_strategy if state else None) or self.selector.strategies[0].name
-                strategy = self.selector.get_strategy_instance(strategy_name)
-                
-                # Get latest historical data
-                # In Hyper-Live, we might want to force refresh? 
-                # For now rely on cache freshness logic but fetch 1h data
                 df = self.data_manager.get_historical_data(ticker, "1h")
                 if df is not None and not df.empty:
-                    # Generate signal
-                    signal = strategy.get_current_signal(df, ticker=ticker)
-                    state_cache.update_signal(ticker, signal)
-                    
-                    # Update forecast
-                    self.forecaster.compute_forecast(ticker)
+                    frames[ticker] = df
             except Exception as e:
-                logger.debug(f"Error updating intelligence for {ticker}: {e}")
+                logger.debug(f"Error loading history for {ticker}: {e}")
+        return frames
+
+    async def _update_intelligence(self, work: Dict[str, str]) -> Dict[str, float]:
+        """
+        Recomputes signals and forecasts for `work` (ticker -> dirty reason). A price move or
+        a newly landed bar is folded into the ticker's strategy stream; everything else (new
+        tickers, strategy changes, retries, history not in the frame cache) is recomputed
+        over one indicator panel. Returns each ticker's ATR as a percentage of its price
+        (refresh scheduling input).
+        """
+        streamed = [t for t, reason in work.items() if reason in ("price", "bar")]
+        volatility = await asyncio.to_thread(self._update_streams, streamed) if streamed else {}
+        volatility.update(await self._update_panel([t for t in work if t not in volatility]))
+        return volatility
+
+    def _live_price(self, ticker: str) -> Optional[float]:
+        """
+        The ticker's live price if it was quoted after its 1h bars were last fetched, else None
+        (an older quote would overwrite a fresher close). Both signal paths reprice with it.
+        """
+        price, quoted_at = state_cache.quote(ticker)
+        if price is None or quoted_at is None:
+            return None
+        synced_at = self.data_manager.synced_at(ticker, "1h")
+        return price if synced_at is None or quoted_at > synced_at else None
+
+    def _update_streams(self, work: List[str]) -> Dict[str, float]:
+        """
+        Incremental path: resumes each ticker's strategy stream from its cached 1h frame
+        (only bars newer than the stream's tail are folded in) and reprices the forming bar
+        at a fresh live price, so the cost per ticker does not grow with the history length.
+        Seeding a ticker's first stream replays its whole history, so seeding stops after
+        engine.stream_seed_budget_seconds per call. Tickers left over, or without a cached
+        frame, go to the panel path.
+        """
+        volatility = {}
+        seeding = 0.0
+        for ticker in work:
+            df = frame_cache.get((ticker, "1h"))
+            if df is None or df.empty or 'Close' not in df.columns:
+                continue
+            strategy_name, params = state_cache.strategy(ticker)
+            strategy = self.selector.get_strategy_instance(strategy_name or self.selector.strategies[0].name, params)
+            seeded = strategy.has_stream(ticker)
+            if not seeded and seeding >= settings.engine.stream_seed_budget_seconds:
+                continue
+            began = time.perf_counter()
+            live_price = self._live_price(ticker)
+            try:
+                state_cache.update_signal(ticker, strategy.get_current_signal(df, ticker=ticker, live_price=live_price))
+                # Rolling ATR only needs the last window of bars
+                window = df.iloc[-15:]
+                atr = self.forecaster.rolling_atr(_repriced(window, live_price) if live_price is not None else window)
+                self.forecaster.compute_forecast(ticker, df=df, atr=atr)
+            except Exception as e:
+                logger.debug(f"Streaming update failed for {ticker}, recomputing over the panel: {e}")
+                continue
+            finally:
+                if not seeded:
+                    seeding += time.perf_counter() - began
+            price = live_price or last_close(df)
+            change_tracker.processed(ticker, price, df.index[-1])
+            volatility[ticker] = 100.0 * atr / price if price and not pd.isna(atr) else 0.0
+        if volatility:
+            state_cache.flush()
+        return volatility
+
+    async def _update_panel(self, work: List[str]) -> Dict[str, float]:
+        """Recomputes signals and forecasts for `work` over one indicator panel (cold or full recompute)."""
+        if not work:
+            return {}
+
+        # Load the 1h history once and align the whole batch into an indicator panel,
+        # repriced at fresh live prices like the stream path
+        frames = await asyncio.to_thread(self._load_frames, work)
+        panel = IndicatorPanel(frames)
+        live = {t: self._live_price(t) for t in panel.tickers}
+        live = {t: price for t, price in live.items() if price is not None}
+        panel.reprice(live)
+        for ticker in work:
+            if ticker not in panel.positions:
+                # Nothing to compute from; retried once a bar for it lands
+                change_tracker.processed(ticker, None, None)
+        if not len(panel):
+            return {}
+
+        # Group tickers by their ranked strategy (and parameters) so each runs once over the panel
+        by_strategy: Dict[int, List[str]] = {}
+        instances: Dict[int, BaseStrategy] = {}
+        for ticker in panel.tickers:
+            strategy_name, params = state_cache.strategy(ticker)
+            strategy = self.selector.get_strategy_instance(strategy_name or self.selector.strategies[0].name, params)
+            instances[id(strategy)] = strategy
+            by_strategy.setdefault(id(strategy), []).append(ticker)
+
+        for key, group in by_strategy.items():
+            strategy = instances[key]
+            try:
+                signals = strategy.get_panel_signals(panel, group)
+            except Exception as e:
+                logger.debug(f"Panel signals failed for {strategy.name}, falling back per ticker: {e}")
+                signals = {}
+                for ticker in group:
+                    try:
+                        signals[ticker] = strategy.get_current_signal(frames[ticker], ticker=ticker, live_price=live.get(ticker))
+                    except Exception as ticker_error:
+                        logger.debug(f"Error updating intelligence for {ticker}: {ticker_error}")
+
+            for ticker, signal in signals.items():
+                state_cache.update_signal(ticker, signal)
+
+        # Update forecasts from the panel's batched ATR
+        atr = panel.forecast_atr()
+        volatility = {}
+        for ticker in panel.tickers:
+            try:
+                self.forecaster.compute_forecast(ticker, df=frames[ticker], atr=float(atr[panel.positions[ticker]]))
+            except Exception as e:
+                logger.debug(f"Error updating forecast for {ticker}: {e}")
+            price = panel.last_price(ticker)
+            change_tracker.processed(ticker, price, panel.last_timestamp(ticker))
+            volatility[ticker] = 100.0 * float(atr[panel.positions[ticker]]) / price if price else 0.0
+
+        # One batched write for everything this cycle touched
+        state_cache.flush()
+        return volatility
 
     async def intelligence_loop(self):
-        """Loop to regenerate signals and forecasts based on latest prices."""
+        """Loop to regenerate signals and forecasts as refresh deadlines come due."""
         while self.running:
             try:
                 session = MarketHours.get_market_session()
                 if session != "closed":
-                    await self.update_all_intelligence()
+                    await self.update_all_intelligence(budget=settings.engine.cycle_budget_seconds)
                     logger.debug("Intelligence loop iteration completed")
                 
-                # Run every 30 seconds for intelligence updates
-                await asyncio.sleep(30)
+                # Short ticks: each one only pulls tickers whose refresh deadline has passed
+                await asyncio.sleep(settings.engine.intelligence_tick_seconds)
                 
             except Exception as e:
                 logger.debug(f"Error in intelligence loop: {e}")
@@ -200,4 +451,6 @@ class ServiceOrchestrator:
     async def stop(self):
         self.running = False
         await self.live_monitor.stop()
+        # Durable flush of write-behind state before the process exits
+        await asyncio.to_thread(state_cache.close)
         logger.info("ServiceOrchestrator stopped")
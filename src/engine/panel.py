@@ -0,0 +1,288 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from src.core.logger import logger
+
+OHLCV_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    """Extracts a single column as float64, tolerating duplicated column labels."""
+    col = df[name]
+    if isinstance(col, pd.DataFrame):
+        col = col.iloc[:, 0]
+    return col.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _stacked(frames: List[pd.DataFrame]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    OHLCV of `frames` concatenated end to end with one conversion per field, instead of a
+    column lookup per frame and field. None when a frame has duplicated column labels.
+    """
+    if not frames or not all(df.columns.is_unique for df in frames):
+        return None
+    stacked = pd.concat(frames, ignore_index=True, sort=False)
+    return {f: stacked[f].to_numpy(dtype=np.float64, na_value=np.nan) for f in OHLCV_FIELDS}
+
+
+def first_valid_rows(x: np.ndarray) -> np.ndarray:
+    """Row of the first non-NaN value per column (x.shape[0] when a column is all NaN)."""
+    valid = ~np.isnan(x)
+    first = np.argmax(valid, axis=0)
+    first[~valid.any(axis=0)] = x.shape[0]
+    return first
+
+
+def rolling_window(x: np.ndarray, length: int) -> np.ndarray:
+    """(bars - length + 1, tickers, length) view of trailing windows along the bar axis."""
+    return np.lib.stride_tricks.sliding_window_view(x, length, axis=0)
+
+
+def rolling_mean(x: np.ndarray, length: int) -> np.ndarray:
+    """Trailing simple moving average; NaN until a full window of valid bars exists."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] >= length:
+        out[length - 1:] = rolling_window(x, length).mean(axis=-1)
+    return out
+
+
+def rolling_std(x: np.ndarray, length: int, ddof: int = 0) -> np.ndarray:
+    """Trailing rolling standard deviation (population by default, like pandas_ta bbands)."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] >= length:
+        out[length - 1:] = rolling_window(x, length).std(axis=-1, ddof=ddof)
+    return out
+
+
+def seeded_ewm(x: np.ndarray, alpha, length) -> np.ndarray:
+    """
+    Recursive exponential average seeded with the SMA of the first `length` valid values.
+    Matches pandas_ta `ema` (alpha=2/(n+1)) and `rma` (alpha=1/n) column by column.
+    `alpha` and `length` may also be per-column arrays, so several smoothings share one pass.
+    """
+    bars, width = x.shape
+    out = np.full(x.shape, np.nan)
+    lengths = np.broadcast_to(length, (width,))
+    first = first_valid_rows(x)
+    seed_row = first + lengths - 1
+    seeded = seed_row < bars
+    seed_vals = np.full(width, np.nan)
+    for j in np.flatnonzero(seeded):
+        seed_vals[j] = x[first[j]:first[j] + lengths[j], j].mean()
+
+    seeds_at: Dict[int, List[int]] = {}
+    for j in np.flatnonzero(seeded):
+        seeds_at.setdefault(int(seed_row[j]), []).append(j)
+
+    # Unseeded columns stay NaN on their own: the recursion propagates the NaN prev
+    prev = np.full(width, np.nan)
+    step = np.empty(width)
+    scaled = np.empty(width)
+    decay = 1.0 - alpha
+    gaps = np.isnan(x)
+    for t in range(min(seeds_at, default=bars), bars):
+        np.multiply(decay, prev, out=step)
+        np.multiply(alpha, x[t], out=scaled)
+        step += scaled
+        # Hold the previous value across interior gaps instead of poisoning the recursion
+        np.copyto(step, prev, where=gaps[t])
+        cols = seeds_at.get(t)
+        if cols is not None:
+            step[cols] = seed_vals[cols]
+        prev, step = step, prev
+        out[t] = prev
+    return out
+
+
+def ema(x: np.ndarray, length: int) -> np.ndarray:
+    return seeded_ewm(x, 2.0 / (length + 1), length)
+
+
+def rma(x: np.ndarray, length: int) -> np.ndarray:
+    return seeded_ewm(x, 1.0 / length, length)
+
+
+def ema_many(x: np.ndarray, lengths: List[int]) -> List[np.ndarray]:
+    """ema(x, n) for every n in `lengths`, computed in a single recursion over the bars."""
+    width = x.shape[1]
+    spans = np.repeat(np.asarray(lengths, dtype=np.int64), width)
+    out = seeded_ewm(np.tile(x, (1, len(lengths))), 2.0 / (spans + 1), spans)
+    return np.hsplit(out, len(lengths))
+
+
+def shift_down(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Equivalent of Series.shift(periods) along the bar axis."""
+    out = np.full(x.shape, np.nan)
+    out[periods:] = x[:-periods]
+    return out
+
+
+class IndicatorPanel:
+    """
+    Aligns the OHLCV history of a whole universe into (bars x tickers) NumPy matrices.
+
+    Rows are aligned on each ticker's most recent bar, so row -1 is every ticker's latest
+    bar and shorter histories are NaN-padded at the top. Indicators are computed once for
+    all tickers with batched array operations and memoised by name and parameters.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], max_bars: Optional[int] = None):
+        frames = {
+            t: df for t, df in frames.items()
+            if df is not None and not df.empty and all(f in df.columns for f in OHLCV_FIELDS)
+        }
+        self.tickers: List[str] = list(frames.keys())
+        self.positions: Dict[str, int] = {t: j for j, t in enumerate(self.tickers)}
+        self.lengths = np.array([len(frames[t]) for t in self.tickers], dtype=np.int64)
+        ends = np.cumsum(self.lengths)
+        self.timestamps = [frames[t].index[-1] for t in self.tickers]
+
+        bars = int(self.lengths.max()) if len(self.lengths) else 0
+        if max_bars is not None:
+            bars = min(bars, max_bars)
+        self.lengths = np.minimum(self.lengths, bars)
+        self.bars = bars
+
+        self.fields: Dict[str, np.ndarray] = {
+            f: np.full((bars, len(self.tickers)), np.nan) for f in OHLCV_FIELDS
+        }
+        try:
+            stacked = _stacked([frames[t] for t in self.tickers])
+        except (TypeError, ValueError):
+            stacked = None
+        if stacked is not None:
+            # The last `lengths` rows of each frame fill the bottom of its column
+            for f in OHLCV_FIELDS:
+                field, values = self.fields[f], stacked[f]
+                for j, (n, end) in enumerate(zip(self.lengths.tolist(), ends.tolist())):
+                    if n:
+                        field[bars - n:, j] = values[end - n:end]
+        else:
+            for j, ticker in enumerate(self.tickers):
+                df = frames[ticker]
+                n = int(self.lengths[j])
+                if n == 0:
+                    continue
+                for f in OHLCV_FIELDS:
+                    self.fields[f][bars - n:, j] = _column(df, f)[-n:]
+
+        self._cache: Dict[Tuple, np.ndarray] = {}
+        logger.debug(f"Indicator panel built: {bars} bars x {len(self.tickers)} tickers")
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.fields["Open"]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.fields["High"]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.fields["Low"]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.fields["Close"]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.fields["Volume"]
+
+    def reprice(self, prices: Dict[str, float]):
+        """
+        Trades each ticker's latest bar at its live price (Close, with High/Low stretched to it)
+        as BarStream.snapshot does. Memoised indicators are dropped.
+        """
+        tickers = [t for t in prices if t in self.positions]
+        if not tickers or not self.bars:
+            return
+        columns = [self.positions[t] for t in tickers]
+        values = np.array([prices[t] for t in tickers], dtype=np.float64)
+        self.close[-1, columns] = values
+        self.high[-1, columns] = np.maximum(self.high[-1, columns], values)
+        self.low[-1, columns] = np.minimum(self.low[-1, columns], values)
+        self._cache.clear()
+
+    def _memo(self, key: Tuple, fn) -> np.ndarray:
+        if key not in self._cache:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self._cache[key] = fn()
+        return self._cache[key]
+
+    def sma(self, field: str, length: int) -> np.ndarray:
+        return self._memo(("sma", field, length), lambda: rolling_mean(self.fields[field], length))
+
+    def std(self, field: str, length: int) -> np.ndarray:
+        return self._memo(("std", field, length), lambda: rolling_std(self.fields[field], length))
+
+    def ema(self, length: int) -> np.ndarray:
+        return self._memo(("ema", length), lambda: ema(self.close, length))
+
+    def warm_emas(self, lengths: List[int]):
+        """Computes every not-yet-memoised EMA length in one pass (parameter sweeps)."""
+        missing = [n for n in dict.fromkeys(lengths) if ("ema", n) not in self._cache]
+        if len(missing) > 1 and self.bars:
+            for n, values in zip(missing, ema_many(self.close, missing)):
+                self._cache[("ema", n)] = values
+
+    def pct_change(self) -> np.ndarray:
+        return self._memo(("pct_change",), lambda: self.close / shift_down(self.close) - 1.0)
+
+    def rsi(self, length: int) -> np.ndarray:
+        """Wilder RSI, as pandas_ta `rsi`."""
+        def compute():
+            diff = self.close - shift_down(self.close)
+            positive = np.where(diff < 0, 0.0, diff)
+            negative = np.where(diff > 0, 0.0, diff)
+            # Both averages in one recursion
+            pos_avg, neg_avg = np.hsplit(rma(np.hstack([positive, negative]), length), 2)
+            return 100.0 * pos_avg / (pos_avg + np.abs(neg_avg))
+        return self._memo(("rsi", length), compute)
+
+    def bbands(self, length: int, std_dev: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(lower, mid, upper) Bollinger bands, as pandas_ta `bbands` (SMA, ddof=0)."""
+        mid = self.sma("Close", length)
+        dev = std_dev * self.std("Close", length)
+        lower = self._memo(("bbl", length, std_dev), lambda: mid - dev)
+        upper = self._memo(("bbu", length, std_dev), lambda: mid + dev)
+        return lower, mid, upper
+
+    def true_range(self) -> np.ndarray:
+        """True range as pandas_ta `true_range` (zero ranges nudged to epsilon, first bar NaN)."""
+        def compute():
+            prev_close = shift_down(self.close)
+            hl = self.high - self.low
+            hl = np.where(hl == 0, np.finfo(float).eps, hl)
+            tr = np.fmax(np.fmax(np.abs(hl), np.abs(self.high - prev_close)), np.abs(prev_close - self.low))
+            tr[np.isnan(prev_close)] = np.nan
+            return tr
+        return self._memo(("true_range",), compute)
+
+    def atr(self, length: int) -> np.ndarray:
+        """Wilder ATR, as pandas_ta `atr` with the default rma smoothing."""
+        return self._memo(("atr", length), lambda: rma(self.true_range(), length))
+
+    def forecast_atr(self, length: int = 14) -> np.ndarray:
+        """Simple rolling mean of true range used by ForecastEngine (latest value per ticker)."""
+        def compute():
+            prev_close = shift_down(self.close)
+            tr = np.maximum(
+                self.high - self.low,
+                np.maximum(np.abs(self.high - prev_close), np.abs(self.low - prev_close))
+            )
+            return rolling_mean(tr, length)
+        return self._memo(("forecast_atr", length), compute)[-1] if self.bars else np.array([])
+
+    def last(self, values: np.ndarray) -> np.ndarray:
+        """Latest row of an indicator matrix."""
+        return values[-1] if self.bars else np.full(len(self.tickers), np.nan)
+
+    def last_price(self, ticker: str) -> float:
+        return float(self.close[-1, self.positions[ticker]])
+
+    def last_timestamp(self, ticker: str):
+        return self.timestamps[self.positions[ticker]]
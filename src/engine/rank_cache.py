@@ -0,0 +1,57 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from src.core.state import state_cache
+from src.engine.ranking import Ranking
+
+# ticker -> (ranking_key, last bar as epoch ns, ranking)
+Entry = Tuple[str, Optional[int], Ranking]
+
+class RankingCache:
+    """
+    Latest ranking per ticker together with the ranking_key (strategy signature + content
+    hash of the 1h history) it was computed for. A lookup hits only while that key still
+    matches, so unchanged tickers skip their backtests; entries persist in SQLite and are
+    loaded on first use.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._entries: Optional[Dict[str, Entry]] = None
+        self._lock = threading.Lock()
+
+    def _loaded(self) -> Dict[str, Entry]:
+        if self._entries is None:
+            self._entries = self.db.load_rankings()
+        return self._entries
+
+    def get(self, ticker: str, key: str) -> Optional[Ranking]:
+        """Cached ranking of `ticker` if it was computed for `key`."""
+        with self._lock:
+            entry = self._loaded().get(ticker)
+        return entry[2] if entry is not None and entry[0] == key else None
+
+    def keys(self, tickers: Iterable[str]) -> Dict[str, str]:
+        """Cached ranking_key per ticker (tickers without an entry are left out)."""
+        with self._lock:
+            entries = self._loaded()
+            return {t: entries[t][0] for t in tickers if t in entries}
+
+    def last_bar(self, ticker: str) -> Optional[int]:
+        """Last bar (epoch ns) of the history the cached ranking was computed on."""
+        with self._lock:
+            entry = self._loaded().get(ticker)
+        return entry[1] if entry is not None else None
+
+    def put_many(self, entries: Dict[str, Entry]):
+        if not entries:
+            return
+        with self._lock:
+            self._loaded().update(entries)
+        self.db.save_rankings([(t, key, bar, *ranking) for t, (key, bar, ranking) in entries.items()])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._loaded())
+
+# Global ranking cache, persisted next to the ticker states
+ranking_cache = RankingCache(state_cache.db)
@@ -0,0 +1,206 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from src.strategies.base import BaseStrategy
+from src.engine.evaluator import StrategyEvaluator, evaluate_batch
+from src.engine.panel import IndicatorPanel, OHLCV_FIELDS
+from src.data.store import market_store
+
+# (ticker, best_strategy, best_score, best_params, status, fingerprint) where status is "ok", "cached"
+# (the caller's cached ranking still applies), "skipped", "missing" or an error message and
+# fingerprint is (ranking_key, last_bar) of the ranked frame
+RankResult = Tuple[str, Optional[str], float, Optional[Dict[str, Any]], str, Optional[Tuple[str, int]]]
+
+# Bump when scoring or eligibility rules change so cached rankings are recomputed
+RANKING_VERSION = 1
+
+def last_close(df: pd.DataFrame) -> float:
+    """Robustly extracts the latest close as a single float."""
+    price_val = df.iloc[-1]['Close']
+    # If multiple columns named 'Close', the value might be a Series
+    if hasattr(price_val, 'iloc'):
+        return float(price_val.iloc[0])
+    return float(price_val)
+
+def is_eligible(strategy: BaseStrategy, current_price: float) -> bool:
+    # ENFORCE CONSTRAINT: Penny Breakout is ONLY for stocks < $5.00
+    if strategy.name == "Penny Breakout" and current_price >= 5.0:
+        return False
+
+    # ENFORCE CONSTRAINT: Other strategies are for stocks >= $1.00 (optional but good for stability)
+    if strategy.name != "Penny Breakout" and current_price < 1.0:
+        return False
+    return True
+
+# (strategy name, score, parameters) of the best candidate for one ticker
+Ranking = Tuple[Optional[str], float, Optional[Dict[str, Any]]]
+
+def candidates(strategies: List[BaseStrategy], sweep: bool = False) -> List[Tuple[BaseStrategy, List[Dict[str, Any]]]]:
+    """Parameter sets to rank per strategy: its whole grid when sweeping, else its current parameters."""
+    return [(strategy, strategy.grid() if sweep else [strategy.params()]) for strategy in strategies]
+
+def ranking_signature(strategies: List[BaseStrategy], sweep: bool = False) -> str:
+    """Hash of everything but the data that decides a ranking: rule and strategy versions and the candidate parameter sets."""
+    parts = (RANKING_VERSION, [(type(s).__name__, s.name, s.version, grid) for s, grid in candidates(strategies, sweep)])
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+def _bar_stamps(df: pd.DataFrame) -> np.ndarray:
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex):
+        return index.as_unit("ns").asi8
+    return pd.util.hash_pandas_object(index, index=False).to_numpy()
+
+def ranking_key(df: pd.DataFrame, signature: str) -> str:
+    """
+    Content address of a ranking: the strategy signature plus the frame's row count, last
+    bar and a hash of its bar times and values. Equal keys mean an identical backtest.
+    """
+    stamps = _bar_stamps(df)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{signature}|{len(df)}|{stamps[-1] if len(stamps) else ''}|{list(df.columns)}".encode())
+    digest.update(np.ascontiguousarray(stamps).tobytes())
+    try:
+        digest.update(np.ascontiguousarray(df.to_numpy(dtype=np.float64)).tobytes())
+    except (TypeError, ValueError):
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def last_bar(df: pd.DataFrame) -> Optional[int]:
+    """Last bar time as epoch nanoseconds (None without a datetime index)."""
+    if isinstance(df.index, pd.DatetimeIndex) and len(df):
+        return int(df.index.as_unit("ns").asi8[-1])
+    return None
+
+def bars_since(df: pd.DataFrame, stamp: Optional[int]) -> int:
+    """Bars of `df` after epoch-nanosecond `stamp` (all of them without a stamp or datetime index)."""
+    if stamp is None or not isinstance(df.index, pd.DatetimeIndex):
+        return len(df)
+    stamps = df.index.as_unit("ns").asi8
+    return len(stamps) - int(np.searchsorted(stamps, stamp, side="right"))
+
+def rank_candidates(df: pd.DataFrame, strategies: List[BaseStrategy], sweep: bool = False) -> Ranking:
+    """rank_dataframe that also sweeps parameter grids and reports the winning parameters."""
+    best_strategy = None
+    best_score = -float('inf')
+    best_params = None
+    current_price = last_close(df)
+
+    for strategy, grid in candidates(strategies, sweep):
+        if not is_eligible(strategy, current_price):
+            continue
+
+        for params in grid:
+            instance = strategy if params == strategy.params() else strategy.with_params(**params)
+            metrics = StrategyEvaluator(instance).evaluate(df)
+            if "error" not in metrics:
+                score = metrics["score"]
+                if score > best_score:
+                    best_score = score
+                    best_strategy = strategy.name
+                    best_params = params
+
+    return best_strategy, best_score, best_params
+
+def rank_dataframe(df: pd.DataFrame, strategies: List[BaseStrategy]) -> Tuple[Optional[str], float]:
+    """Backtests every eligible strategy on one ticker's history and returns the best (name, score)."""
+    best_strategy, best_score, _ = rank_candidates(df, strategies)
+    return best_strategy, best_score
+
+def _batchable(df: pd.DataFrame) -> bool:
+    """Frames the panel path can hold: plain OHLCV columns (gaps are checked on the panel)."""
+    return all(f in df.columns for f in OHLCV_FIELDS) and not df.columns.duplicated().any()
+
+def _gapped(panel: IndicatorPanel) -> np.ndarray:
+    """Per panel ticker: any missing OHLCV value inside its real (unpadded) history."""
+    in_history = np.arange(panel.bars)[:, None] >= (panel.bars - panel.lengths)[None, :]
+    return np.logical_or.reduce([(np.isnan(panel.fields[f]) & in_history).any(axis=0) for f in OHLCV_FIELDS])
+
+def rank_frames(frames: Dict[str, pd.DataFrame], strategies: List[BaseStrategy], sweep: bool = False) -> Dict[str, Ranking]:
+    """
+    Ranks many tickers at once: panel signals of every strategy (and, with `sweep`, every
+    point of its parameter grid) are backtested in one evaluate_batch pass. Frames with
+    gaps or odd columns take the per-ticker path, which reproduces pandas' NaN handling.
+    """
+    results: Dict[str, Ranking] = {}
+    batch = {}
+    for ticker, df in frames.items():
+        if _batchable(df):
+            batch[ticker] = df
+        else:
+            results[ticker] = rank_candidates(df, strategies, sweep)
+    if not batch:
+        return results
+
+    panel = IndicatorPanel(batch)
+    gapped = _gapped(panel)
+    columns = []
+    cubes = []
+    for strategy, grid in candidates(strategies, sweep):
+        cubes.append(strategy.compute_grid(panel, grid))
+        columns.extend((strategy, params) for params in grid)
+    metrics = evaluate_batch(panel.close, np.concatenate(cubes, axis=-1), lengths=panel.lengths, keys=("score",))
+
+    for j, ticker in enumerate(panel.tickers):
+        if gapped[j]:
+            results[ticker] = rank_candidates(batch[ticker], strategies, sweep)
+            continue
+        best_strategy = None
+        best_score = -float('inf')
+        best_params = None
+        current_price = last_close(batch[ticker])
+        for s, (strategy, params) in enumerate(columns):
+            if not is_eligible(strategy, current_price) or not metrics["valid"][j, s]:
+                continue
+            score = float(metrics["score"][j, s])
+            if score > best_score:
+                best_score = score
+                best_strategy = strategy.name
+                best_params = params
+        results[ticker] = (best_strategy, best_score, best_params)
+    return results
+
+def rank_chunk(tickers: List[str], strategies: List[BaseStrategy], sweep: bool = False,
+               known: Optional[Dict[str, str]] = None) -> List[RankResult]:
+    """
+    Process-pool work unit: ranks a chunk of tickers straight from the market data store (1h).
+    Tickers missing from the store are reported as "missing" so the caller can rank them
+    through HistoricalDataManager (which may refresh from the provider). Tickers whose
+    ranking_key equals the caller's cached key in `known` are reported "cached", unranked.
+    """
+    results: List[RankResult] = []
+    known = known or {}
+    try:
+        frames = market_store.read_many(tickers, "1h")
+    except Exception as e:
+        return [(ticker, None, 0.0, None, str(e), None) for ticker in tickers]
+
+    signature = ranking_signature(strategies, sweep)
+    usable = {}
+    fingerprints = {}
+    for ticker in tickers:
+        df = frames.get(ticker)
+        if df is None:
+            results.append((ticker, None, 0.0, None, "missing", None))
+        elif df.empty or 'Close' not in df.columns:
+            results.append((ticker, None, 0.0, None, "skipped", None))
+        else:
+            fingerprints[ticker] = (ranking_key(df, signature), last_bar(df))
+            if known.get(ticker) == fingerprints[ticker][0]:
+                results.append((ticker, None, 0.0, None, "cached", fingerprints[ticker]))
+            else:
+                usable[ticker] = df
+
+    try:
+        ranked = rank_frames(usable, strategies, sweep)
+    except Exception:
+        # Isolate the failing ticker(s) instead of losing the whole chunk
+        ranked = {}
+        for ticker, df in usable.items():
+            try:
+                ranked[ticker] = rank_candidates(df, strategies, sweep)
+            except Exception as e:
+                results.append((ticker, None, 0.0, None, str(e), None))
+    for ticker, (best_strategy, best_score, best_params) in ranked.items():
+        results.append((ticker, best_strategy, best_score, best_params, "ok", fingerprints[ticker]))
+    return results
@@ -0,0 +1,109 @@
+import heapq
+import itertools
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+class RefreshScheduler:
+    """
+    Earliest-deadline-first queue of ticker refreshes for the intelligence loop.
+
+    Every ticker carries a refresh deadline: the time of its last refresh plus an interval
+    that depends on its priority class (`classify`, e.g. "hyper", "focus", "background")
+    and shrinks with recent volatility. Cycles pop overdue tickers in deadline order, so
+    the focused region stays fresh while the long tail is still reached once its (longer)
+    deadline passes. Superseded heap entries are skipped lazily.
+    """
+
+    def __init__(self, classify: Callable[[str], str], intervals: Dict[str, float], volatility_weight: float = 1.0):
+        self.classify = classify
+        self.intervals = intervals
+        self.volatility_weight = volatility_weight
+        self._heap: List[Tuple[float, int, str]] = []
+        self._deadlines: Dict[str, Tuple[float, int]] = {}
+        self._refreshed: Dict[str, float] = {}
+        self._classes: Dict[str, str] = {}
+        self._volatility: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self._lateness: Dict[str, float] = {}
+        self._popped: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def _push(self, ticker: str, deadline: float):
+        seq = next(self._seq)
+        self._deadlines[ticker] = (deadline, seq)
+        heapq.heappush(self._heap, (deadline, seq, ticker))
+
+    def interval(self, ticker: str) -> float:
+        """Refresh interval for the ticker's current class, shortened by its volatility (% ATR)."""
+        cls = self.classify(ticker)
+        self._classes[ticker] = cls
+        return self.intervals[cls] / (1.0 + self.volatility_weight * self._volatility.get(ticker, 0.0))
+
+    def start_cycle(self, tickers: Iterable[str]):
+        """Adds tickers new to the universe (due immediately) and resets per-cycle stats."""
+        now = time.time()
+        for ticker in tickers:
+            if ticker not in self._deadlines:
+                self._classes[ticker] = self.classify(ticker)
+                self._push(ticker, now)
+        self._lateness = {}
+        self._popped = {}
+
+    def pop_due(self, limit: int) -> List[str]:
+        """Up to `limit` overdue tickers, most overdue first."""
+        now = time.time()
+        due = []
+        while self._heap and len(due) < limit and self._heap[0][0] <= now:
+            deadline, seq, ticker = heapq.heappop(self._heap)
+            if self._deadlines.get(ticker) != (deadline, seq):
+                continue
+            del self._deadlines[ticker]
+            cls = self._classes[ticker]
+            self._lateness[cls] = max(self._lateness.get(cls, 0.0), now - deadline)
+            self._popped[cls] = self._popped.get(cls, 0) + 1
+            due.append(ticker)
+        return due
+
+    def reschedule(self, ticker: str, volatility: Optional[float] = None):
+        """Records a refresh and schedules the next one."""
+        now = time.time()
+        if volatility is not None and volatility == volatility:
+            self._volatility[ticker] = volatility
+        self._refreshed[ticker] = now
+        self._push(ticker, now + self.interval(ticker))
+
+    def reprioritize(self):
+        """Recomputes every deadline after the focus region or engine mode changed."""
+        now = time.time()
+        self._heap = []
+        for ticker in list(self._deadlines):
+            # Never-refreshed tickers stay due now
+            refreshed = self._refreshed.get(ticker)
+            self._push(ticker, now if refreshed is None else refreshed + self.interval(ticker))
+
+    def expire(self):
+        """Makes every ticker due now (forces a full sweep on the next cycle)."""
+        now = time.time()
+        self._heap = []
+        for ticker in list(self._deadlines):
+            self._push(ticker, now)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        now = time.time()
+        classes: Dict[str, Dict[str, float]] = {
+            cls: {"tickers": 0, "overdue": 0, "max_age_seconds": 0.0, "interval_seconds": seconds,
+                  "last_cycle_refreshed": self._popped.get(cls, 0),
+                  "last_cycle_max_lateness_seconds": self._lateness.get(cls, 0.0)}
+            for cls, seconds in self.intervals.items()
+        }
+        for ticker, (deadline, _) in self._deadlines.items():
+            entry = classes.get(self._classes.get(ticker, ""))
+            if entry is None:
+                continue
+            entry["tickers"] += 1
+            entry["overdue"] += deadline <= now
+            if ticker in self._refreshed:
+                entry["max_age_seconds"] = max(entry["max_age_seconds"], now - self._refreshed[ticker])
+        return classes
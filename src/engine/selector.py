@@ -1,13 +1,19 @@
 # REBUILT - Diagnostics Added
+import os
+import time
 import pandas as pd
-from typing import Dict, List, Any, Type
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional
 from src.strategies.base import BaseStrategy
 from src.strategies.ema_strategy import EMAStrategy
 from src.strategies.bollinger_strategy import BollingerStrategy
 from src.strategies.volume_strategy import VolumeStrategy
 from src.strategies.pennystock_strategy import PennyBreakoutStrategy
-from src.engine.evaluator import StrategyEvaluator
+from src.engine.ranking import bars_since, last_bar, rank_candidates, rank_chunk, rank_frames, ranking_key, ranking_signature
+from src.engine.rank_cache import ranking_cache
+from src.data.frame_cache import frame_cache
 from src.data.historical_data import HistoricalDataManager
+from src.core.config import settings
 from src.core.logger import logger
 from src.core.state import state_cache
 
@@ -20,73 +26,196 @@ class StrategySelector:
             VolumeStrategy(),
             PennyBreakoutStrategy()
         ]
+        # Sweep each strategy's parameter grid per ticker while ranking
+        self.param_sweep = settings.engine.param_sweep
+        self._variants: Dict[tuple, BaseStrategy] = {}
+        # Everything but the data that decides a ranking (part of every ranking cache key)
+        self.signature = ranking_signature(self.strategies, self.param_sweep)
+        self.cache_hits = 0
+        self.backtests = 0
 
-    def select_best_strategies(self, tickers: List[str]):
-        """Runs backtests for all tickers and selects the best performing strategy for each."""
+    def select_best_strategies(self, tickers: List[str], workers: Optional[int] = None):
+        """
+        Runs backtests for all tickers and selects the best performing strategy for each.
+        With more than one worker (settings.engine.ranking_workers, 0 = all cores) tickers are
+        ranked in chunks across a process pool and results are applied as chunks complete.
+        Tickers whose history and strategy set match their ranking cache entry reuse it.
+        """
         logger.info(f"Starting strategy ranking for {len(tickers)} assets. PD loaded: {'pd' in globals()}")
+        if workers is None:
+            workers = settings.engine.ranking_workers or os.cpu_count() or 1
+        chunk_size = max(1, settings.engine.ranking_chunk_size)
+        hits, backtests = self.cache_hits, self.backtests
+
+        if workers > 1 and len(tickers) > chunk_size:
+            self._rank_parallel(tickers, workers, chunk_size)
+        else:
+            self._rank_serial(tickers, chunk_size)
+        logger.info(f"Strategy ranking done: {self.backtests - backtests} tickers backtested, "
+                    f"{self.cache_hits - hits} served from the ranking cache.")
+
+    def _rank_serial(self, tickers: List[str], chunk_size: int = 25):
         total = len(tickers)
-        for i, ticker in enumerate(tickers):
-            try:
-                if (i + 1) % 50 == 0:
-                    logger.info(f"Ranking Progress: {i + 1}/{total} tickers evaluated.")
-
-                best_strategy = None
-                best_score = -float('inf')
-                
-                # Use 1h timeframe for selection by default
-                df = self.data_manager.get_historical_data(ticker, "1h")
+        for start in range(0, total, chunk_size):
+            frames = {}
+            for ticker in tickers[start:start + chunk_size]:
+                try:
+                    # Use 1h timeframe for selection by default
+                    df = self.data_manager.get_historical_data(ticker, "1h")
+                except Exception as e:
+                    logger.error(f"Error ranking {ticker}: {e}")
+                    df = None
                 if df is None or df.empty or 'Close' not in df.columns:
                     if df is not None and not df.empty:
                         logger.warning(f"Skipping {ticker} - Missing 'Close' column in historical data.")
                     # Update progress metrics even if skipped
                     state_cache.increment_processed()
                     continue
-                    
-                for strategy in self.strategies:
-                    # ENFORCE CONSTRAINT: Penny Breakout is ONLY for stocks < $5.00
-                    last_row = df.iloc[-1]
-                    
-                    # Robustly extract price as a single float
-                    if isinstance(last_row, pd.Series):
-                        # If multiple columns named 'Close', last_row['Close'] might be a Series
-                        price_val = last_row['Close']
-                        if hasattr(price_val, 'iloc'):
-                            current_price = float(price_val.iloc[0])
-                        else:
-                            current_price = float(price_val)
-                    else:
-                        # Fallback for unexpected shapes
-                        current_price = float(last_row['Close'])
-                    
-                    if strategy.name == "Penny Breakout" and current_price >= 5.0:
-                        continue
-                    
-                    # ENFORCE CONSTRAINT: Other strategies are for stocks >= $1.00 (optional but good for stability)
-                    if strategy.name != "Penny Breakout" and current_price < 1.0:
-                        continue
+                frames[ticker] = df
 
-                    evaluator = StrategyEvaluator(strategy)
-                    metrics = evaluator.evaluate(df)
-                    
-                    if "error" not in metrics:
-                        score = metrics.get("score", 0)
-                        if score > best_score:
-                            best_score = score
-                            best_strategy = strategy.name
-                
-                if best_strategy:
-                    logger.debug(f"Best strategy for {ticker}: {best_strategy} (Score: {best_score:.4f})")
-                    state_cache.update_strategy(ticker, best_strategy)
-                
-                # Update progress metrics
-                state_cache.increment_processed()
+            self._rank_frames(frames)
+            done = min(start + chunk_size, total)
+            logger.info(f"Ranking Progress: {done}/{total} tickers evaluated.")
+
+    def _rank_frames(self, frames: Dict[str, pd.DataFrame], progress: bool = True):
+        """Ranks loaded 1h frames, backtesting only those whose ranking cache key changed."""
+        keys = {ticker: ranking_key(df, self.signature) for ticker, df in frames.items()}
+        ranked = {}
+        stale = {}
+        for ticker, df in frames.items():
+            cached = ranking_cache.get(ticker, keys[ticker])
+            if cached is None:
+                stale[ticker] = df
+            else:
+                ranked[ticker] = cached
+        self.cache_hits += len(ranked)
+
+        fresh = {}
+        if stale:
+            try:
+                fresh = rank_frames(stale, self.strategies, self.param_sweep)
             except Exception as e:
-                logger.error(f"Error ranking {ticker}: {e}")
-                state_cache.increment_processed()
+                logger.error(f"Batch ranking failed, ranking tickers individually: {e}")
+                for ticker, df in stale.items():
+                    try:
+                        fresh[ticker] = rank_candidates(df, self.strategies, self.param_sweep)
+                    except Exception as e:
+                        logger.error(f"Error ranking {ticker}: {e}")
+                        if progress:
+                            state_cache.increment_processed()
+            self.backtests += len(fresh)
+            ranking_cache.put_many({t: (keys[t], last_bar(frames[t]), r) for t, r in fresh.items()})
+        ranked.update(fresh)
+
+        for ticker, (best_strategy, best_score, best_params) in ranked.items():
+            self._apply_ranking(ticker, best_strategy, best_score, best_params, progress)
+
+    def _rank_parallel(self, tickers: List[str], workers: int, chunk_size: int):
+        total = len(tickers)
+        chunks = [tickers[i:i + chunk_size] for i in range(0, total, chunk_size)]
+        workers = min(workers, len(chunks))
+        logger.info(f"Ranking {total} assets in {len(chunks)} chunks across {workers} processes.")
+
+        done = 0
+        pending = set(tickers)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Workers skip the backtest of tickers whose content key still matches the cached one
+                futures = {
+                    pool.submit(rank_chunk, chunk, self.strategies, self.param_sweep, ranking_cache.keys(chunk)): chunk
+                    for chunk in chunks
+                }
+                for future in as_completed(futures):
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        logger.error(f"Ranking chunk failed in worker, retrying serially: {e}")
+                        continue
+
+                    fresh = {}
+                    for ticker, best_strategy, best_score, best_params, status, fingerprint in results:
+                        if status == "cached":
+                            cached = ranking_cache.get(ticker, fingerprint[0])
+                            if cached is None:
+                                continue
+                            best_strategy, best_score, best_params = cached
+                            self.cache_hits += 1
+                        elif status == "ok":
+                            fresh[ticker] = (fingerprint[0], fingerprint[1], (best_strategy, best_score, best_params))
+                        elif status == "missing":
+                            continue
+                        elif status != "skipped":
+                            logger.error(f"Error ranking {ticker}: {status}")
+                        self._apply_ranking(ticker, best_strategy, best_score, best_params)
+                        pending.discard(ticker)
+                    self.backtests += len(fresh)
+                    ranking_cache.put_many(fresh)
+                    done += len(futures[future])
+                    logger.info(f"Ranking Progress: {done}/{total} tickers evaluated.")
+        except Exception as e:
+            # Pool could not start (e.g. restricted sandbox); rank whatever is left in-process
+            logger.error(f"Process pool ranking unavailable ({e}); falling back to serial ranking.")
+
+        # Tickers missing from the store (or from failed chunks) go through the data manager
+        leftover = [t for t in tickers if t in pending]
+        if leftover:
+            self._rank_serial(leftover, chunk_size)
+
+    def _apply_ranking(self, ticker: str, best_strategy: Optional[str], best_score: float,
+                       best_params: Optional[Dict[str, Any]] = None, progress: bool = True):
+        if best_strategy:
+            logger.debug(f"Best strategy for {ticker}: {best_strategy} {best_params or ''} (Score: {best_score:.4f})")
+            state_cache.update_strategy(ticker, best_strategy, best_params)
+
+        # Update progress metrics
+        if progress:
+            state_cache.increment_processed()
+
+    def due_for_rerank(self, tickers: List[str], min_bars: int) -> List[str]:
+        """
+        Tickers whose cached 1h history has at least `min_bars` bars past the one their
+        ranking was computed on, most advanced first. Tickers not in the frame cache wait.
+        """
+        due = []
+        for ticker in tickers:
+            df = frame_cache.get((ticker, "1h"))
+            if df is None or df.empty:
                 continue
+            advanced = bars_since(df, ranking_cache.last_bar(ticker))
+            if advanced >= min_bars:
+                due.append((advanced, ticker))
+        due.sort(key=lambda item: -item[0])
+        return [ticker for _, ticker in due]
 
-    def get_strategy_instance(self, strategy_name: str) -> BaseStrategy:
+    def rerank(self, tickers: List[str]) -> float:
+        """
+        Re-ranks `tickers` in-process from their cached 1h frames (no provider refresh).
+        Returns the CPU seconds this thread spent, for the caller's CPU budget.
+        """
+        began = time.thread_time()
+        frames = {}
+        for ticker in tickers:
+            df = frame_cache.get((ticker, "1h"))
+            if df is not None and not df.empty and 'Close' in df.columns:
+                frames[ticker] = df
+        self._rank_frames(frames, progress=False)
+        return time.thread_time() - began
+
+    def get_strategy_instance(self, strategy_name: str, params: Optional[Dict[str, Any]] = None) -> BaseStrategy:
+        """
+        Strategy by name, configured with the ticker's swept parameters when given.
+        Parameterized instances are cached so their streaming state survives between cycles.
+        """
+        strategy = self.strategies[0] # Default
         for s in self.strategies:
             if s.name == strategy_name:
-                return s
-        return self.strategies[0] # Default
+                strategy = s
+                break
+        params = {k: v for k, v in (params or {}).items() if k in strategy.param_grid}
+        if not params or params == strategy.params():
+            return strategy
+
+        key = (strategy.name, tuple(sorted(params.items())))
+        if key not in self._variants:
+            self._variants[key] = strategy.with_params(**params)
+        return self._variants[key]
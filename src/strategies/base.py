@@ -1,16 +1,30 @@
 from abc import ABC, abstractmethod
+import itertools
+import numpy as np
 import pandas as pd
-import pandas_ta_classic as ta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from src.strategies.streaming import BarStream, StreamingIndicator
 
 class Signal(ABC):
     BULLISH = "bullish"
     BEARISH = "bearish"
     NEUTRAL = "neutral"
 
+# Integer encoding of signals used by the vectorized panel path
+SIGNAL_CODES = {1: Signal.BULLISH, -1: Signal.BEARISH, 0: Signal.NEUTRAL}
+
 class BaseStrategy(ABC):
+    # Minimum number of bars before get_current_signal produces a real signal
+    min_bars: int = 1
+    # Candidate values per constructor argument, swept per ticker during ranking
+    param_grid: Dict[str, List[Any]] = {}
+    # Bump when the signal logic changes so cached rankings of this strategy are recomputed
+    version: int = 1
+
     def __init__(self, name: str):
         self.name = name
+        # Resumable per-ticker indicator state for get_current_signal
+        self._streams: Dict[str, BarStream] = {}
 
     @abstractmethod
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -21,10 +35,11 @@ class BaseStrategy(ABC):
         """
         pass
 
-    @abstractmethod
-    def get_current_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN") -> Dict[str, Any]:
+    def get_current_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN", live_price: Optional[float] = None) -> Dict[str, Any]:
         """
         Calculates the current signal for the most recent data point.
+        Backed by the ticker's streaming state, so only bars newer than the last call are
+        folded in; `live_price` reprices the forming bar without committing it.
         Returns: {
             'ticker': str,
             'strategy': str,
@@ -35,9 +50,140 @@ class BaseStrategy(ABC):
             'metadata': dict
         }
         """
-        pass
+        if df.empty or len(df) < self.min_bars:
+            return self.insufficient_signal(ticker)
+
+        stream = self.update_stream(ticker, df)
+        row = self.stream_row(stream.snapshot(live_price))
+        return self.format_panel_signal(ticker, row, stream.tail_timestamp)
+
+    def get_reference_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN") -> Dict[str, Any]:
+        """Batch reference for get_current_signal: last row of generate_signals over the full history."""
+        raise NotImplementedError(f"{self.name} has no reference implementation")
+
+    def stream_indicators(self) -> Dict[str, StreamingIndicator]:
+        """Fresh streaming indicators backing one ticker's BarStream."""
+        raise NotImplementedError(f"{self.name} has no streaming implementation")
+
+    def stream_row(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Signal row (same keys as compute_panel) from a BarStream snapshot."""
+        raise NotImplementedError(f"{self.name} has no streaming implementation")
+
+    def update_stream(self, ticker: str, df: pd.DataFrame) -> BarStream:
+        """
+        Brings the ticker's stream up to date with `df`, resuming from the stream's last bar
+        when it is still present in the frame and reseeding from the full history otherwise.
+        """
+        stream = self._streams.get(ticker) if ticker != "UNKNOWN" else None
+        start = 0
+        if stream is not None:
+            pos = df.index.searchsorted(stream.tail_timestamp)
+            if pos < len(df) and df.index[pos] == stream.tail_timestamp:
+                start = int(pos)
+            else:
+                stream = None
+
+        if stream is None:
+            stream = BarStream(self.stream_indicators())
+
+        fields = [f for f in ("Open", "High", "Low", "Close", "Volume") if f in df.columns]
+        tail = df.iloc[start:]
+        columns = {}
+        for f in fields:
+            col = tail[f]
+            if isinstance(col, pd.DataFrame):
+                col = col.iloc[:, 0]
+            columns[f] = col.to_numpy(dtype=np.float64, na_value=np.nan)
+
+        for i, timestamp in enumerate(tail.index):
+            stream.push(timestamp, {f: float(columns[f][i]) for f in fields})
+
+        if ticker != "UNKNOWN":
+            self._streams[ticker] = stream
+        return stream
+
+    def has_stream(self, ticker: str) -> bool:
+        return ticker in self._streams
+
+    def reset_stream(self, ticker: str):
+        self._streams.pop(ticker, None)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Streams are per-process caches; don't ship them to ranking workers
+        state = self.__dict__.copy()
+        state['_streams'] = {}
+        return state
 
     def calculate_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Utility to calculate common indicators on a dataframe."""
         # This will be overridden or called by subclasses
         return df.copy()
+
+    def compute_panel(self, panel) -> Dict[str, np.ndarray]:
+        """
+        Vectorized counterpart of generate_signals over an IndicatorPanel.
+        Returns (bars x tickers) arrays: 'signal' (SIGNAL_CODES), 'confidence' and any
+        indicator columns needed by format_panel_signal.
+        """
+        raise NotImplementedError(f"{self.name} has no panel implementation")
+
+    def format_panel_signal(self, ticker: str, row: Dict[str, float], timestamp) -> Dict[str, Any]:
+        """Builds the get_current_signal dict from one ticker's latest panel row."""
+        raise NotImplementedError(f"{self.name} has no panel implementation")
+
+    def insufficient_signal(self, ticker: str) -> Dict[str, Any]:
+        return {
+            'ticker': ticker,
+            'strategy': self.name,
+            'signal': Signal.NEUTRAL,
+            'confidence': 0.0,
+            'metadata': {'error': 'Insufficient data'}
+        }
+
+    def params(self) -> Dict[str, Any]:
+        """Current values of the sweepable constructor arguments."""
+        return {name: getattr(self, name) for name in self.param_grid}
+
+    def with_params(self, **params) -> "BaseStrategy":
+        """New instance of this strategy with some constructor arguments replaced."""
+        return type(self)(**{**self.params(), **params})
+
+    def valid_params(self, params: Dict[str, Any]) -> bool:
+        """Hook for rejecting meaningless grid points (e.g. fast >= slow)."""
+        return True
+
+    def grid(self) -> List[Dict[str, Any]]:
+        """Every valid parameter set of param_grid, current parameters first."""
+        names = list(self.param_grid)
+        combos = [self.params()] + [dict(zip(names, values)) for values in itertools.product(*self.param_grid.values())]
+        grid: List[Dict[str, Any]] = []
+        for params in combos:
+            if params not in grid and self.valid_params(params):
+                grid.append(params)
+        return grid
+
+    def compute_grid(self, panel, grid: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        (bars x tickers x len(grid)) signal codes for every parameter set. Panel indicators
+        are memoised by length, so grid points sharing an EMA or SMA compute it once.
+        """
+        return np.stack([self.with_params(**params).compute_panel(panel)['signal'] for params in grid], axis=-1)
+
+    def get_panel_signals(self, panel, tickers: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Current signal for every requested ticker in the panel, from one batched computation."""
+        tickers = panel.tickers if tickers is None else [t for t in tickers if t in panel.positions]
+        if not tickers:
+            return {}
+
+        columns = self.compute_panel(panel)
+        latest = {name: panel.last(values) for name, values in columns.items()}
+
+        signals = {}
+        for ticker in tickers:
+            j = panel.positions[ticker]
+            if panel.lengths[j] < self.min_bars:
+                signals[ticker] = self.insufficient_signal(ticker)
+                continue
+            row = {name: values[j] for name, values in latest.items()}
+            signals[ticker] = self.format_panel_signal(ticker, row, panel.timestamps[j])
+        return signals
@@ -1,16 +1,22 @@
+import numpy as np
 import pandas as pd
-import pandas_ta_classic as ta
 from typing import Dict, Any
-from src.strategies.base import BaseStrategy, Signal
+from src.strategies.base import BaseStrategy, Signal, SIGNAL_CODES
+from src.strategies.streaming import StreamingIndicator, RollingWindow
 from src.core.logger import logger
 
 class BollingerStrategy(BaseStrategy):
+    param_grid = {'length': [20, 30], 'std_dev': [1.5, 2, 2.5]}
+
     def __init__(self, length: int = 20, std_dev: int = 2):
         super().__init__(name="Bollinger_Bands_Reversion")
         self.length = length
         self.std_dev = std_dev
+        self.min_bars = length
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Only the per-ticker reference path uses pandas-ta; keep it off the import path
+        import pandas_ta_classic as ta
         df = df.copy()
         
         # Squeeze to handle potential MultiIndex
@@ -54,7 +60,7 @@ class BollingerStrategy(BaseStrategy):
         
         return df
 
-    def get_current_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN") -> Dict[str, Any]:
+    def get_reference_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN") -> Dict[str, Any]:
         if df.empty or len(df) < self.length:
             return {
                 'ticker': ticker,
@@ -83,3 +89,66 @@ class BollingerStrategy(BaseStrategy):
                 'percent_b': float((last_row['Close'] - last_row[lower_col]) / (last_row[upper_col] - last_row[lower_col]))
             }
         }
+
+    def _classify(self, close, low_band, up_band) -> Dict[str, Any]:
+        """Signal rules of generate_signals on arrays (panel) or scalars (stream)."""
+        bullish_mask = close < low_band
+        bearish_mask = close > up_band
+
+        signal = np.where(bearish_mask, -1, np.where(bullish_mask, 1, 0)).astype(np.int8)
+        band_width = up_band - low_band
+        with np.errstate(divide="ignore", invalid="ignore"):
+            confidence = np.where(
+                bearish_mask, (close - up_band) / band_width,
+                np.where(bullish_mask, (low_band - close) / band_width, 0.0)
+            )
+
+        return {
+            'signal': signal,
+            'confidence': np.clip(confidence, 0, 1.0),
+            'close': close,
+            'lower_band': low_band,
+            'upper_band': up_band
+        }
+
+    def compute_panel(self, panel) -> Dict[str, np.ndarray]:
+        low_band, _, up_band = panel.bbands(self.length, float(self.std_dev))
+        return self._classify(panel.close, low_band, up_band)
+
+    def compute_grid(self, panel, grid) -> np.ndarray:
+        # One SMA/std per length; band multipliers broadcast over the shared arrays
+        out = np.zeros((panel.bars, len(panel), len(grid)), dtype=np.int8)
+        close = panel.close[..., None]
+        for length in dict.fromkeys(p['length'] for p in grid):
+            idx = [i for i, p in enumerate(grid) if p['length'] == length]
+            k = np.array([float(grid[i]['std_dev']) for i in idx])
+            mid = panel.sma("Close", length)[..., None]
+            with np.errstate(invalid="ignore"):
+                dev = k * panel.std("Close", length)[..., None]
+                out[..., idx] = np.where(close > mid + dev, -1, np.where(close < mid - dev, 1, 0))
+        return out
+
+    def stream_indicators(self) -> Dict[str, StreamingIndicator]:
+        return {'bands': RollingWindow(self.length)}
+
+    def stream_row(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        bands = state['bands']
+        mid, dev = bands.value, self.std_dev * bands.std
+        return self._classify(state['bar']['Close'], mid - dev, mid + dev)
+
+    def format_panel_signal(self, ticker: str, row: Dict[str, float], timestamp) -> Dict[str, Any]:
+        lower, upper, close = float(row['lower_band']), float(row['upper_band']), float(row['close'])
+        band_width = upper - lower
+        return {
+            'ticker': ticker,
+            'strategy': self.name,
+            'signal': SIGNAL_CODES[int(row['signal'])],
+            'confidence': float(row['confidence']),
+            'price': close,
+            'timestamp': timestamp,
+            'metadata': {
+                'lower_band': lower,
+                'upper_band': upper,
+                'percent_b': (close - lower) / band_width if band_width != 0 else float('nan')
+            }
+        }
@@ -1,17 +1,26 @@
+import numpy as np
 import pandas as pd
-import pandas_ta_classic as ta
 from typing import Dict, Any
-from src.strategies.base import BaseStrategy, Signal
+from src.strategies.base import BaseStrategy, Signal, SIGNAL_CODES
+from src.strategies.streaming import StreamingIndicator, StreamingEMA, StreamingRSI
 from src.core.logger import logger
 
 class EMAStrategy(BaseStrategy):
+    param_grid = {'fast_ema': [8, 12, 16], 'slow_ema': [21, 26, 34], 'rsi_period': [14]}
+
     def __init__(self, fast_ema: int = 12, slow_ema: int = 26, rsi_period: int = 14):
         super().__init__(name="EMA_Crossover_RSI")
         self.fast_ema = fast_ema
         self.slow_ema = slow_ema
         self.rsi_period = rsi_period
+        self.min_bars = slow_ema
+
+    def valid_params(self, params: Dict[str, Any]) -> bool:
+        return params['fast_ema'] < params['slow_ema']
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Only the per-ticker reference path uses pandas-ta; keep it off the import path
+        import pandas_ta_classic as ta
         df = df.copy()
         
         # Squeeze to handle potential MultiIndex
@@ -44,7 +53,7 @@ class EMAStrategy(BaseStrategy):
         
         return df
 
-    def get_current_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN") -> Dict[str, Any]:
+    def get_reference_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN") -> Dict[str, Any]:
         if df.empty or len(df) < self.slow_ema:
             return {
                 'ticker': ticker,
@@ -70,3 +79,52 @@ class EMAStrategy(BaseStrategy):
                 'rsi': float(last_row['RSI'])
             }
         }
+
+    def _classify(self, close, fast, slow, rsi) -> Dict[str, Any]:
+        """Signal rules of generate_signals on arrays (panel) or scalars (stream)."""
+        bullish_mask = (fast > slow) & (rsi > 50)
+        bearish_mask = (fast < slow) & (rsi < 40)
+
+        signal = np.where(bearish_mask, -1, np.where(bullish_mask, 1, 0)).astype(np.int8)
+        confidence = np.where(bearish_mask, (50 - rsi) / 40, np.where(bullish_mask, (rsi - 50) / 40, 0.0))
+
+        return {
+            'signal': signal,
+            'confidence': np.clip(confidence, 0, 1.0),
+            'close': close,
+            'fast_ema': fast,
+            'slow_ema': slow,
+            'rsi': rsi
+        }
+
+    def compute_panel(self, panel) -> Dict[str, np.ndarray]:
+        return self._classify(panel.close, panel.ema(self.fast_ema), panel.ema(self.slow_ema), panel.rsi(self.rsi_period))
+
+    def compute_grid(self, panel, grid) -> np.ndarray:
+        panel.warm_emas([n for p in grid for n in (p['fast_ema'], p['slow_ema'])])
+        return super().compute_grid(panel, grid)
+
+    def stream_indicators(self) -> Dict[str, StreamingIndicator]:
+        return {
+            'fast_ema': StreamingEMA(self.fast_ema),
+            'slow_ema': StreamingEMA(self.slow_ema),
+            'rsi': StreamingRSI(self.rsi_period)
+        }
+
+    def stream_row(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return self._classify(state['bar']['Close'], state['fast_ema'].value, state['slow_ema'].value, state['rsi'].value)
+
+    def format_panel_signal(self, ticker: str, row: Dict[str, float], timestamp) -> Dict[str, Any]:
+        return {
+            'ticker': ticker,
+            'strategy': self.name,
+            'signal': SIGNAL_CODES[int(row['signal'])],
+            'confidence': float(row['confidence']),
+            'price': float(row['close']),
+            'timestamp': timestamp,
+            'metadata': {
+                'fast_ema': float(row['fast_ema']),
+                'slow_ema': float(row['slow_ema']),
+                'rsi': float(row['rsi'])
+            }
+        }
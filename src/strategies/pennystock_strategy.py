@@ -1,8 +1,8 @@
 import pandas as pd
 import numpy as np
-import pandas_ta_classic as ta
 from typing import Dict, Any, List
-from .base import BaseStrategy, Signal
+from .base import BaseStrategy, Signal, SIGNAL_CODES
+from .streaming import StreamingIndicator, StreamingATR, StreamingRSI, RollingWindow
 from datetime import datetime
 
 class PennyBreakoutStrategy(BaseStrategy):
@@ -10,10 +10,14 @@ class PennyBreakoutStrategy(BaseStrategy):
     Specially tuned strategy for penny stocks ($0.05 - $5.00).
     Focuses on extreme volume surges (>300% avg) and volatility breakouts.
     """
+    min_bars = 20
+
     def __init__(self):
         super().__init__("Penny Breakout")
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Only the per-ticker reference path uses pandas-ta; keep it off the import path
+        import pandas_ta_classic as ta
         df = df.copy()
         if len(df) < 20: 
             df['signal'] = Signal.NEUTRAL
@@ -61,7 +65,7 @@ class PennyBreakoutStrategy(BaseStrategy):
         
         return df
 
-    def get_current_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN") -> Dict[str, Any]:
+    def get_reference_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN") -> Dict[str, Any]:
         df_signaled = self.generate_signals(df)
         last_row = df_signaled.iloc[-1]
         
@@ -78,3 +82,58 @@ class PennyBreakoutStrategy(BaseStrategy):
                 'volatility': f"{last_row['volatility_ratio']:.2%}"
             }
         }
+
+    def _classify(self, close, volume, vol_ma, atr, rsi, ma20) -> Dict[str, Any]:
+        """Signal rules of generate_signals on arrays (panel) or scalars (stream)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vol_surge = volume / vol_ma
+            volatility_ratio = atr / close
+
+        bull_mask = (vol_surge > 2.5) & (close > ma20) & (rsi < 80)
+        bear_mask = (vol_surge > 2.5) & (close < ma20) & (rsi > 20)
+        signal = np.where(bear_mask, -1, np.where(bull_mask, 1, 0)).astype(np.int8)
+
+        return {
+            'signal': signal,
+            'confidence': np.clip(vol_surge / 10.0, 0.1, 0.95),
+            'close': close,
+            'vol_surge': vol_surge,
+            'rsi': rsi,
+            'volatility_ratio': volatility_ratio
+        }
+
+    def compute_panel(self, panel) -> Dict[str, np.ndarray]:
+        return self._classify(
+            panel.close, panel.volume, panel.sma("Volume", 20),
+            panel.atr(14), panel.rsi(14), panel.sma("Close", 20)
+        )
+
+    def stream_indicators(self) -> Dict[str, StreamingIndicator]:
+        return {
+            'vol_ma': RollingWindow(20, field="Volume"),
+            'atr': StreamingATR(14),
+            'rsi': StreamingRSI(14),
+            'ma20': RollingWindow(20)
+        }
+
+    def stream_row(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        bar = state['bar']
+        return self._classify(
+            bar['Close'], bar['Volume'], state['vol_ma'].value,
+            state['atr'].value, state['rsi'].value, state['ma20'].value
+        )
+
+    def format_panel_signal(self, ticker: str, row: Dict[str, float], timestamp) -> Dict[str, Any]:
+        return {
+            'ticker': ticker,
+            'strategy': self.name,
+            'signal': SIGNAL_CODES[int(row['signal'])],
+            'confidence': float(row['confidence']),
+            'price': float(row['close']),
+            'timestamp': timestamp,
+            'metadata': {
+                'volume_surge': f"{row['vol_surge']:.2f}x",
+                'rsi': f"{row['rsi']:.1f}",
+                'volatility': f"{row['volatility_ratio']:.2%}"
+            }
+        }
@@ -0,0 +1,202 @@
+import copy
+import math
+from collections import deque
+from typing import Any, Dict, Optional
+
+NAN = float('nan')
+
+
+class StreamingIndicator:
+    """Resumable indicator fed one bar at a time. `value` is NaN until warmed up."""
+    field = "Close"
+
+    def __init__(self):
+        self.value = NAN
+
+    def update(self, bar: Dict[str, float]) -> float:
+        raise NotImplementedError
+
+    def copy(self) -> "StreamingIndicator":
+        return copy.copy(self)
+
+
+class StreamingEMA(StreamingIndicator):
+    """Exponential average seeded with the SMA of the first `length` values (pandas_ta `ema`/`rma`)."""
+
+    def __init__(self, length: int, alpha: Optional[float] = None, field: str = "Close"):
+        super().__init__()
+        self.length = length
+        self.alpha = alpha if alpha is not None else 2.0 / (length + 1)
+        self.field = field
+        self.count = 0
+        self.seed_sum = 0.0
+
+    def push(self, x: float) -> float:
+        if math.isnan(x):
+            return self.value
+        if self.count < self.length:
+            self.count += 1
+            self.seed_sum += x
+            if self.count == self.length:
+                self.value = self.seed_sum / self.length
+        else:
+            self.value = (1.0 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+    def update(self, bar: Dict[str, float]) -> float:
+        return self.push(bar[self.field])
+
+
+class StreamingRSI(StreamingIndicator):
+    """Wilder RSI from running averages of gains and losses."""
+
+    def __init__(self, length: int = 14):
+        super().__init__()
+        self.length = length
+        self.prev_close = NAN
+        self.gains = StreamingEMA(length, alpha=1.0 / length)
+        self.losses = StreamingEMA(length, alpha=1.0 / length)
+
+    def update(self, bar: Dict[str, float]) -> float:
+        close = bar["Close"]
+        if not math.isnan(self.prev_close) and not math.isnan(close):
+            diff = close - self.prev_close
+            gain = self.gains.push(max(diff, 0.0))
+            loss = abs(self.losses.push(min(diff, 0.0)))
+            total = gain + loss
+            self.value = 100.0 * gain / total if total != 0 else NAN
+        if not math.isnan(close):
+            self.prev_close = close
+        return self.value
+
+    def copy(self) -> "StreamingRSI":
+        clone = copy.copy(self)
+        clone.gains = self.gains.copy()
+        clone.losses = self.losses.copy()
+        return clone
+
+
+class RollingWindow(StreamingIndicator):
+    """Fixed-length window with O(1) mean and population standard deviation (sliding Welford)."""
+
+    def __init__(self, length: int, field: str = "Close"):
+        super().__init__()
+        self.length = length
+        self.field = field
+        self.window: deque = deque(maxlen=length)
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, bar: Dict[str, float]) -> float:
+        x = bar[self.field]
+        if math.isnan(x):
+            return self.value
+        if len(self.window) == self.length:
+            old = self.window[0]
+            new_mean = self.mean + (x - old) / self.length
+            self.m2 += (x - old) * (x - new_mean + old - self.mean)
+            self.mean = new_mean
+        else:
+            delta = x - self.mean
+            self.mean += delta / (len(self.window) + 1)
+            self.m2 += delta * (x - self.mean)
+        self.window.append(x)
+        self.value = self.mean if len(self.window) == self.length else NAN
+        return self.value
+
+    @property
+    def std(self) -> float:
+        if len(self.window) < self.length:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / self.length)
+
+    def copy(self) -> "RollingWindow":
+        clone = copy.copy(self)
+        clone.window = self.window.copy()
+        return clone
+
+
+class PercentChange(StreamingIndicator):
+    """Close-to-close percentage change."""
+
+    def __init__(self):
+        super().__init__()
+        self.prev_close = NAN
+
+    def update(self, bar: Dict[str, float]) -> float:
+        close = bar["Close"]
+        if math.isnan(close):
+            return self.value
+        self.value = close / self.prev_close - 1.0 if self.prev_close else NAN
+        self.prev_close = close
+        return self.value
+
+
+class StreamingATR(StreamingIndicator):
+    """Wilder ATR accumulator over pandas_ta style true range."""
+
+    def __init__(self, length: int = 14):
+        super().__init__()
+        self.length = length
+        self.prev_close = NAN
+        self.average = StreamingEMA(length, alpha=1.0 / length)
+
+    def update(self, bar: Dict[str, float]) -> float:
+        high, low, close = bar["High"], bar["Low"], bar["Close"]
+        if not math.isnan(self.prev_close):
+            hl = high - low
+            if hl == 0:
+                hl = 2.220446049250313e-16
+            tr = max(abs(hl), abs(high - self.prev_close), abs(self.prev_close - low))
+            self.value = self.average.push(tr)
+        self.prev_close = close
+        return self.value
+
+    def copy(self) -> "StreamingATR":
+        clone = copy.copy(self)
+        clone.average = self.average.copy()
+        return clone
+
+
+class BarStream:
+    """
+    Per-ticker streaming state for one strategy.
+
+    Completed bars are folded into the indicators; the most recent bar is held back as a
+    provisional tail because the provider keeps revising it until it closes. Reading the
+    state copies the indicators and applies the tail (optionally overridden by a live
+    price), so both appending a bar and pricing a tick cost O(1) in the history length.
+    """
+
+    def __init__(self, indicators: Dict[str, StreamingIndicator]):
+        self.indicators = indicators
+        self.tail: Optional[Dict[str, float]] = None
+        self.tail_timestamp = None
+        self.count = 0
+
+    def push(self, timestamp, bar: Dict[str, float]):
+        """Appends a bar, or replaces the provisional tail if it carries the same timestamp."""
+        if self.tail is not None and timestamp == self.tail_timestamp:
+            self.tail = bar
+            return
+        if self.tail is not None:
+            for indicator in self.indicators.values():
+                indicator.update(self.tail)
+        self.tail = bar
+        self.tail_timestamp = timestamp
+        self.count += 1
+
+    def snapshot(self, live_price: Optional[float] = None) -> Dict[str, Any]:
+        """Indicator state including the provisional tail bar."""
+        bar = dict(self.tail) if self.tail is not None else {}
+        if bar and live_price is not None:
+            bar["Close"] = live_price
+            bar["High"] = max(bar["High"], live_price)
+            bar["Low"] = min(bar["Low"], live_price)
+
+        state = {name: indicator.copy() for name, indicator in self.indicators.items()}
+        if bar:
+            for indicator in state.values():
+                indicator.update(bar)
+        state["bar"] = bar
+        return state
@@ -1,14 +1,18 @@
+import numpy as np
 import pandas as pd
-import pandas_ta_classic as ta
 from typing import Dict, Any
-from src.strategies.base import BaseStrategy, Signal
+from src.strategies.base import BaseStrategy, Signal, SIGNAL_CODES
+from src.strategies.streaming import StreamingIndicator, RollingWindow, PercentChange
 from src.core.logger import logger
 
 class VolumeStrategy(BaseStrategy):
+    param_grid = {'volume_ma': [10, 20, 30], 'spike_threshold': [1.5, 2.0, 3.0]}
+
     def __init__(self, volume_ma: int = 20, spike_threshold: float = 2.0):
         super().__init__(name="Volume_Spike_Confirmation")
         self.volume_ma = volume_ma
         self.spike_threshold = spike_threshold # Volume must be 2x average
+        self.min_bars = volume_ma
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         df = df.copy()
@@ -46,7 +50,7 @@ class VolumeStrategy(BaseStrategy):
         
         return df
 
-    def get_current_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN") -> Dict[str, Any]:
+    def get_reference_signal(self, df: pd.DataFrame, ticker: str = "UNKNOWN") -> Dict[str, Any]:
         if df.empty or len(df) < self.volume_ma:
             return {
                 'ticker': ticker,
@@ -72,3 +76,64 @@ class VolumeStrategy(BaseStrategy):
                 'volume_ratio': float(last_row['Volume'] / last_row['Vol_SMA']) if last_row['Vol_SMA'] > 0 else 0
             }
         }
+
+    def _classify(self, close, vol, ma, price_change) -> Dict[str, Any]:
+        """Signal rules of generate_signals on arrays (panel) or scalars (stream)."""
+        volume_spike = vol > (ma * self.spike_threshold)
+        bullish_mask = volume_spike & (price_change > 0)
+        bearish_mask = volume_spike & (price_change < 0)
+
+        signal = np.where(bearish_mask, -1, np.where(bullish_mask, 1, 0)).astype(np.int8)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vol_ratio = vol / ma
+        confidence = np.where(volume_spike, np.clip(vol_ratio / (self.spike_threshold * 2), 0, 1.0), 0.0)
+
+        return {
+            'signal': signal,
+            'confidence': confidence,
+            'close': close,
+            'volume': vol,
+            'avg_volume': ma
+        }
+
+    def compute_panel(self, panel) -> Dict[str, np.ndarray]:
+        return self._classify(panel.close, panel.volume, panel.sma("Volume", self.volume_ma), panel.pct_change())
+
+    def compute_grid(self, panel, grid) -> np.ndarray:
+        # One volume SMA per window; spike thresholds broadcast over it
+        out = np.zeros((panel.bars, len(panel), len(grid)), dtype=np.int8)
+        vol = panel.volume[..., None]
+        price_change = panel.pct_change()[..., None]
+        for volume_ma in dict.fromkeys(p['volume_ma'] for p in grid):
+            idx = [i for i, p in enumerate(grid) if p['volume_ma'] == volume_ma]
+            thresholds = np.array([grid[i]['spike_threshold'] for i in idx], dtype=np.float64)
+            with np.errstate(invalid="ignore"):
+                volume_spike = vol > (panel.sma("Volume", volume_ma)[..., None] * thresholds)
+                out[..., idx] = np.where(volume_spike & (price_change < 0), -1, np.where(volume_spike & (price_change > 0), 1, 0))
+        return out
+
+    def stream_indicators(self) -> Dict[str, StreamingIndicator]:
+        return {
+            'vol_sma': RollingWindow(self.volume_ma, field="Volume"),
+            'price_change': PercentChange()
+        }
+
+    def stream_row(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        bar = state['bar']
+        return self._classify(bar['Close'], bar['Volume'], state['vol_sma'].value, state['price_change'].value)
+
+    def format_panel_signal(self, ticker: str, row: Dict[str, float], timestamp) -> Dict[str, Any]:
+        volume, avg_volume = float(row['volume']), float(row['avg_volume'])
+        return {
+            'ticker': ticker,
+            'strategy': self.name,
+            'signal': SIGNAL_CODES[int(row['signal'])],
+            'confidence': float(row['confidence']),
+            'price': float(row['close']),
+            'timestamp': timestamp,
+            'metadata': {
+                'volume': volume,
+                'avg_volume': avg_volume,
+                'volume_ratio': volume / avg_volume if avg_volume > 0 else 0
+            }
+        }
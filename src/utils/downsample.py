@@ -0,0 +1,43 @@
+import numpy as np
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Positions of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last point and, from each of `threshold - 2` equal buckets in
+    between, the point forming the largest triangle with the previously kept point and
+    the average of the next bucket, so peaks and troughs survive. Returns every position
+    when there are no more than `threshold` points. NaN values in `y` are never picked.
+    """
+    n = len(y)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    if threshold <= 2:
+        return np.array([0, n - 1])[-max(threshold, 1):]
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket boundaries over the interior points 1..n-2
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    # Bucket averages don't depend on the points picked, so compute them up front; the
+    # anchor for the final bucket is the last point. NaNs are left out of the averages.
+    finite = ~np.isnan(y[:-1])
+    starts = edges[:-1]
+    counts = np.add.reduceat(finite, starts)
+    avg_x = np.append(np.add.reduceat(np.where(finite, x[:-1], 0.0), starts) / np.maximum(counts, 1), x[-1])[1:]
+    avg_y = np.append(np.add.reduceat(np.where(finite, y[:-1], 0.0), starts) / np.maximum(counts, 1), y[-1])[1:]
+    avg_y[np.append(counts, 1)[1:] == 0] = np.nan
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for b in range(threshold - 2):
+        lo, hi = edges[b], edges[b + 1]
+        ax, ay = x[previous], y[previous]
+        area = np.abs((ax - avg_x[b]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y[b] - ay))
+        area[np.isnan(area)] = -1.0
+        previous = lo + int(area.argmax())
+        kept[b + 1] = previous
+    return kept
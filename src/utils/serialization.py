@@ -1,23 +1,57 @@
+import json
 import math
-from typing import Any
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel
 
+# Values JSON renders as-is
+_PASSTHROUGH = frozenset({str, int, bool, type(None)})
+
 def sanitize_json_data(data: Any) -> Any:
     """
-    Recursively cleans data for JSON serialization.
+    Cleans data for JSON serialization in a single pass.
     - Replaces NaN/Inf with None.
     - Converts Pydantic models to dictionaries.
+    - Converts timestamps to ISO strings and NumPy scalars to Python values.
     - Recursively processes dicts and lists.
-    - Handles nested structures.
+
+    Dispatches on the exact type through a table, so the common shapes (ticker states,
+    signals, forecasts) never reach the generic checks; anything else falls back to
+    `sanitize_generic`, which defines the output.
+    """
+    kind = type(data)
+    if kind in _PASSTHROUGH:
+        return data
+    encode = _ENCODERS.get(kind)
+    if encode is not None:
+        return encode(data)
+    if isinstance(data, BaseModel):
+        return _encode_model(data)
+    return sanitize_generic(data)
+
+def render_json(data: Any) -> bytes:
+    """Encodes sanitized data byte-for-byte as FastAPI's JSONResponse renders it."""
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def join_json_object(members: Iterable[Tuple[str, bytes]]) -> bytes:
+    """Renders {key: value} from values that are already encoded with `render_json`."""
+    return b"{" + b",".join(render_json(key) + b":" + value for key, value in members) + b"}"
+
+def sanitize_generic(data: Any) -> Any:
+    """
+    Reference implementation: recursively cleans arbitrary data for JSON serialization,
+    checking each node's capabilities in turn.
     """
     try:
         if isinstance(data, BaseModel):
             data = data.dict()
-            
+
         if isinstance(data, dict):
-            return {str(k): sanitize_json_data(v) for k, v in data.items()}
+            return {str(k): sanitize_generic(v) for k, v in data.items()}
         elif isinstance(data, list):
-            return [sanitize_json_data(v) for v in data]
+            return [sanitize_generic(v) for v in data]
         elif isinstance(data, float):
             if math.isnan(data) or math.isinf(data):
                 return None
@@ -26,9 +60,65 @@ def sanitize_json_data(data: Any) -> Any:
             return data.isoformat()
         elif hasattr(data, 'item'): # Handles numpy scalars
             val = data.item()
-            return sanitize_json_data(val)
+            return sanitize_generic(val)
         elif hasattr(data, 'to_dict'):
-            return sanitize_json_data(data.to_dict())
+            return sanitize_generic(data.to_dict())
         return data
     except Exception:
         return None # Final fallback to prevent 500 crashes
+
+def _encode_float(value: float) -> Optional[float]:
+    # NaN and +/-Inf are the only floats for which x - x is not 0
+    return value if value - value == 0.0 else None
+
+def _encode_dict(data: Dict[Any, Any]) -> Dict[str, Any]:
+    out = {}
+    encoders = _ENCODERS
+    for key, value in data.items():
+        if type(key) is not str:
+            key = str(key)
+        kind = type(value)
+        if kind in _PASSTHROUGH:
+            out[key] = value
+        elif kind is float:
+            out[key] = value if value - value == 0.0 else None
+        else:
+            encode = encoders.get(kind)
+            out[key] = encode(value) if encode is not None else sanitize_json_data(value)
+    return out
+
+def _encode_list(data: list) -> list:
+    return [sanitize_json_data(value) for value in data]
+
+def _encode_item(value: Any) -> Any:
+    return sanitize_json_data(value.item())
+
+def _encode_isoformat(value: Any) -> str:
+    return value.isoformat()
+
+# Field names per model class whose dump is exactly its declared fields (None = use .dict())
+_MODEL_FIELDS: Dict[type, Optional[Tuple[str, ...]]] = {}
+
+def _encode_model(model: BaseModel) -> Any:
+    kind = type(model)
+    if kind not in _MODEL_FIELDS:
+        plain = not kind.model_computed_fields and kind.model_config.get("extra") != "allow"
+        _MODEL_FIELDS[kind] = tuple(kind.model_fields) if plain else None
+    fields = _MODEL_FIELDS[kind]
+    if fields is None:
+        return sanitize_json_data(model.dict())
+    return _encode_dict({name: getattr(model, name) for name in fields})
+
+_ENCODERS: Dict[type, Callable[[Any], Any]] = {
+    float: _encode_float,
+    np.float64: _encode_float,
+    dict: _encode_dict,
+    list: _encode_list,
+    datetime: _encode_isoformat,
+    date: _encode_isoformat,
+    pd.Timestamp: _encode_isoformat,
+    np.float32: _encode_item,
+    np.int64: _encode_item,
+    np.int32: _encode_item,
+    np.bool_: _encode_item
+}